@@ -16,11 +16,15 @@ export const GameProvider = ({ children }) => {
   const { user } = useAuth();
   const [currentRoom, setCurrentRoom] = useState(null);
   const [currentRound, setCurrentRound] = useState(null);
-  const [gameState, setGameState] = useState('menu'); // menu, lobby, playing
+  const [gameState, setGameState] = useState('menu'); // menu, lobby, playing, finished
+  const [finalScores, setFinalScores] = useState(null);
   const [pollInterval, setPollInterval] = useState(null);
   const [pollTimeout, setPollTimeout] = useState(null);
   const [roundFetchInFlight, setRoundFetchInFlight] = useState(false);
   const lastRoundFetchAt = useRef(0);
+  const socketRef = useRef(null);
+  const gameStateRef = useRef(gameState);
+  gameStateRef.current = gameState;
 
   // Global request rate limiter (single concurrency + min gap)
   const MIN_REQUEST_GAP_MS = 2000; // 2 seconds gap between ANY requests
@@ -157,14 +161,14 @@ export const GameProvider = ({ children }) => {
   };
 
   // Game actions
-  const getCurrentRound = async () => {
+  const getCurrentRound = async (force = false) => {
     if (!currentRoom) return null;
     
     try {
       if (roundFetchInFlight) return currentRound; // throttle overlapping calls
-      // Time-based throttle to further reduce frequency
+      // Time-based throttle to further reduce frequency (skipped for pushed phase changes)
       const now = Date.now();
-      if (now - lastRoundFetchAt.current < 5000) { // 5s min gap for round fetches
+      if (!force && now - lastRoundFetchAt.current < 5000) { // 5s min gap for round fetches
         return currentRound;
       }
       setRoundFetchInFlight(true);
@@ -233,6 +237,21 @@ export const GameProvider = ({ children }) => {
     }
   };
 
+  // Final standings stay on screen until the player returns to the menu
+  const showResults = (scores) => {
+    setFinalScores(scores || {});
+    setCurrentRoom(room => room && { ...room, status: 'finished' });
+    setCurrentRound(null);
+    setGameState('finished');
+  };
+
+  const returnToMenu = () => {
+    setCurrentRoom(null);
+    setCurrentRound(null);
+    setFinalScores(null);
+    setGameState('menu');
+  };
+
   const continueToNextRound = async () => {
     if (!currentRoom) return;
     
@@ -245,9 +264,7 @@ export const GameProvider = ({ children }) => {
         return { nextRound: response.next_round };
       } else {
         // Game ended
-        setGameState('menu');
-        setCurrentRoom(null);
-        setCurrentRound(null);
+        showResults(response.final_scores);
         return { gameEnded: true };
       }
     } catch (error) {
@@ -272,9 +289,9 @@ export const GameProvider = ({ children }) => {
           if (updatedRoom.status === 'in_progress' && gameState === 'lobby') {
             setGameState('playing');
           } else if (updatedRoom.status === 'finished') {
-            setGameState('menu');
-            setCurrentRoom(null);
-            setCurrentRound(null);
+            showResults(Object.fromEntries(
+              (updatedRoom.players || []).map(p => [p.nickname, p.score])
+            ));
             stopPolling();
             return;
           }
@@ -320,27 +337,96 @@ export const GameProvider = ({ children }) => {
     }
   };
 
+  // Real-time room updates over WebSocket
+  const socketUrl = (roomId) => {
+    const apiBase = axios.defaults.baseURL || window.location.origin;
+    const wsBase = new URL(apiBase, window.location.origin).origin.replace(/^http/, 'ws');
+    const token = localStorage.getItem('authToken');
+    return `${wsBase}/ws/rooms/${roomId}/${token ? `?token=${token}` : ''}`;
+  };
+
+  const handleSocketMessage = (message) => {
+    if (message.event === 'room_closed') {
+      setCurrentRoom(null);
+      setCurrentRound(null);
+      setGameState('menu');
+      return;
+    }
+
+    if (message.event === 'game_ended') {
+      showResults(message.final_scores);
+      return;
+    }
+
+    if (message.room) {
+      setCurrentRoom(message.room);
+      if (message.room.status === 'in_progress' && gameStateRef.current === 'lobby') {
+        setGameState('playing');
+      }
+    }
+
+    // Phase changes only carry the public round state; fetch our own view of it
+    if (message.round) {
+      getCurrentRound(true);
+    }
+  };
+
+  const connectSocket = (roomId) => {
+    disconnectSocket();
+    const socket = new WebSocket(socketUrl(roomId));
+
+    socket.onopen = () => stopPolling();
+    socket.onmessage = (e) => {
+      try {
+        handleSocketMessage(JSON.parse(e.data));
+      } catch (error) {
+        console.error('Socket message error:', error);
+      }
+    };
+    socket.onclose = () => {
+      if (socketRef.current === socket) {
+        socketRef.current = null;
+        // Fall back to slow polling until the room is left
+        startPolling();
+      }
+    };
+
+    socketRef.current = socket;
+  };
+
+  const disconnectSocket = () => {
+    const socket = socketRef.current;
+    if (socket) {
+      socketRef.current = null;
+      socket.close();
+    }
+  };
+
   // Cleanup on unmount
   useEffect(() => {
     return () => {
+      disconnectSocket();
       stopPolling();
     };
   }, []);
 
-  // Auto-start polling only in lobby (not during game to reduce backend load)
+  // Keep one socket open per room; polling only runs if the socket drops
+  const currentRoomId = currentRoom?.id;
   useEffect(() => {
-    if (currentRoom && gameState === 'lobby') {
-      startPolling();
+    if (currentRoomId && gameState !== 'menu') {
+      connectSocket(currentRoomId);
     } else {
+      disconnectSocket();
       stopPolling();
     }
-  }, [currentRoom, gameState]);
+  }, [currentRoomId, gameState === 'menu']);
 
   const value = {
     currentRoom,
     currentRound,
     gameState,
     setGameState,
+    finalScores,
     
     // Room management
     createRoom,
@@ -356,8 +442,9 @@ export const GameProvider = ({ children }) => {
     startVoting,
     submitVote,
     continueToNextRound,
+    returnToMenu,
     
-    // Polling
+    // Polling (fallback when the room socket is unavailable)
     startPolling,
     stopPolling,
     
@@ -9,7 +9,7 @@ import './GamePage.css';
 const GamePage = () => {
   const { roomId } = useParams();
   const navigate = useNavigate();
-  const { currentRoom, currentRound, getCurrentRound, submitAnswer, startVoting, submitVote, continueToNextRound, leaveRoom } = useGame();
+  const { currentRoom, currentRound, gameState, finalScores, getCurrentRound, submitAnswer, startVoting, submitVote, continueToNextRound, returnToMenu, leaveRoom } = useGame();
   const { user, getAvatarEmoji } = useAuth();
   const { showNotification } = useNotification();
   
@@ -81,7 +81,6 @@ const GamePage = () => {
       
       if (result.gameEnded) {
         showNotification('Game has ended!', 'info');
-        navigate('/menu');
       } else if (result.nextRound) {
         showNotification(`Round ${result.nextRound} started!`, 'success');
       }
@@ -119,6 +118,35 @@ const GamePage = () => {
     );
   }
 
+  if (gameState === 'finished') {
+    const standings = Object.entries(finalScores || {}).sort((a, b) => b[1] - a[1]);
+    return (
+      <div className="game-page">
+        <div className="container">
+          <div className="results-section">
+            <h2>Game Over</h2>
+            <div className="results-display">
+              {standings.map(([nickname, score], index) => (
+                <div key={nickname} className="result-item">
+                  <strong>{index + 1}. {nickname}</strong> {score} points
+                </div>
+              ))}
+            </div>
+            <button
+              className="btn btn-primary"
+              onClick={() => {
+                returnToMenu();
+                navigate('/menu');
+              }}
+            >
+              Return to Menu
+            </button>
+          </div>
+        </div>
+      </div>
+    );
+  }
+
   if (!currentRound) {
     return (
       <div className="game-page">
@@ -0,0 +1,401 @@
+# game/achievements.py - Incremental achievement evaluation
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.functional import cached_property
+import logging
+import threading
+
+from .models import Achievement, GameHistory, Teammate, UserAchievement, UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Triggers: a settled game ('game'), a hosted room ('hosted'), a new
+# account ('registered') and points added by unlocked achievements ('score')
+PERFECT_GAME_ROUNDS = 5
+MARATHON_MINUTES = 180
+NIGHT_HOURS = range(0, 6)
+
+
+def achievements_enabled():
+    return getattr(settings, 'GAME_SETTINGS', {}).get('ENABLE_ACHIEVEMENTS', True)
+
+
+class EvaluationContext:
+    """What the rules of one evaluation read, each loaded at most once.
+
+    ``histories`` holds the GameHistory of the game being settled, by
+    profile id. Rules never read the players' earlier games: running
+    totals live on the profile or in the progress value, so an evaluation
+    costs the same however long the players' histories are.
+    """
+
+    def __init__(self, profiles, histories=()):
+        self.profiles = profiles
+        self.histories = {history.player_id: history for history in histories}
+
+    @cached_property
+    def new_teammates(self):
+        """{profile id: players met for the first time in the settled game}"""
+        rooms = {history.room_id for history in self.histories.values()}
+        return dict(
+            Teammate.objects.filter(player_id__in=self.histories, room_id__in=rooms)
+            .values('player').annotate(count=Count('id')).values_list('player', 'count')
+        )
+
+    def registration_number(self, profile):
+        return User.objects.filter(id__lte=profile.user_id).count()
+
+
+def profile_field(field):
+    return lambda context, profile, progress, achievement: getattr(profile, field)
+
+
+def game_flag(test):
+    """Progress that becomes 1 once a settled game passes ``test``"""
+    def value(context, profile, progress, achievement):
+        history = context.histories.get(profile.pk)
+        return 1 if history is not None and test(history) else progress
+    return value
+
+
+def perfect_game(history):
+    return history.total_rounds >= PERFECT_GAME_ROUNDS and history.total_votes and history.correct_votes == history.total_votes
+
+
+def marathon_game(history):
+    return history.game_duration_minutes >= MARATHON_MINUTES
+
+
+def is_night(played_at):
+    return timezone.localtime(played_at).hour in NIGHT_HOURS
+
+
+def imposter_win_streak(context, profile, progress, achievement):
+    # The running streak is carried in the progress value; other roles' games don't break it
+    history = context.histories.get(profile.pk)
+    if history is None or history.role != 'imposter':
+        return progress
+    return progress + 1 if history.won else 0
+
+
+def night_games(context, profile, progress, achievement):
+    history = context.histories.get(profile.pk)
+    if history is not None and is_night(history.played_at):
+        return progress + 1
+    return progress
+
+
+def voting_accuracy(context, profile, progress, achievement):
+    if not profile.total_votes_cast:
+        return 0
+    return int(profile.total_correct_votes * 100 / profile.total_votes_cast)
+
+
+def distinct_teammates(context, profile, progress, achievement):
+    # The count is carried in the progress value; see statistics.record_teammates
+    return progress + context.new_teammates.get(profile.pk, 0)
+
+
+def early_adopter(context, profile, progress, achievement):
+    if context.registration_number(profile) <= achievement.requirement_value:
+        return achievement.requirement_value
+    return 0
+
+
+def replayed(attribute):
+    return lambda context, profile, achievement: getattr(context.replay(profile), attribute)
+
+
+def replayed_voting_accuracy(context, profile, achievement):
+    # Accuracy can fall; settling would have unlocked it at any game where it was reached
+    totals = context.replay(profile)
+    for games, accuracy in totals.accuracies:
+        if games >= achievement.min_games and accuracy >= achievement.requirement_value:
+            return accuracy
+    return totals.accuracies[-1][1] if totals.accuracies else 0
+
+
+def replayed_imposter_win_streak(context, profile, achievement):
+    totals = context.replay(profile)
+    if totals.best_imposter_streak >= achievement.requirement_value:
+        return totals.best_imposter_streak
+    return totals.imposter_streak
+
+
+def replayed_teammates(context, profile, achievement):
+    return context.teammates.get(profile.pk, 0)
+
+
+class Metric:
+    """``value`` moves progress on a trigger; ``replay`` recomputes it from a whole history.
+
+    Metrics that don't depend on the game just settled replay with their
+    own ``value`` function.
+    """
+
+    def __init__(self, triggers, value, replay=None):
+        self.triggers = set(triggers)
+        self.value = value
+        self.replay = replay or (lambda context, profile, achievement: value(context, profile, 0, achievement))
+
+
+# Achievement.metric -> the triggers that can move it and its progress function
+METRICS = {
+    'games_played': Metric({'game'}, profile_field('total_games')),
+    'imposter_wins': Metric({'game'}, profile_field('total_imposter_wins')),
+    'games_hosted': Metric({'hosted'}, profile_field('games_hosted')),
+    'total_score': Metric({'game', 'score'}, profile_field('total_score')),
+    'win_streak': Metric({'game'}, profile_field('best_win_streak')),
+    'imposter_win_streak': Metric({'game'}, imposter_win_streak, replayed_imposter_win_streak),
+    'voting_accuracy': Metric({'game'}, voting_accuracy, replayed_voting_accuracy),
+    'perfect_game': Metric({'game'}, game_flag(perfect_game), replayed('perfect_games')),
+    'distinct_teammates': Metric({'game'}, distinct_teammates, replayed_teammates),
+    'night_games': Metric({'game'}, night_games, replayed('night_games')),
+    'marathon_game': Metric({'game'}, game_flag(marathon_game), replayed('marathon_games')),
+    'early_adopter': Metric({'registered'}, early_adopter),
+}
+
+
+class AchievementIndex:
+    """Active achievements grouped by the triggers that can move them.
+
+    Loaded once per process and reloaded after Achievement rows change
+    (see ``game.signals``), so an evaluation only visits the rules its
+    trigger can affect.
+    """
+
+    lock = threading.Lock()
+    by_trigger = None
+
+    @classmethod
+    def invalidate(cls):
+        with cls.lock:
+            cls.by_trigger = None
+
+    @classmethod
+    def rules(cls, trigger):
+        with cls.lock:
+            if cls.by_trigger is None:
+                by_trigger = {}
+                for achievement in Achievement.objects.filter(is_active=True).exclude(metric=''):
+                    metric = METRICS.get(achievement.metric)
+                    if metric is None:
+                        continue
+                    for name in metric.triggers:
+                        by_trigger.setdefault(name, []).append(achievement)
+                cls.by_trigger = by_trigger
+            return cls.by_trigger.get(trigger, [])
+
+
+def save_progress(rows):
+    """Insert or update UserAchievement rows in one statement"""
+    UserAchievement.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['user', 'achievement'],
+        update_fields=['progress_value', 'is_completed', 'earned_at']
+    )
+
+
+def award(rows):
+    """Add the points of newly completed achievements to their profiles in one UPDATE"""
+    rewards = {}
+    for row in rows:
+        if row.achievement.points_reward:
+            rewards[row.user_id] = rewards.get(row.user_id, 0) + row.achievement.points_reward
+    if not rewards:
+        return {}
+    reward = Case(
+        *[When(pk=pk, then=Value(points)) for pk, points in rewards.items()],
+        default=Value(0), output_field=IntegerField()
+    )
+    UserProfile.objects.filter(pk__in=rewards).update(
+        total_score=F('total_score') + reward,
+        average_score_per_game=ExpressionWrapper(
+            Value(1.0) * (F('total_score') + reward) / Greatest(F('total_games'), 1),
+            output_field=FloatField()
+        ),
+    )
+
+    def refresh_rankings():
+        from .leaderboards import update_sorted_boards
+        update_sorted_boards(list(rewards))
+
+    transaction.on_commit(refresh_rankings)
+    return rewards
+
+
+def complete(rows):
+    """Mark UserAchievement rows completed and pay their rewards"""
+    now = timezone.now()
+    for row in rows:
+        row.is_completed = True
+        row.earned_at = now
+    save_progress(rows)
+    award(rows)
+
+
+def advance(profiles, rules, progress_of):
+    """Unsaved UserAchievement rows whose progress moved, and those that completed.
+
+    ``progress_of(profile, achievement, previous_progress)`` gives the new
+    progress; completed rows are never revisited.
+    """
+    existing = {
+        (row.user_id, row.achievement_id): row
+        for row in UserAchievement.objects.filter(user_id__in=profiles, achievement__in=rules)
+    }
+    now = timezone.now()
+    changed, unlocked = [], []
+    for profile in profiles.values():
+        for achievement in rules:
+            row = existing.get((profile.pk, achievement.pk))
+            if row is not None and row.is_completed:
+                continue
+            previous = row.progress_value if row is not None else 0
+            progress = min(progress_of(profile, achievement, previous), achievement.requirement_value)
+            done = progress >= achievement.requirement_value and profile.total_games >= achievement.min_games
+            if progress == previous and not done:
+                continue
+            if row is None:
+                row = UserAchievement(user=profile, achievement=achievement)
+            row.progress_value = progress
+            if done:
+                row.is_completed = True
+                row.earned_at = now
+                unlocked.append(row)
+            changed.append(row)
+    return changed, unlocked
+
+
+def evaluate(profile_ids, trigger, histories=()):
+    """Move the achievements ``trigger`` can affect forward for some profiles.
+
+    Returns the newly completed UserAchievement rows. Progress and unlocks
+    are written with one upsert, rewards with one UPDATE; rewards then
+    re-evaluate the score rules, as they may unlock a score milestone.
+    """
+    if not achievements_enabled() or not profile_ids:
+        return []
+    rules = AchievementIndex.rules(trigger)
+    if not rules:
+        return []
+
+    profiles = UserProfile.objects.in_bulk(profile_ids)
+    context = EvaluationContext(profiles, histories)
+    changed, unlocked = advance(
+        profiles, rules,
+        lambda profile, achievement, previous: METRICS[achievement.metric].value(
+            context, profile, previous, achievement
+        )
+    )
+    if changed:
+        save_progress(changed)
+    if unlocked:
+        rewards = award(unlocked)
+        logger.info(f"Unlocked {len(unlocked)} achievements for {len({row.user_id for row in unlocked})} players")
+        if rewards:
+            unlocked += evaluate(list(rewards), 'score')
+    return unlocked
+
+
+class HistoryTotals:
+    """What the game-scoped rules need from one player's whole history"""
+
+    __slots__ = ('games', 'correct_votes', 'total_votes', 'night_games', 'perfect_games', 'marathon_games',
+                 'imposter_streak', 'best_imposter_streak', 'accuracies')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+        self.accuracies = []  # (games played, voting accuracy) after each game
+
+    def add(self, history):
+        self.games += 1
+        self.correct_votes += history.correct_votes
+        self.total_votes += history.total_votes
+        if self.total_votes:
+            self.accuracies.append((self.games, int(self.correct_votes * 100 / self.total_votes)))
+        self.night_games += is_night(history.played_at)
+        self.perfect_games += bool(perfect_game(history))
+        self.marathon_games += marathon_game(history)
+        if history.role == 'imposter':
+            self.imposter_streak = self.imposter_streak + 1 if history.won else 0
+            self.best_imposter_streak = max(self.best_imposter_streak, self.imposter_streak)
+
+
+class BackfillContext(EvaluationContext):
+    """EvaluationContext over whole histories, read in one ordered pass.
+
+    Teammates are counted with one grouped query, and registration order
+    comes from two queries per chunk.
+    """
+
+    def __init__(self, profiles):
+        super().__init__(profiles)
+        self.totals = {}
+        read = 0
+        histories = (
+            GameHistory.objects.filter(player_id__in=profiles)
+            .order_by('player', 'played_at', 'pk')
+            .values_list('player_id', 'role', 'won', 'total_rounds', 'correct_votes', 'total_votes',
+                         'game_duration_minutes', 'played_at', named=True)
+        )
+        for history in histories.iterator(chunk_size=2000):
+            totals = self.totals.get(history.player_id)
+            if totals is None:
+                totals = self.totals[history.player_id] = HistoryTotals()
+            totals.add(history)
+            read += 1
+        self.read = read
+        self.teammates = dict(
+            Teammate.objects.filter(player_id__in=profiles)
+            .values('player').annotate(count=Count('id')).values_list('player', 'count')
+        )
+        user_ids = sorted(profile.user_id for profile in profiles.values())
+        before = User.objects.filter(id__lt=user_ids[0]).count()
+        registered = User.objects.filter(id__gte=user_ids[0], id__lte=user_ids[-1]).order_by('id')
+        self.registration = {
+            user_id: before + position
+            for position, user_id in enumerate(registered.values_list('id', flat=True), start=1)
+        }
+
+    def replay(self, profile):
+        return self.totals.get(profile.pk) or HistoryTotals()
+
+    def registration_number(self, profile):
+        return self.registration[profile.user_id]
+
+
+def backfill_chunk(first_pk, last_pk, names=None):
+    """Bring every achievement of the profiles with a pk in ``[first_pk, last_pk]`` up to date.
+
+    Each rule is replayed over the players' whole history, read in one
+    ordered pass, so players get credit for games played before the rule
+    existed. Progress is written with one upsert and new rewards paid with
+    one UPDATE. ``names`` limits the rules to some achievements. Runs in a
+    worker process of ``backfill_achievements``, so it only takes and
+    returns plain values: ``(histories read, rows written, unlocked)``.
+    """
+    rules = [
+        achievement for achievement in Achievement.objects.filter(is_active=True).exclude(metric='')
+        if achievement.metric in METRICS and (not names or achievement.name in names)
+    ]
+    profiles = UserProfile.objects.filter(pk__gte=first_pk, pk__lte=last_pk).in_bulk()
+    if not rules or not profiles:
+        return 0, 0, 0
+    context = BackfillContext(profiles)
+    changed, unlocked = advance(
+        profiles, rules,
+        lambda profile, achievement, previous: METRICS[achievement.metric].replay(context, profile, achievement)
+    )
+    with transaction.atomic():
+        if changed:
+            save_progress(changed)
+        rewards = award(unlocked)
+        if rewards:
+            unlocked += evaluate(list(rewards), 'score')
+    return context.read, len(changed), len(unlocked)
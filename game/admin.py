@@ -6,8 +6,9 @@ from django.db.models import Count, Avg
 from .models import (
     Question, DecoyQuestion, GameRoom, Player, 
     GameRound, PlayerAnswer, Vote, GameEvent,
-    UserProfile, GameHistory, Achievement, UserAchievement
+    UserProfile, GameHistory, Achievement, UserAchievement, RoomCode, RoundResult
 )
+from .statistics import audit_profiles
 
 
 @admin.register(UserProfile)
@@ -20,8 +21,8 @@ class UserProfileAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'user__email', 'user__first_name', 'user__last_name']
     readonly_fields = [
         'total_games', 'total_wins', 'total_imposter_wins', 'total_detective_wins',
-        'total_score', 'win_rate', 'imposter_win_rate', 'detective_win_rate',
-        'average_score_per_game', 'total_playtime_minutes', 'consecutive_wins',
+        'total_score', 'imposter_games', 'detective_games', 'win_rate', 'imposter_win_rate',
+        'detective_win_rate', 'average_score_per_game', 'total_playtime_minutes', 'consecutive_wins',
         'best_win_streak', 'rank', 'created_at', 'last_active'
     ]
     
@@ -68,9 +69,8 @@ class UserProfileAdmin(admin.ModelAdmin):
     actions = ['update_statistics']
     
     def update_statistics(self, request, queryset):
-        for profile in queryset:
-            profile.update_statistics()
-        self.message_user(request, f'Updated statistics for {queryset.count()} profiles.')
+        drift = audit_profiles(queryset, fix=True, full_streaks=True)
+        self.message_user(request, f'Rebuilt statistics for {len({profile.pk for profile, *_ in drift})} profiles.')
     update_statistics.short_description = 'Update statistics for selected profiles'
 
 
@@ -116,7 +116,7 @@ class GameHistoryAdmin(admin.ModelAdmin):
 @admin.register(Achievement)
 class AchievementAdmin(admin.ModelAdmin):
     list_display = ['icon_display', 'name', 'category', 'requirement_display', 'points_reward', 'is_active']
-    list_filter = ['category', 'requirement_type', 'is_active', 'is_hidden']
+    list_filter = ['category', 'requirement_type', 'metric', 'is_active', 'is_hidden']
     search_fields = ['name', 'description']
     
     def icon_display(self, obj):
@@ -230,6 +230,14 @@ class GameRoomAdmin(admin.ModelAdmin):
     player_count_display.short_description = 'Players'
 
 
+@admin.register(RoomCode)
+class RoomCodeAdmin(admin.ModelAdmin):
+    list_display = ['code', 'room', 'allocated_at']
+    list_filter = [('room', admin.EmptyFieldListFilter)]
+    search_fields = ['code', 'room__name']
+    readonly_fields = ['code', 'slot', 'room', 'allocated_at']
+
+
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
     list_display = [
@@ -402,6 +410,13 @@ class VoteAdmin(admin.ModelAdmin):
     was_correct.short_description = 'Accuracy'
 
 
+@admin.register(RoundResult)
+class RoundResultAdmin(admin.ModelAdmin):
+    list_display = ['round', 'imposter', 'imposter_caught', 'most_voted_player', 'total_votes', 'created_at']
+    list_filter = ['imposter_caught', 'created_at']
+    readonly_fields = ['created_at']
+
+
 @admin.register(GameEvent)
 class GameEventAdmin(admin.ModelAdmin):
     list_display = ['event_type', 'room_name', 'player_name', 'timestamp']
@@ -0,0 +1,133 @@
+# game/batch.py - Chunked, resumable, multi-process batch jobs over a table
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.db import connections
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_ranges(queryset, size, after=None):
+    """Yield ``(first_pk, last_pk)`` bounds of consecutive ``size``-row chunks.
+
+    Only primary keys are streamed, so the bounds of a large table are
+    computed without loading its rows.
+    """
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    if after is not None:
+        pks = pks.filter(pk__gt=after)
+    chunk = []
+    for pk in pks.iterator(chunk_size=size * 10):
+        chunk.append(pk)
+        if len(chunk) == size:
+            yield chunk[0], chunk[-1]
+            chunk = []
+    if chunk:
+        yield chunk[0], chunk[-1]
+
+
+class Checkpoint:
+    """High-water mark of a chunked job, kept in a JSON file.
+
+    Chunks may finish out of order across processes; the mark only moves
+    past a chunk once every chunk before it is done, so a resumed job never
+    skips work (it may redo a few chunks).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.after = None
+        self.pending = []  # bounds handed out, in order
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as checkpoint:
+                self.after = json.load(checkpoint).get('after')
+
+    def started(self, bounds):
+        self.pending.append(bounds)
+
+    def finished(self, bounds):
+        self.done.add(bounds)
+        moved = False
+        while self.pending and self.pending[0] in self.done:
+            self.done.discard(self.pending[0])
+            self.after = self.pending.pop(0)[1]
+            moved = True
+        if moved:
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as checkpoint:
+            json.dump({'after': self.after}, checkpoint)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Throughput:
+    """Rows per second of a running job"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.rows = 0
+        self.chunks = 0
+
+    def add(self, rows):
+        self.rows += rows
+        self.chunks += 1
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def __str__(self):
+        rate = self.rows / self.elapsed if self.elapsed else 0
+        return f'{self.rows} rows in {self.chunks} chunks, {self.elapsed:.1f}s ({rate:.0f} rows/s)'
+
+
+def setup_worker():
+    import django
+    django.setup()  # Needed when workers are spawned rather than forked
+    connections.close_all()
+
+
+def run_chunks(func, chunks, workers=1, checkpoint=None):
+    """Call ``func(first_pk, last_pk)`` for every chunk, yielding ``(bounds, result)``.
+
+    With more than one worker the chunks are spread over a process pool.
+    Their bounds are listed up front and the parent's connections closed
+    before the pool forks, so no connection is shared with a worker.
+    ``checkpoint`` is advanced as chunks complete.
+    """
+    if workers <= 1:
+        for bounds in chunks:
+            if checkpoint:
+                checkpoint.started(bounds)
+            result = func(*bounds)
+            if checkpoint:
+                checkpoint.finished(bounds)
+            yield bounds, result
+        return
+
+    chunks = list(chunks)
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=setup_worker) as pool:
+        running = {}
+        for bounds in chunks:
+            if checkpoint:
+                checkpoint.started(bounds)
+            running[pool.submit(func, *bounds)] = bounds
+        for future in as_completed(running):
+            bounds = running[future]
+            result = future.result()
+            if checkpoint:
+                checkpoint.finished(bounds)
+            yield bounds, result
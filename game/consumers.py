@@ -0,0 +1,63 @@
+# game/consumers.py - WebSocket consumers
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.core.exceptions import ValidationError
+import logging
+
+from .models import GameRoom
+from .read_models import get_room_detail, room_detail
+from .realtime import room_group_name
+
+logger = logging.getLogger(__name__)
+
+
+class RoomConsumer(AsyncJsonWebsocketConsumer):
+    """Per-room socket that relays room and round state pushed by the views.
+
+    Clients receive the full room state on connect and then one message per
+    change (joins, leaves, ready toggles, phase changes and final scores).
+    Round questions are never broadcast since the imposter sees a different
+    one; clients fetch their own round when a phase change arrives.
+    """
+
+    async def connect(self):
+        self.room_id = str(self.scope['url_route']['kwargs']['room_id'])
+        self.group_name = None
+        user = self.scope.get('user')
+
+        if not user or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        room_state = await self.get_room_state(user)
+        if room_state is None:
+            await self.close(code=4403)
+            return
+
+        self.group_name = room_group_name(self.room_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_json({'event': 'room_state', 'room_id': self.room_id, 'room': room_state})
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('type') == 'ping':
+            await self.send_json({'event': 'pong'})
+
+    async def room_event(self, event):
+        await self.send_json(event['payload'])
+
+    @database_sync_to_async
+    def get_room_state(self, user):
+        """Room snapshot for a member of the room, None for anyone else"""
+        try:
+            room = get_room_detail(self.room_id)
+        except (GameRoom.DoesNotExist, ValidationError, ValueError):
+            return None
+        if not any(player.user_id == user.id for player in room.players.all()):
+            return None
+        return room_detail(room)
@@ -0,0 +1,133 @@
+# game/decks.py - Pre-shuffled per-room question decks
+
+from django.conf import settings
+import logging
+import random
+import threading
+import time
+
+from .models import Question, DecoyQuestion
+
+logger = logging.getLogger(__name__)
+
+# Room difficulty -> inclusive range of Question.difficulty values
+DIFFICULTY_RANGES = {
+    'easy': (1.0, 2.0),
+    'medium': (2.0, 3.0),
+    'hard': (3.0, 4.0),
+    'expert': (4.0, 5.0),
+}
+
+
+def catalog_max_age():
+    return getattr(settings, 'GAME_SETTINGS', {}).get('QUESTION_CATALOG_SECONDS', 300)
+
+
+class QuestionCatalog:
+    """Active questions bucketed by (category, difficulty), plus active decoys.
+
+    Loaded once per process and reloaded after ``Question`` or
+    ``DecoyQuestion`` rows change (see ``game.signals``), or after
+    ``QUESTION_CATALOG_SECONDS`` so changes made by other processes or by
+    bulk updates are picked up too.
+    """
+
+    lock = threading.Lock()
+    buckets = None
+    decoys = None
+    generation = 0
+    loaded_at = 0.0
+
+    @classmethod
+    def invalidate(cls):
+        with cls.lock:
+            cls.buckets = None
+
+    @classmethod
+    def ensure_loaded(cls):
+        """``(buckets, decoys, generation)`` of the current load.
+
+        Taken together under the lock: ``invalidate()`` may run on another
+        thread at any time, so callers work on these and never on the
+        class attributes.
+        """
+        with cls.lock:
+            if cls.buckets is not None and time.monotonic() - cls.loaded_at < catalog_max_age():
+                return cls.buckets, cls.decoys, cls.generation
+            buckets = {}
+            for question in Question.objects.filter(is_active=True):
+                buckets.setdefault((question.category, question.difficulty), {})[question.id] = question
+            cls.buckets = buckets
+            cls.decoys = {decoy.id: decoy for decoy in DecoyQuestion.objects.filter(is_active=True)}
+            cls.generation += 1
+            cls.loaded_at = time.monotonic()
+            logger.info(f"Question catalog loaded: {sum(map(len, buckets.values()))} questions in {len(buckets)} buckets")
+            return buckets, cls.decoys, cls.generation
+
+
+def questions_for(buckets, category, difficulty_level):
+    """Active questions of a catalog load matching a room's category and difficulty preferences"""
+    low, high = DIFFICULTY_RANGES.get(difficulty_level, (float('-inf'), float('inf')))
+    matches = {}
+    for (bucket_category, difficulty), questions in buckets.items():
+        if category and bucket_category != category:
+            continue
+        if low <= difficulty <= high:
+            matches.update(questions)
+    return matches
+
+
+class Deck:
+    """Shuffled cards dealt without replacement; reshuffled once exhausted"""
+
+    def __init__(self):
+        self.dealt = set()
+        self.remaining = []
+        self.generation = None
+
+    def deal(self, cards, generation):
+        """Deal one card from ``cards`` (id -> object), rebuilding when ``generation`` moves on"""
+        if not cards:
+            return None
+        if self.generation != generation:
+            self.remaining = [card_id for card_id in cards if card_id not in self.dealt]
+            random.shuffle(self.remaining)
+            self.generation = generation
+        
+        while self.remaining:
+            card_id = self.remaining.pop()
+            if card_id in cards:
+                self.dealt.add(card_id)
+                return cards[card_id]
+        
+        # Every card has been dealt in this game; start a fresh shuffle
+        self.dealt.clear()
+        self.remaining = list(cards)
+        random.shuffle(self.remaining)
+        card_id = self.remaining.pop()
+        self.dealt.add(card_id)
+        return cards[card_id]
+
+
+class RoomDecks:
+    """Question and decoy decks of every room with a game in progress"""
+
+    decks = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def deal(cls, room):
+        """Next (question, decoy) pair for a room; either may be None if none are active"""
+        buckets, decoys, generation = QuestionCatalog.ensure_loaded()
+        with cls.lock:
+            question_deck, decoy_deck = cls.decks.setdefault(str(room.id), (Deck(), Deck()))
+            question = question_deck.deal(
+                questions_for(buckets, room.category_preference, room.difficulty_level), generation
+            )
+            decoy = decoy_deck.deal(decoys, generation)
+        return question, decoy
+
+    @classmethod
+    def discard(cls, room_id):
+        with cls.lock:
+            cls.decks.pop(str(room_id), None)
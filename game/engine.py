@@ -0,0 +1,268 @@
+# game/engine.py - In-memory round engine, persisted at phase boundaries
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import logging
+import threading
+
+from .journal import journal_events, make_event
+from .models import GameRound, Player, PlayerAnswer, Vote
+from .serializers import PlayerAnswerSerializer, VoteSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class RoundError(Exception):
+    """A player action the current round cannot accept"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RoundState:
+    """Authoritative state of one room's current round.
+
+    Answers, votes and their events are held here while a phase runs and
+    written in bulk when the phase ends, so a submission costs no queries.
+    Every mutation runs under ``lock``, which serializes the players of a
+    room without blocking other rooms. Pending rows are only visible to the
+    process holding them, so a room's submissions should reach one process;
+    ``RoundEngine.for_room`` reloads a copy that another process has moved
+    past (see ``stored_version``).
+    """
+
+    def __init__(self, game_round, players):
+        self.lock = threading.RLock()
+        self.round_id = game_round.id
+        self.room_id = game_round.room_id
+        self.round_number = game_round.round_number
+        self.status = game_round.status
+        self.version = game_round.state_version
+        self.stored_version = game_round.state_version  # GameRound.state_version as last loaded or written
+        self.imposter_id = game_round.imposter_id
+        self.question_text = game_round.question.text
+        self.decoy_question_text = game_round.decoy_question.text
+        self.players = {player.id: player for player in players}
+        self.answers = {}
+        self.votes = {}
+        self.events = []
+
+    def player_for_user(self, user_id):
+        for player in self.players.values():
+            if player.user_id == user_id:
+                return player
+        raise RoundError('Player not found', 404)
+
+    def connected_ids(self):
+        return {pid for pid, player in self.players.items() if player.is_connected}
+
+    def record_event(self, event_type, player=None, **data):
+        self.events.append(make_event(self.room_id, event_type, player, data))
+
+    def expect(self, status, message):
+        if self.status != status:
+            raise RoundError(message)
+
+    def submit_answer(self, user_id, answer):
+        """Record an answer; returns True when it completed the answering phase"""
+        with self.lock:
+            self.expect('answering', 'Not in answering phase')
+            player = self.player_for_user(user_id)
+            self.answers[player.id] = PlayerAnswer(round_id=self.round_id, player=player, answer=answer)
+            self.record_event('answer_submitted', player=player, answer=answer)
+            self.version += 1
+
+            if len(self.answers.keys() & self.connected_ids()) < len(self.connected_ids()):
+                return False
+
+            self.advance(
+                'discussion', 'discussion_started',
+                {
+                    'round_number': self.round_number,
+                    'total_answers': len(self.answers),
+                    'question_text': self.question_text,
+                    'decoy_question_text': self.decoy_question_text
+                },
+                discussion_started_at=timezone.now()
+            )
+            return True
+
+    def start_voting(self):
+        with self.lock:
+            self.expect('discussion', 'Not in discussion phase')
+            self.advance(
+                'voting', 'voting_started', {'round_number': self.round_number},
+                voting_started_at=timezone.now()
+            )
+
+    def submit_vote(self, user_id, accused_id):
+        """Record a vote; returns True when it completed the voting phase.
+
+        The round is left in ``closed`` state for ``end_round`` to settle.
+        """
+        with self.lock:
+            self.expect('voting', 'Not in voting phase')
+            voter = self.player_for_user(user_id)
+            accused = self.players.get(accused_id)
+            if accused is None:
+                raise RoundError('Accused player not found', 404)
+            if voter.id == accused.id:
+                raise RoundError('Cannot vote for yourself')
+
+            self.votes[voter.id] = Vote(round_id=self.round_id, voter=voter, accused=accused)
+            self.record_event('vote_submitted', player=voter, accused_id=accused.id)
+            self.version += 1
+
+            if len(self.votes.keys() & self.connected_ids()) < len(self.connected_ids()):
+                return False
+
+            self.advance('closed')
+            return True
+
+    def advance(self, status, event_type=None, event_data=None, **round_fields):
+        """End the running phase: persist it and move the round to ``status``.
+
+        If the write fails the phase stays open with its pending rows intact.
+        """
+        pending_events = list(self.events)
+        if event_type:
+            self.record_event(event_type, **event_data)
+        if status != 'closed':
+            round_fields['status'] = status
+        try:
+            self.flush(**round_fields)
+        except Exception:
+            self.events = pending_events
+            raise
+        self.status = status
+
+    def flush(self, **round_fields):
+        """Persist pending answers and votes; events go to the journal on commit"""
+        with transaction.atomic():
+            if self.answers:
+                PlayerAnswer.objects.bulk_create(
+                    self.answers.values(), update_conflicts=True,
+                    unique_fields=['round', 'player'], update_fields=['answer']
+                )
+            if self.votes:
+                Vote.objects.bulk_create(
+                    self.votes.values(), update_conflicts=True,
+                    unique_fields=['round', 'voter'], update_fields=['accused']
+                )
+            journal_events(self.events, flush=True)
+            GameRound.objects.filter(pk=self.round_id).update(state_version=self.version + 1, **round_fields)
+        self.version += 1
+        self.stored_version = self.version
+        self.events = []
+
+    def is_current(self, round_id, stored_version):
+        """Whether this state still matches the round's row"""
+        with self.lock:
+            return self.round_id == round_id and self.stored_version == stored_version
+
+    def sync_players(self):
+        """Reload the room's players, dropping pending rows of those who left"""
+        with self.lock:
+            self.players = {player.id: player for player in room_players(self.room_id)}
+            self.answers = {pid: a for pid, a in self.answers.items() if pid in self.players}
+            self.votes = {
+                pid: v for pid, v in self.votes.items()
+                if pid in self.players and v.accused_id in self.players
+            }
+            self.events = [e for e in self.events if e.player_id is None or e.player_id in self.players]
+            self.version += 1
+
+    def overlay(self, data):
+        """Apply pending answers and votes to a serialized round"""
+        with self.lock:
+            data['status'] = self.status if self.status != 'closed' else 'voting'
+            data['answers'] = PlayerAnswerSerializer(list(self.answers.values()), many=True).data
+            data['votes'] = VoteSerializer(list(self.votes.values()), many=True).data
+            data['state_version'] = self.version
+        return data
+
+
+def room_players(room_id):
+    return list(Player.objects.filter(room_id=room_id).select_related('user__profile'))
+
+
+def current_round_version(room_id):
+    """``(id, state_version)`` of a room's running round, or None"""
+    return (GameRound.objects
+            .filter(room_id=room_id, round_number=F('room__current_round'), room__status='in_progress')
+            .values_list('id', 'state_version').first())
+
+
+def load_round_state(room_id):
+    """Build the state of a room's current round from the database"""
+    game_round = (GameRound.objects.select_related('question', 'decoy_question')
+                  .filter(room_id=room_id, round_number=F('room__current_round'),
+                          room__status='in_progress')
+                  .first())
+    if game_round is None:
+        return None
+
+    state = RoundState(game_round, room_players(room_id))
+    for answer in PlayerAnswer.objects.filter(round=game_round):
+        answer.player = state.players.get(answer.player_id)
+        state.answers[answer.player_id] = answer
+    for vote in Vote.objects.filter(round=game_round):
+        vote.voter = state.players.get(vote.voter_id)
+        vote.accused = state.players.get(vote.accused_id)
+        state.votes[vote.voter_id] = vote
+    return state
+
+
+class RoundEngine:
+    """Process-wide registry of loaded round states, one per room"""
+
+    states = {}
+    registry_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, room_id):
+        """Loaded state for a room, without touching the database"""
+        return cls.states.get(str(room_id))
+
+    @classmethod
+    def for_room(cls, room_id):
+        """State of a room's current round, loading it on first use.
+
+        One indexed query checks the loaded state against the round's
+        stored version; a state left behind by another process (which moved
+        the phase on, or settled the round and discarded its own copy) is
+        replaced by a fresh load instead of rejecting actions.
+        """
+        key = str(room_id)
+        current = current_round_version(room_id)
+        if current is None:
+            cls.discard(room_id)
+            raise RoundError('Current round not found', 404)
+        state = cls.states.get(key)
+        if state is not None and state.is_current(*current):
+            return state
+
+        state = load_round_state(room_id)
+        if state is None:
+            raise RoundError('Current round not found', 404)
+        with cls.registry_lock:
+            loaded = cls.states.get(key)
+            # Another thread may have reloaded it, or flushed it up to date, meanwhile
+            if loaded is not None and loaded.is_current(state.round_id, state.stored_version):
+                return loaded
+            cls.states[key] = state
+            return state
+
+    @classmethod
+    def discard(cls, room_id):
+        """Forget a room's state once its round has been settled"""
+        with cls.registry_lock:
+            cls.states.pop(str(room_id), None)
+
+    @classmethod
+    def players_changed(cls, room_id):
+        state = cls.get(room_id)
+        if state is not None:
+            state.sync_players()
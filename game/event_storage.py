@@ -0,0 +1,308 @@
+# game/event_storage.py - Pluggable storage for GameEvent streams
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+import shutil
+import threading
+
+from .models import GameEvent, GameRoom, Player, RoomSnapshot
+from .streams import PHASE_EVENTS
+
+logger = logging.getLogger(__name__)
+
+
+def storage_setting(name, default):
+    return getattr(settings, 'GAME_SETTINGS', {}).get(name, default)
+
+
+class DatabaseEventStore:
+    """Every event is a GameEvent row (the default)"""
+
+    def write(self, events):
+        """Insert events in order; returns the number of rows written"""
+        try:
+            with transaction.atomic():
+                GameEvent.objects.bulk_create(events)
+        except IntegrityError:
+            # A room or player went away while its events were buffered
+            events = self.without_deleted_rows(events)
+            GameEvent.objects.bulk_create(events)
+        return len(events)
+
+    def without_deleted_rows(self, events):
+        """Drop events of deleted rooms; detach events from deleted players"""
+        room_ids = set(GameRoom.objects.filter(
+            id__in={event.room_id for event in events}
+        ).values_list('id', flat=True))
+        player_ids = set(Player.objects.filter(
+            id__in={event.player_id for event in events if event.player_id}
+        ).values_list('id', flat=True))
+        kept = []
+        for event in events:
+            if event.room_id not in room_ids:
+                continue
+            if event.player_id and event.player_id not in player_ids:
+                event.player_id = None
+            kept.append(event)
+        return kept
+
+    def read(self, room_id, after=None):
+        """All events of a room in order, oldest first"""
+        events = GameEvent.objects.filter(room_id=room_id).order_by('id')
+        if after is not None:
+            events = events.filter(id__gt=after)
+        return events.iterator()
+
+    def tail(self, room_id, count):
+        """The newest ``count`` events of a room, newest first"""
+        return list(GameEvent.objects.filter(room_id=room_id)
+                    .select_related('player__user').order_by('-id')[:count])
+
+
+class FileEventStore(DatabaseEventStore):
+    """Each room's events in a segmented append-only log on local disk.
+
+    ``<EVENT_LOG_DIR>/<room_id>/<segment>.jsonl`` holds one JSON event per
+    line with a per-room sequence number; a new segment starts every
+    ``EVENT_LOG_SEGMENT_EVENTS`` events. Only phase events are still
+    inserted as GameEvent rows, as the index the SSE feed polls. Rooms are
+    expected to be served by one process, as with the round engine.
+    """
+
+    def __init__(self, directory=None, segment_events=None):
+        self.directory = str(directory or storage_setting(
+            'EVENT_LOG_DIR', os.path.join(settings.BASE_DIR, 'event_logs')
+        ))
+        self.segment_events = segment_events or storage_setting('EVENT_LOG_SEGMENT_EVENTS', 1000)
+        self.lock = threading.Lock()
+        self.positions = {}  # room_id -> [segment number, events in segment, next sequence]
+
+    def room_dir(self, room_id):
+        return os.path.join(self.directory, str(room_id))
+
+    def segments(self, room_id):
+        """Segment numbers of a room, oldest first"""
+        try:
+            names = os.listdir(self.room_dir(room_id))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-6]) for name in names if name.endswith('.jsonl'))
+
+    def segment_path(self, room_id, segment):
+        return os.path.join(self.room_dir(room_id), f'{segment:08d}.jsonl')
+
+    def read_segment(self, room_id, segment):
+        try:
+            with open(self.segment_path(room_id, segment), encoding='utf-8') as log:
+                return [json.loads(line) for line in log if line.strip()]
+        except FileNotFoundError:
+            return []  # Pruned while being read
+
+    def position(self, room_id):
+        key = str(room_id)
+        if key not in self.positions:
+            segments = self.segments(room_id)
+            if segments:
+                records = self.read_segment(room_id, segments[-1])
+                next_seq = records[-1]['seq'] + 1 if records else 1
+                self.positions[key] = [segments[-1], len(records), next_seq]
+            else:
+                self.positions[key] = [1, 0, 1]
+        return self.positions[key]
+
+    def write(self, events):
+        """Index phase events in the database, then append every event to its room's log.
+
+        Both steps skip events an earlier, failed attempt already wrote (the
+        journal requeues the same objects), so a retried batch is never
+        inserted or logged twice.
+        """
+        if not events:
+            return 0
+        super().write([event for event in events if event.event_type in PHASE_EVENTS and event.pk is None])
+        with self.lock:
+            for room_id in dict.fromkeys(event.room_id for event in events):
+                self.append(room_id, [
+                    event for event in events
+                    if event.room_id == room_id and getattr(event, 'log_seq', None) is None
+                ])
+        return len(events)
+
+    def to_record(self, event, seq):
+        return {
+            'seq': seq,
+            'event_id': event.pk,  # The phase-event index row, if any
+            'event_type': event.event_type,
+            'player_id': event.player_id,
+            'data': event.data,
+            'timestamp': event.timestamp.isoformat(),
+        }
+
+    def append(self, room_id, events):
+        """Append events to a room's log; each gets ``log_seq`` once it is on disk"""
+        if not events:
+            return
+        position = self.position(room_id)
+        os.makedirs(self.room_dir(room_id), exist_ok=True)
+        pending = []
+        try:
+            for event in events:
+                if position[1] >= self.segment_events:
+                    self.flush_lines(room_id, position[0], pending)
+                    pending = []
+                    position[0] += 1
+                    position[1] = 0
+                pending.append((event, position[2]))
+                position[1] += 1
+                position[2] += 1
+            self.flush_lines(room_id, position[0], pending)
+        except Exception:
+            # The counters ran ahead of the disk; re-read them on the next write
+            self.positions.pop(str(room_id), None)
+            raise
+
+    def flush_lines(self, room_id, segment, pending):
+        if not pending:
+            return
+        with open(self.segment_path(room_id, segment), 'a', encoding='utf-8') as log:
+            log.writelines(json.dumps(self.to_record(event, seq)) + '\n' for event, seq in pending)
+            log.flush()
+            os.fsync(log.fileno())
+        for event, seq in pending:
+            event.log_seq = seq
+
+    def to_event(self, room_id, record):
+        """Unsaved GameEvent for a log record; its id is the room sequence number"""
+        return GameEvent(
+            id=record['seq'],
+            room_id=room_id,
+            event_type=record['event_type'],
+            player_id=record['player_id'],
+            data=record['data'],
+            timestamp=datetime.fromisoformat(record['timestamp']),
+        )
+
+    def read(self, room_id, after=None):
+        """Replay a room's log from the start, one segment in memory at a time"""
+        for segment in self.segments(room_id):
+            for record in self.read_segment(room_id, segment):
+                if after is None or record['seq'] > after:
+                    yield self.to_event(room_id, record)
+
+    def tail(self, room_id, count):
+        """Read segments backwards until ``count`` events are collected"""
+        records = []
+        for segment in reversed(self.segments(room_id)):
+            records[:0] = self.read_segment(room_id, segment)
+            if len(records) >= count:
+                break
+        events = [self.to_event(room_id, record) for record in reversed(records[-count:])]
+        players = Player.objects.select_related('user').in_bulk(
+            {event.player_id for event in events if event.player_id}
+        )
+        for event in events:
+            # Players may have left since; their events keep the id only
+            event.player = players.get(event.player_id)
+        return events
+
+    def archive(self, room_id):
+        """Merge a room's GameEvent rows into its log; returns the number of rows moved.
+
+        Rows the log already holds (the phase-event index) are matched by
+        their id and not written twice. The merged log is rewritten in
+        timestamp order, so rows recorded before the store was switched to
+        files land where they happened rather than after newer records.
+        """
+        rows = list(GameEvent.objects.filter(room_id=room_id).order_by('id'))
+        if not rows:
+            return 0
+        with self.lock:
+            records = [
+                record for segment in self.segments(room_id)
+                for record in self.read_segment(room_id, segment)
+            ]
+            logged_ids = {record.get('event_id') for record in records} - {None}
+            # Logs written before records carried an event id
+            legacy = {self.identity(record) for record in records if record.get('event_id') is None}
+            for row in rows:
+                record = self.to_record(row, None)
+                if row.id not in logged_ids and self.identity(record) not in legacy:
+                    records.append(record)
+            # Stable, so records sharing a timestamp keep their log order
+            records.sort(key=lambda record: datetime.fromisoformat(record['timestamp']))
+            self.rewrite(room_id, records)
+        GameEvent.objects.filter(id__in=[row.id for row in rows]).delete()
+        # Snapshot positions were row ids; replays rebuild them from the log
+        RoomSnapshot.objects.filter(room_id=room_id).delete()
+        return len(rows)
+
+    def identity(self, record):
+        return (record['event_type'], record['player_id'], record['timestamp'],
+                json.dumps(record['data'], sort_keys=True))
+
+    def rewrite(self, room_id, records):
+        """Replace a room's log with ``records``, renumbered from 1, in new segments"""
+        room_dir = self.room_dir(room_id)
+        staging = f'{room_dir}.rewrite'
+        retired = f'{room_dir}.old'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for start in range(0, len(records), self.segment_events):
+            name = os.path.basename(self.segment_path(room_id, start // self.segment_events + 1))
+            with open(os.path.join(staging, name), 'w', encoding='utf-8') as log:
+                for seq, record in enumerate(records[start:start + self.segment_events], start=start + 1):
+                    log.write(json.dumps({**record, 'seq': seq}) + '\n')
+                log.flush()
+                os.fsync(log.fileno())
+        if os.path.isdir(room_dir):
+            os.replace(room_dir, retired)
+        os.replace(staging, room_dir)
+        shutil.rmtree(retired, ignore_errors=True)
+        self.positions.pop(str(room_id), None)
+
+    def prune(self, retention_days=None):
+        """Delete the logs of rooms last written before the retention window; returns the room count.
+
+        A room's log is only ever removed as a whole, so a replay never
+        starts partway through a game.
+        """
+        retention_days = retention_days or storage_setting('EVENT_LOG_RETENTION_DAYS', 30)
+        cutoff = (timezone.now() - timedelta(days=retention_days)).timestamp()
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return 0
+        with self.lock:
+            for room_id in os.listdir(self.directory):
+                room_dir = self.room_dir(room_id)
+                # Skip files and the staging directories of an interrupted rewrite
+                if '.' in room_id or not os.path.isdir(room_dir):
+                    continue
+                segments = self.segments(room_id)
+                # The newest segment holds the room's last write
+                if segments and os.path.getmtime(self.segment_path(room_id, segments[-1])) >= cutoff:
+                    continue
+                shutil.rmtree(room_dir)
+                self.positions.pop(room_id, None)
+                removed += 1
+        return removed
+
+
+STORES = {
+    'database': DatabaseEventStore,
+    'file': FileEventStore,
+}
+
+_store = None
+
+
+def event_store():
+    """The configured store (GAME_SETTINGS['EVENT_STORAGE'], 'database' by default)"""
+    global _store
+    if _store is None:
+        _store = STORES[storage_setting('EVENT_STORAGE', 'database')]()
+    return _store
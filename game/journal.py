@@ -0,0 +1,132 @@
+# game/journal.py - Write-behind journal for GameEvent rows
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+import atexit
+import logging
+import threading
+import time
+
+from .event_storage import event_store
+from .models import GameEvent
+
+logger = logging.getLogger(__name__)
+
+
+def journal_batch_size():
+    return getattr(settings, 'GAME_SETTINGS', {}).get('EVENT_JOURNAL_BATCH_SIZE', 200)
+
+
+def journal_flush_seconds():
+    return getattr(settings, 'GAME_SETTINGS', {}).get('EVENT_JOURNAL_FLUSH_SECONDS', 2.0)
+
+
+class EventJournal:
+    """Per-process FIFO of GameEvents written in batches to the event store.
+
+    Events join the buffer when the recording transaction commits and are
+    written in arrival order, so ids keep each room's event order. The buffer
+    is flushed when it reaches ``EVENT_JOURNAL_BATCH_SIZE``, when its oldest
+    event is older than ``EVENT_JOURNAL_FLUSH_SECONDS`` (checked by a
+    background thread), at phase boundaries and at interpreter exit.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.oldest_at = None
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.flusher = None
+
+    def append(self, event):
+        with self.lock:
+            if not self.buffer:
+                self.oldest_at = time.monotonic()
+            self.buffer.append(event)
+            full = len(self.buffer) >= journal_batch_size()
+        self.ensure_flusher()
+        if full:
+            self.flush()
+
+    def take(self):
+        with self.lock:
+            events, self.buffer, self.oldest_at = self.buffer, [], None
+        return events
+
+    def flush(self):
+        """Write every buffered event; returns how many rows were inserted.
+
+        On failure the events go back to the front of the buffer for the
+        next flush.
+        """
+        with self.flush_lock:
+            events = self.take()
+            if not events:
+                return 0
+            try:
+                return event_store().write(events)
+            except Exception as e:
+                logger.error(f"Event journal flush failed, requeueing {len(events)} events: {str(e)}")
+                with self.lock:
+                    self.buffer[:0] = events
+                    self.oldest_at = time.monotonic()
+                return 0
+
+    def due(self):
+        with self.lock:
+            return self.oldest_at is not None and time.monotonic() - self.oldest_at >= journal_flush_seconds()
+
+    def ensure_flusher(self):
+        if self.flusher is not None:
+            return
+        with self.lock:
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self.run_flusher, name='event-journal', daemon=True)
+                self.flusher.start()
+
+    def run_flusher(self):
+        while True:
+            time.sleep(journal_flush_seconds() / 2)
+            if not self.due():
+                continue
+            self.flush()
+            close_old_connections()
+
+
+journal = EventJournal()
+
+
+def make_event(room_id, event_type, player=None, data=None):
+    # Only ids are kept: a buffered event must not pin a Player that may be deleted
+    return GameEvent(
+        room_id=room_id, event_type=event_type,
+        player_id=player.pk if player else None, data=data or {}
+    )
+
+
+def journal_events(events, flush=False):
+    """Journal GameEvents once the current transaction commits.
+
+    Pass ``flush=True`` for phase transitions so the events, and everything
+    recorded before them, are persisted before the request returns.
+    """
+    def enqueue():
+        for event in events:
+            journal.append(event)
+        if flush:
+            journal.flush()
+
+    transaction.on_commit(enqueue)
+
+
+def record_event(room, event_type, player=None, data=None, flush=False):
+    event = make_event(room.pk, event_type, player, data)
+    journal_events([event], flush=flush)
+    return event
+
+
+def flush_events():
+    return journal.flush()
+
+
+atexit.register(flush_events)
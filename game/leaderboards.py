@@ -0,0 +1,303 @@
+# game/leaderboards.py - Cached top-K leaderboards per time window and role
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+import logging
+import time
+import uuid
+
+from .models import GameHistory, UserProfile
+from .sorted_sets import sorted_set_store
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_LOCK_KEY = 'game:leaderboard:lock'
+LEADERBOARD_GENERATION_KEY = 'game:leaderboard:generation'
+PERIODS = ['day', 'week', 'all']
+ROLES = ['all', 'imposter', 'detective']
+
+# Sorted-set boards -> the profile field they rank by
+SORTED_BOARDS = {
+    'score': 'total_score',
+    'wins': 'total_wins',
+}
+
+
+def leaderboard_size():
+    return getattr(settings, 'GAME_SETTINGS', {}).get('LEADERBOARD_SIZE', 100)
+
+
+def period_start(period, now=None):
+    """Start of the current day or week (Monday) in local time; None for all-time"""
+    if period == 'all':
+        return None
+    start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'week':
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def board_key(period, role, now=None):
+    start = period_start(period, now)
+    bucket = start.date().isoformat() if start else 'all'
+    return f'game:leaderboard:{period}:{bucket}:{role}'
+
+
+def board_timeout(period):
+    # A window's board is kept a little past its end; the all-time board is
+    # rebuilt daily in case an update was ever lost
+    return {'day': 2 * 86400, 'week': 8 * 86400, 'all': 86400}[period]
+
+
+def board_generation():
+    return cache.get(LEADERBOARD_GENERATION_KEY, 0)
+
+
+def bump_board_generation():
+    cache.add(LEADERBOARD_GENERATION_KEY, 0, None)
+    try:
+        cache.incr(LEADERBOARD_GENERATION_KEY)
+    except ValueError:
+        # Evicted between the add and the increment
+        cache.set(LEADERBOARD_GENERATION_KEY, 1, None)
+
+
+def board_filter(period, role, now=None):
+    """Q selecting a board's GameHistory rows"""
+    condition = Q()
+    start = period_start(period, now)
+    if start is not None:
+        condition &= Q(played_at__gte=start)
+    if role != 'all':
+        condition &= Q(role=role)
+    return condition
+
+
+def sort_entries(entries):
+    entries.sort(key=lambda entry: (-entry['points'], -entry['wins'], entry['profile_id']))
+    rank = 0
+    for position, entry in enumerate(entries):
+        if position == 0 or entry['points'] != entries[position - 1]['points']:
+            rank = position + 1
+        entry['rank'] = rank
+    return entries
+
+
+def entry(row, points, wins, games):
+    return {
+        'profile_id': row['player'],
+        'username': row['player__user__username'],
+        'avatar': row['player__avatar'],
+        'points': points or 0,
+        'wins': wins,
+        'games': games,
+    }
+
+
+def compute_board(period, role, now=None):
+    """One board's top K, computed from GameHistory"""
+    rows = (
+        GameHistory.objects.filter(board_filter(period, role, now))
+        .values('player', 'player__user__username', 'player__avatar')
+        .annotate(points=Sum('points_earned'), wins=Count('id', filter=Q(won=True)), games=Count('id'))
+        .order_by('-points', '-wins', 'player')[:leaderboard_size()]
+    )
+    return sort_entries([entry(row, row['points'], row['wins'], row['games']) for row in rows])
+
+
+def build_board(period, role, now=None):
+    """Compute one board's top K and cache it.
+
+    A settlement that commits while the query runs finds nothing cached to
+    merge into. ``refresh_boards`` bumps the board generation before it
+    merges, so the generation is checked again once the board is stored:
+    if it moved, the board may be missing that game and is dropped, to be
+    rebuilt on the next read.
+    """
+    key = board_key(period, role, now)
+    generation = board_generation()
+    entries = compute_board(period, role, now)
+    cache.set(key, entries, board_timeout(period))
+    if board_generation() != generation:
+        cache.delete(key)
+    return entries
+
+
+def get_board(period, role):
+    """The current top K of a window and role, served from the cache"""
+    entries = cache.get(board_key(period, role))
+    if entries is None:
+        entries = build_board(period, role)
+    return entries
+
+
+def record_board_results(profile_ids):
+    """Merge newly settled players' totals into every cached board.
+
+    The players' totals for all windows and roles come from one grouped
+    query over their own history. Totals only grow, so a player who is
+    not in a board's top K can only enter it when they gain points, which
+    is when they are merged; merging and truncating keeps each board
+    exact without reading anyone else's games. Boards not in the cache are
+    left to be built on their next read.
+    """
+    boards = {(period, role): board_key(period, role) for period in PERIODS for role in ROLES}
+    cached = cache.get_many(boards.values())
+    if not cached:
+        return
+    aggregates = {}
+    for period, role in boards:
+        condition = board_filter(period, role)
+        aggregates[f'{period}_{role}_points'] = Sum('points_earned', filter=condition)
+        aggregates[f'{period}_{role}_wins'] = Count('id', filter=condition & Q(won=True))
+        aggregates[f'{period}_{role}_games'] = Count('id', filter=condition)
+    rows = list(
+        GameHistory.objects.filter(player_id__in=profile_ids)
+        .values('player', 'player__user__username', 'player__avatar')
+        .annotate(**aggregates)
+    )
+
+    updated = {}
+    for (period, role), key in boards.items():
+        entries = cached.get(key)
+        if entries is None:
+            continue
+        by_profile = {existing['profile_id']: existing for existing in entries}
+        for row in rows:
+            games = row[f'{period}_{role}_games']
+            if games:
+                by_profile[row['player']] = entry(
+                    row, row[f'{period}_{role}_points'], row[f'{period}_{role}_wins'], games
+                )
+        updated[key] = sort_entries(list(by_profile.values()))[:leaderboard_size()]
+    for (period, role), key in boards.items():
+        if key in updated:
+            cache.set(key, updated[key], board_timeout(period))
+
+
+def refresh_boards(profile_ids):
+    """Update the cached boards for settled players.
+
+    The board generation is bumped first, so boards being built from a
+    query that may predate this settlement are not kept (see
+    ``build_board``). Merges are serialized across processes with a cache
+    lock; if it cannot be taken, or the merge fails, the boards are dropped
+    and rebuilt on their next read rather than risk a lost update.
+    """
+    boards = [board_key(period, role) for period in PERIODS for role in ROLES]
+    bump_board_generation()
+    for _ in range(20):
+        if cache.add(LEADERBOARD_LOCK_KEY, 1, 10):
+            break
+        time.sleep(0.05)
+    else:
+        cache.delete_many(boards)
+        return
+    try:
+        record_board_results(profile_ids)
+    except Exception as e:
+        logger.warning(f"Leaderboard update failed: {str(e)}")
+        cache.delete_many(boards)
+    finally:
+        cache.delete(LEADERBOARD_LOCK_KEY)
+
+
+def sorted_board_key(board):
+    return f'game:zset:leaderboard:{board}'
+
+
+def ensure_sorted_board(board):
+    """Load a sorted-set board from UserProfile the first time it is used.
+
+    The set is built under a private key and renamed into place, so no
+    reader ever sees a partly loaded board.
+    """
+    store = sorted_set_store()
+    key = sorted_board_key(board)
+    if store.exists(key):
+        return key
+    loading = f'{key}:loading:{uuid.uuid4().hex}'
+    try:
+        batch = {}
+        for profile_id, value in UserProfile.objects.values_list('pk', SORTED_BOARDS[board]).iterator(chunk_size=5000):
+            batch[profile_id] = value
+            if len(batch) >= 5000:
+                store.add(loading, batch)
+                batch = {}
+        store.add(loading, batch)
+        store.rename(loading, key)
+    except Exception:
+        store.delete(loading)
+        raise
+    return key
+
+
+def record_profile_scores(rows):
+    """Apply ``(profile_id, *values)`` rows, values in SORTED_BOARDS order, to the loaded boards"""
+    store = sorted_set_store()
+    for column, board in enumerate(SORTED_BOARDS, start=1):
+        key = sorted_board_key(board)
+        if store.exists(key):
+            store.add(key, {row[0]: row[column] for row in rows})
+
+
+def update_sorted_boards(profile_ids=None, rows=None, removed=None):
+    """Move profiles on the sorted-set boards; failures are logged, not raised.
+
+    Pass ``rows`` when the new values are at hand, else they are read for
+    ``profile_ids`` in one query. ``removed`` drops a deleted profile.
+    """
+    try:
+        if removed is not None:
+            for board in SORTED_BOARDS:
+                sorted_set_store().remove(sorted_board_key(board), removed)
+            return
+        if rows is None:
+            rows = UserProfile.objects.filter(pk__in=profile_ids).values_list(
+                'pk', *SORTED_BOARDS.values()
+            )
+        record_profile_scores(list(rows))
+    except Exception as e:
+        logger.warning(f"Sorted leaderboard update failed: {str(e)}")
+
+
+def board_position(board, profile_id):
+    """A profile's 1-based position, value and the board size; None if absent"""
+    store = sorted_set_store()
+    key = ensure_sorted_board(board)
+    rank = store.rev_rank(key, profile_id)
+    if rank is None:
+        return None
+    return {'position': rank + 1, 'value': store.score(key, profile_id), 'total': store.card(key)}
+
+
+def around_profile(board, profile_id, radius):
+    """Entries from ``radius`` places above a profile to ``radius`` below it"""
+    store = sorted_set_store()
+    key = ensure_sorted_board(board)
+    rank = store.rev_rank(key, profile_id)
+    if rank is None:
+        return []
+    start = max(rank - radius, 0)
+    items = store.rev_range(key, start, rank + radius)
+    profiles = {
+        row['pk']: row for row in
+        UserProfile.objects.filter(pk__in=[int(member) for member, _ in items])
+        .values('pk', 'user__username', 'avatar')
+    }
+    entries = []
+    for offset, (member, value) in enumerate(items):
+        profile = profiles.get(int(member))
+        if profile is None:
+            continue  # Deleted since it was ranked
+        entries.append({
+            'position': start + offset + 1,
+            'profile_id': profile['pk'],
+            'username': profile['user__username'],
+            'avatar': profile['avatar'],
+            'value': value,
+        })
+    return entries
@@ -0,0 +1,72 @@
+# game/lobby.py - Cached lobby snapshot for list_rooms
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+import logging
+
+from .read_models import room_summary, room_summary_queryset
+
+logger = logging.getLogger(__name__)
+
+LOBBY_CACHE_KEY = 'game:lobby:snapshot'
+LOBBY_STATUSES = ['waiting', 'in_progress']
+
+
+def lobby_cache_timeout():
+    # Upper bound on staleness if a patch is ever lost between workers
+    return settings.GAME_SETTINGS.get('LOBBY_SNAPSHOT_SECONDS', 60)
+
+
+def lobby_rooms_queryset():
+    return room_summary_queryset().filter(status__in=LOBBY_STATUSES).order_by('-created_at')
+
+
+def rebuild_lobby_snapshot():
+    """Recompute every lobby row in one query and store the result"""
+    rows = [room_summary(room) for room in lobby_rooms_queryset()]
+    cache.set(LOBBY_CACHE_KEY, rows, lobby_cache_timeout())
+    return rows
+
+
+def get_lobby_snapshot():
+    """All open rooms, newest first, served from the cache when possible"""
+    rows = cache.get(LOBBY_CACHE_KEY)
+    if rows is None:
+        rows = rebuild_lobby_snapshot()
+    return rows
+
+
+def patch_lobby_room(room_id):
+    """Replace, insert or drop a single room's row in the cached snapshot"""
+    rows = cache.get(LOBBY_CACHE_KEY)
+    if rows is None:
+        return  # Nothing cached; the next read rebuilds from scratch
+
+    room_id = str(room_id)
+    rows = [row for row in rows if row['id'] != room_id]
+    room = lobby_rooms_queryset().filter(pk=room_id).first()
+    if room is not None:
+        row = room_summary(room)
+        position = next(
+            (i for i, other in enumerate(rows) if other['created_at'] < row['created_at']),
+            len(rows)
+        )
+        rows.insert(position, row)
+    cache.set(LOBBY_CACHE_KEY, rows, lobby_cache_timeout())
+
+
+def refresh_lobby_room(room_id):
+    """Patch the lobby snapshot for a room once the current transaction commits"""
+    def patch():
+        try:
+            patch_lobby_room(room_id)
+        except Exception as e:
+            logger.warning(f"Lobby patch failed for {room_id}: {str(e)}")
+            cache.delete(LOBBY_CACHE_KEY)
+
+    transaction.on_commit(patch)
+
+
+def invalidate_lobby():
+    cache.delete(LOBBY_CACHE_KEY)
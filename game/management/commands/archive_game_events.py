@@ -0,0 +1,39 @@
+# game/management/commands/archive_game_events.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import timedelta
+from game.event_storage import FileEventStore, event_store
+from game.models import GameRoom
+
+
+class Command(BaseCommand):
+    help = 'Move GameEvent rows of finished games into the per-room event logs and prune expired room logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--finished-hours', type=int, default=1,
+                            help='Archive games that finished at least this many hours ago')
+        parser.add_argument('--retention-days', type=int, default=None,
+                            help='Delete room logs last written before this (defaults to EVENT_LOG_RETENTION_DAYS)')
+        parser.add_argument('--skip-prune', action='store_true', help='Only archive, keep every room log')
+
+    def handle(self, *args, **options):
+        store = event_store()
+        if not isinstance(store, FileEventStore):
+            raise CommandError("GAME_SETTINGS['EVENT_STORAGE'] must be 'file' to archive events")
+        
+        cutoff = timezone.now() - timedelta(hours=options['finished_hours'])
+        room_ids = GameRoom.objects.filter(
+            status='finished', finished_at__lt=cutoff, events__isnull=False
+        ).values_list('id', flat=True).distinct()
+        
+        archived = 0
+        rooms = 0
+        for room_id in room_ids.iterator():
+            archived += store.archive(room_id)
+            rooms += 1
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} events from {rooms} finished games'))
+        
+        if not options['skip_prune']:
+            removed = store.prune(options['retention_days'])
+            self.stdout.write(self.style.SUCCESS(f'Pruned the logs of {removed} expired rooms'))
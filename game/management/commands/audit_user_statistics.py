@@ -0,0 +1,32 @@
+# game/management/commands/audit_user_statistics.py
+
+from django.core.management.base import BaseCommand
+from game.models import UserProfile
+from game.statistics import audit_profiles
+
+
+class Command(BaseCommand):
+    help = 'Recompute profile statistics from game history and report (or fix) drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Only audit these users')
+        parser.add_argument('--fix', action='store_true', help='Write the recomputed values back')
+        parser.add_argument('--full-streaks', action='store_true',
+                            help="Walk drifted profiles' histories to check their best win streak")
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.select_related('user')
+        if options['usernames']:
+            profiles = profiles.filter(user__username__in=options['usernames'])
+        
+        drift = audit_profiles(profiles, fix=options['fix'], full_streaks=options['full_streaks'])
+        for profile, field, stored, expected in drift:
+            self.stdout.write(f'{profile.user.username}: {field} is {stored}, history says {expected}')
+        
+        drifted = len({profile.pk for profile, *_ in drift})
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All profile statistics match their game history'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(drift)} fields on {drifted} profiles'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} fields drifted on {drifted} profiles; run with --fix to rebuild'))
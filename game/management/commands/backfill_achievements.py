@@ -0,0 +1,62 @@
+# game/management/commands/backfill_achievements.py
+
+from django.core.management.base import BaseCommand
+from functools import partial
+from game.achievements import backfill_chunk
+from game.batch import Checkpoint, Throughput, chunk_ranges, run_chunks
+from game.models import Achievement, UserProfile
+import os
+
+
+class Command(BaseCommand):
+    help = 'Credit players with achievements earned by their past games'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--achievements',
+            nargs='+',
+            type=str,
+            help='Names of the achievements to backfill (default: all with a metric)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Profiles per chunk')
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Worker processes (1 runs in this process)')
+        parser.add_argument('--checkpoint', default='backfill_achievements.checkpoint',
+                            help='File recording progress, so an interrupted backfill can resume')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+
+    def handle(self, *args, **options):
+        names = options['achievements']
+        rules = Achievement.objects.filter(is_active=True).exclude(metric='')
+        if names:
+            rules = rules.filter(name__in=names)
+        count = rules.count()
+        if not count:
+            self.stdout.write(self.style.WARNING('No active achievements with a metric to backfill'))
+            return
+        self.stdout.write(f'Backfilling {count} achievements...')
+
+        checkpoint = Checkpoint(options['checkpoint'])
+        if options['restart']:
+            checkpoint.clear()
+            checkpoint.after = None
+        elif checkpoint.after is not None:
+            self.stdout.write(f'Resuming after profile {checkpoint.after}')
+
+        throughput = Throughput()
+        written = unlocked = 0
+        chunks = chunk_ranges(UserProfile.objects.all(), options['chunk_size'], after=checkpoint.after)
+        func = partial(backfill_chunk, names=names)
+        for bounds, (read, chunk_written, chunk_unlocked) in run_chunks(func, chunks, options['workers'], checkpoint):
+            throughput.add(read)
+            written += chunk_written
+            unlocked += chunk_unlocked
+            if throughput.chunks % 10 == 0:
+                self.stdout.write(f'Read {throughput}...')
+
+        checkpoint.clear()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {written} progress rows, {unlocked} achievements unlocked; read {throughput}'
+            )
+        )
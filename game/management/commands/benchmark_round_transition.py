@@ -0,0 +1,74 @@
+# game/management/commands/benchmark_round_transition.py
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from game.decks import QuestionCatalog
+from game.models import Question, DecoyQuestion, GameRoom, Player
+from game.views import plan_game, transition_round
+import time
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure round transition cost (time and queries) per player count; all data is rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, nargs='+', default=[4, 8, 16, 32, 64],
+                            help='Player counts to benchmark')
+        parser.add_argument('--rounds', type=int, default=10, help='Rounds per game')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'players':>8} {'transitions':>12} {'avg ms':>8} {'queries':>8}")
+        try:
+            with transaction.atomic():
+                self.ensure_questions()
+                for count in options['players']:
+                    self.benchmark(count, options['rounds'])
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            QuestionCatalog.invalidate()
+
+    def ensure_questions(self):
+        if not Question.objects.filter(is_active=True).exists():
+            Question.objects.bulk_create(
+                [Question(text=f'Benchmark question {i}') for i in range(20)]
+            )
+        if not DecoyQuestion.objects.filter(is_active=True).exists():
+            DecoyQuestion.objects.bulk_create(
+                [DecoyQuestion(text=f'Benchmark decoy {i}') for i in range(20)]
+            )
+        QuestionCatalog.invalidate()
+
+    def benchmark(self, count, rounds):
+        users = User.objects.bulk_create(
+            [User(username=f'bench_{count}_{i}') for i in range(count)]
+        )
+        room = GameRoom.objects.create(
+            name=f'Benchmark {count}', host=users[0], max_players=count,
+            total_rounds=rounds, status='in_progress', current_round=1
+        )
+        Player.objects.bulk_create([
+            Player(user=user, room=room, nickname=user.username, is_host=(i == 0), is_ready=True)
+            for i, user in enumerate(users)
+        ])
+        plan_game(room)
+
+        elapsed = 0.0
+        queries = 0
+        for _ in range(rounds):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                transition_round(room)
+                elapsed += time.perf_counter() - started
+            queries += len(captured)
+
+        self.stdout.write(
+            f'{count:>8} {rounds:>12} {elapsed / rounds * 1000:>8.2f} {queries / rounds:>8.1f}'
+        )
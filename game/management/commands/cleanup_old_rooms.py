@@ -0,0 +1,55 @@
+# game/management/commands/cleanup_old_rooms.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from datetime import timedelta
+from game.models import GameRoom
+
+
+class Command(BaseCommand):
+    help = 'Clean up old finished and inactive game rooms'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Delete finished rooms older than X hours (default: 24)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be deleted without actually deleting',
+        )
+
+    def handle(self, *args, **options):
+        hours = options['hours']
+        dry_run = options['dry_run']
+        
+        cutoff_time = timezone.now() - timedelta(hours=hours)
+        
+        # Find finished rooms older than cutoff
+        finished_rooms = GameRoom.objects.filter(
+            status='finished',
+            finished_at__lt=cutoff_time
+        )
+        
+        # Find inactive waiting rooms (no activity for 2+ hours)
+        inactive_cutoff = timezone.now() - timedelta(hours=2)
+        inactive_rooms = GameRoom.objects.filter(
+            status='waiting',
+            last_activity__lt=inactive_cutoff
+        )
+        
+        rooms_to_delete = finished_rooms | inactive_rooms
+        
+        if dry_run:
+            self.stdout.write(f'DRY RUN - Would delete {rooms_to_delete.count()} rooms:')
+            for room in rooms_to_delete:
+                self.stdout.write(f'  - {room.name} ({room.status}) - {room.last_activity}')
+        else:
+            count = rooms_to_delete.count()
+            rooms_to_delete.delete()
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully deleted {count} old rooms')
+            )
@@ -0,0 +1,140 @@
+# game/management/commands/create_sample_data.py
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from game.models import UserProfile, GameRoom, Player
+from faker import Faker
+import random
+
+
+class Command(BaseCommand):
+    help = 'Create sample data for development and testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=10,
+            help='Number of sample users to create',
+        )
+        parser.add_argument(
+            '--rooms',
+            type=int,
+            default=5,
+            help='Number of sample rooms to create',
+        )
+
+    def handle(self, *args, **options):
+        fake = Faker()
+        
+        # Create sample users
+        self.stdout.write('Creating sample users...')
+        users_created = 0
+        
+        for i in range(options['users']):
+            username = fake.user_name()
+            # Ensure unique username
+            counter = 1
+            original_username = username
+            while User.objects.filter(username=username).exists():
+                username = f"{original_username}{counter}"
+                counter += 1
+            
+            try:
+                user = User.objects.create_user(
+                    username=username,
+                    email=fake.email(),
+                    first_name=fake.first_name(),
+                    last_name=fake.last_name(),
+                    password='password123'
+                )
+                
+                # Create profile with random data
+                profile = UserProfile.objects.create(
+                    user=user,
+                    avatar=random.choice([choice[0] for choice in UserProfile.AVATAR_CHOICES]),
+                    gender=random.choice([choice[0] for choice in UserProfile.GENDER_CHOICES]),
+                    bio=fake.text(max_nb_chars=200) if random.random() > 0.5 else '',
+                    preferred_category=random.choice(['lifestyle', 'preferences', 'experiences', 'hypothetical', 'general']),
+                    preferred_difficulty=round(random.uniform(1.5, 4.5), 1),
+                    preferred_game_size=random.randint(4, 8)
+                )
+                
+                # Add some random statistics
+                profile.total_games = random.randint(5, 100)
+                profile.total_wins = random.randint(0, profile.total_games)
+                profile.total_score = random.randint(100, 2000)
+                profile.games_hosted = random.randint(0, 20)
+                profile.update_statistics()
+                
+                users_created += 1
+                
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(f'Error creating user {username}: {e}')
+                )
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Created {users_created} sample users')
+        )
+        
+        # Create sample rooms
+        self.stdout.write('Creating sample rooms...')
+        users = list(User.objects.all())
+        rooms_created = 0
+        
+        for i in range(options['rooms']):
+            try:
+                host = random.choice(users)
+                room = GameRoom.objects.create(
+                    name=fake.catch_phrase(),
+                    description=fake.text(max_nb_chars=300) if random.random() > 0.6 else '',
+                    host=host,
+                    is_private=random.random() > 0.7,
+                    max_players=random.choice([4, 6, 8, 10]),
+                    total_rounds=random.choice([3, 5, 7]),
+                    difficulty_level=random.choice(['easy', 'medium', 'hard', 'mixed']),
+                    category_preference=random.choice([None, 'lifestyle', 'preferences', 'experiences']),
+                )
+                
+                # Add host as player
+                Player.objects.create(
+                    user=host,
+                    room=room,
+                    nickname=host.username,
+                    is_host=True,
+                    is_ready=True
+                )
+                
+                # Add random additional players
+                num_additional_players = random.randint(0, min(4, room.max_players - 1))
+                available_users = [u for u in users if u != host]
+                additional_players = random.sample(available_users, num_additional_players)
+                
+                for player_user in additional_players:
+                    Player.objects.create(
+                        user=player_user,
+                        room=room,
+                        nickname=player_user.username,
+                        is_ready=random.random() > 0.3
+                    )
+                
+                rooms_created += 1
+                
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(f'Error creating room: {e}')
+                )
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Created {rooms_created} sample rooms')
+        )
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Sample data creation complete!\n'
+                f'- {users_created} users created\n'
+                f'- {rooms_created} rooms created\n'
+                f'Login with any username and password "password123"'
+            )
+        )
@@ -0,0 +1,25 @@
+# game/management/commands/fill_room_code_pool.py
+
+from django.core.management.base import BaseCommand
+from game.room_codes import fill_pool, free_code_count, pool_batch_size
+
+
+class Command(BaseCommand):
+    help = 'Pre-generate free room codes so room creation never waits on a refill'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=None,
+                            help='Number of codes to add (defaults to ROOM_CODE_POOL_BATCH)')
+        parser.add_argument('--min-free', type=int, default=0,
+                            help='Only fill when fewer than this many codes are free')
+
+    def handle(self, *args, **options):
+        free = free_code_count()
+        if free >= options['min_free'] > 0:
+            self.stdout.write(f'{free} free codes in the pool, nothing to do')
+            return
+        
+        offered = fill_pool(options['count'] or pool_batch_size())
+        self.stdout.write(
+            self.style.SUCCESS(f'Added up to {offered} codes, {free_code_count()} free codes in the pool')
+        )
@@ -0,0 +1,39 @@
+# game/management/commands/replay_game.py
+
+from django.core.management.base import BaseCommand, CommandError
+from game.models import GameRoom
+from game.replay import GameReplay
+import json
+
+
+class Command(BaseCommand):
+    help = 'Replay a game from its events, or print the room state at the start of a round'
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_id', help='Room UUID')
+        parser.add_argument('--round', type=int, default=None, help='Seek to the start of this round')
+        parser.add_argument('--snapshots-only', action='store_true',
+                            help='Only bring the room snapshots up to date')
+
+    def handle(self, *args, **options):
+        if not GameRoom.objects.filter(id=options['room_id']).exists():
+            raise CommandError(f"Room {options['room_id']} not found")
+        
+        replay = GameReplay(options['room_id'])
+        if options['snapshots_only']:
+            saved = replay.build_snapshots()
+            self.stdout.write(self.style.SUCCESS(f'Saved {saved} new snapshots'))
+            return
+        
+        if options['round'] is not None:
+            self.stdout.write(json.dumps(replay.seek(options['round']), indent=2))
+            return
+        
+        scores = {}
+        for event, state in replay.replay():
+            self.stdout.write(
+                f"{event.timestamp:%H:%M:%S} #{event.id} {event.event_type:<20} "
+                f"round {state['round_number']} {state['phase']}"
+            )
+            scores = state['scores']
+        self.stdout.write(f'Scores by player id: {json.dumps(scores)}')
@@ -0,0 +1,26 @@
+# game/management/commands/settle_games.py
+
+from django.core.management.base import BaseCommand
+from game.models import GameRoom
+from game.settlement import settle_game
+
+
+class Command(BaseCommand):
+    help = 'Write GameHistory and profile totals for finished games that were never settled'
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_ids', nargs='*', help='Only settle these rooms')
+
+    def handle(self, *args, **options):
+        rooms = GameRoom.objects.filter(status='finished', player_histories__isnull=True)
+        if options['room_ids']:
+            rooms = rooms.filter(id__in=options['room_ids'])
+        
+        settled = 0
+        games = 0
+        for room_id in rooms.values_list('id', flat=True).distinct().iterator():
+            created = settle_game(room_id)
+            if created:
+                settled += created
+                games += 1
+        self.stdout.write(self.style.SUCCESS(f'Settled {games} games ({settled} player records)'))
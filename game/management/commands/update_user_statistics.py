@@ -0,0 +1,58 @@
+# game/management/commands/update_user_statistics.py
+
+from django.core.management.base import BaseCommand
+from game.batch import Checkpoint, Throughput, chunk_ranges, run_chunks
+from game.models import UserProfile
+from game.statistics import rebuild_chunk
+import os
+
+
+class Command(BaseCommand):
+    help = 'Rebuild user statistics from game history in parallel chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            nargs='+',
+            type=str,
+            help='Specific usernames to update (optional)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Profiles per chunk')
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Worker processes (1 runs in this process)')
+        parser.add_argument('--checkpoint', default='update_user_statistics.checkpoint',
+                            help='File recording progress, so an interrupted rebuild can resume')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.all()
+        checkpoint_path = options['checkpoint']
+        if options['users']:
+            profiles = profiles.filter(user__username__in=options['users'])
+            checkpoint_path = None
+            self.stdout.write(f'Updating statistics for {len(options["users"])} specified users...')
+        else:
+            self.stdout.write('Updating statistics for all users...')
+        
+        checkpoint = Checkpoint(checkpoint_path)
+        if options['restart']:
+            checkpoint.clear()
+            checkpoint.after = None
+        elif checkpoint.after is not None:
+            self.stdout.write(f'Resuming after profile {checkpoint.after}')
+        
+        throughput = Throughput()
+        updated_count = 0
+        # Chunks are pk ranges; named users are rebuilt one by one
+        chunk_size = 1 if options['users'] else options['chunk_size']
+        chunks = chunk_ranges(profiles, chunk_size, after=checkpoint.after)
+        for bounds, (read, updated) in run_chunks(rebuild_chunk, chunks, options['workers'], checkpoint):
+            throughput.add(read)
+            updated_count += updated
+            if throughput.chunks % 10 == 0:
+                self.stdout.write(f'Read {throughput}...')
+        
+        checkpoint.clear()
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully updated statistics for {updated_count} users; read {throughput}')
+        )
@@ -0,0 +1,37 @@
+# game/middleware.py - Token authentication for WebSocket connections
+
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.authtoken.models import Token
+
+
+@database_sync_to_async
+def get_token_user(token_key):
+    try:
+        return Token.objects.select_related('user').get(key=token_key).user
+    except Token.DoesNotExist:
+        return AnonymousUser()
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """Authenticate sockets with the DRF token passed as ``?token=<key>``.
+
+    Browsers cannot set an Authorization header on a WebSocket handshake, so
+    the token travels in the query string. Connections without a token keep
+    whatever user the session middleware resolved.
+    """
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        token_key = query.get('token', [None])[0]
+        if token_key:
+            scope['user'] = await get_token_user(token_key)
+        return await super().__call__(scope, receive, send)
+
+
+def TokenAuthMiddlewareStack(inner):
+    return AuthMiddlewareStack(TokenAuthMiddleware(inner))
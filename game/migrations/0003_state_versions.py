@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0002_userprofile_experience_level'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameroom',
+            name='state_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped on every change, served as the ETag'),
+        ),
+        migrations.AddField(
+            model_name='gameround',
+            name='state_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped on every change, served as the ETag'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0003_state_versions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameroom',
+            index=models.Index(fields=['status', 'is_private', '-created_at'], name='room_lobby_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gameroom',
+            index=models.Index(fields=['status', 'is_private', 'difficulty_level', '-created_at'], name='room_lobby_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gameroom',
+            index=models.Index(fields=['status', 'is_private', 'category_preference', '-created_at'], name='room_lobby_category_idx'),
+        ),
+    ]
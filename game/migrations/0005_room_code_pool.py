@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0004_lobby_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gameroom',
+            name='room_code',
+            field=models.CharField(blank=True, help_text='Released back to the pool when the game ends', max_length=6, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='RoomCode',
+            fields=[
+                ('code', models.CharField(max_length=6, primary_key=True, serialize=False)),
+                ('slot', models.BigIntegerField(help_text='Random position in the pool')),
+                ('allocated_at', models.DateTimeField(blank=True, null=True)),
+                ('room', models.OneToOneField(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pooled_code', to='game.gameroom')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('room__isnull', True)), fields=['slot'], name='room_code_free_idx')],
+            },
+        ),
+    ]
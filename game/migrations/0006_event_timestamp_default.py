@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:19
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0005_room_code_pool'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gameevent',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
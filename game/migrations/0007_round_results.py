@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_round_results(apps, schema_editor):
+    """Build results of already settled rounds from their round_ended events"""
+    GameEvent = apps.get_model('game', 'GameEvent')
+    GameRound = apps.get_model('game', 'GameRound')
+    RoundResult = apps.get_model('game', 'RoundResult')
+    Player = apps.get_model('game', 'Player')
+    
+    player_ids = set(Player.objects.values_list('id', flat=True))
+    rounds = {
+        (room_id, number): round_id
+        for round_id, room_id, number in GameRound.objects.values_list('id', 'room_id', 'round_number')
+    }
+    results = {}
+    for event in GameEvent.objects.filter(event_type='round_ended').order_by('id').iterator():
+        round_id = rounds.get((event.room_id, event.data.get('round_number')))
+        if round_id is None:
+            continue
+        results[round_id] = RoundResult(
+            round_id=round_id,
+            imposter_id=event.data.get('imposter_id') if event.data.get('imposter_id') in player_ids else None,
+            imposter_caught=bool(event.data.get('imposter_caught')),
+            most_voted_player_id=(event.data.get('most_voted_player_id')
+                                  if event.data.get('most_voted_player_id') in player_ids else None),
+            vote_counts=event.data.get('vote_counts') or {},
+            voter_choices=event.data.get('voter_choices') or {},
+            total_votes=event.data.get('total_votes') or 0,
+        )
+    RoundResult.objects.bulk_create(results.values(), batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_event_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoundResult',
+            fields=[
+                ('round', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='result', serialize=False, to='game.gameround')),
+                ('imposter_caught', models.BooleanField(default=False)),
+                ('vote_counts', models.JSONField(blank=True, default=dict, help_text='Accused player id -> votes')),
+                ('voter_choices', models.JSONField(blank=True, default=dict, help_text='Voter id -> accused id and nicknames')),
+                ('total_votes', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('imposter', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='game.player')),
+                ('most_voted_player', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='game.player')),
+            ],
+        ),
+        migrations.RunPython(backfill_round_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0007_round_results'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.BigIntegerField(help_text='Id (or log sequence) of the last event folded in')),
+                ('round_number', models.IntegerField(default=0)),
+                ('state', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='game.gameroom')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'round_number', 'position'], name='snapshot_seek_idx')],
+                'unique_together': {('room', 'position')},
+            },
+        ),
+    ]
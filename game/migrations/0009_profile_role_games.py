@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:27
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_role_games(apps, schema_editor):
+    """Count each profile's games per role from its history"""
+    UserProfile = apps.get_model('game', 'UserProfile')
+    profiles = []
+    for profile in UserProfile.objects.annotate(
+        imposter_count=Count('game_history', filter=Q(game_history__role='imposter')),
+        detective_count=Count('game_history', filter=Q(game_history__role='detective')),
+    ).filter(Q(imposter_count__gt=0) | Q(detective_count__gt=0)).iterator():
+        profile.imposter_games = profile.imposter_count
+        profile.detective_games = profile.detective_count
+        profiles.append(profile)
+    UserProfile.objects.bulk_update(profiles, ['imposter_games', 'detective_games'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0008_room_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='detective_games',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='imposter_games',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_role_games, migrations.RunPython.noop),
+    ]
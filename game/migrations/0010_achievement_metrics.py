@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:36
+
+from django.db import migrations, models
+
+# Seeded achievements -> (metric, min_games); 'Lucky Number' has no rule yet
+SEEDED_METRICS = {
+    'First Steps': ('games_played', 0),
+    'Getting Started': ('games_played', 0),
+    'Regular Player': ('games_played', 0),
+    'Dedicated Gamer': ('games_played', 0),
+    'Number Hunt Master': ('games_played', 0),
+    'Sharp Eye': ('voting_accuracy', 10),
+    'Sherlock Holmes': ('voting_accuracy', 25),
+    'Perfect Detective': ('perfect_game', 0),
+    'Sneaky': ('imposter_wins', 0),
+    'Master of Deception': ('imposter_wins', 0),
+    'Ghost': ('imposter_win_streak', 0),
+    'Invisible': ('imposter_win_streak', 0),
+    'On a Roll': ('win_streak', 0),
+    'Hot Streak': ('win_streak', 0),
+    'Unstoppable': ('win_streak', 0),
+    'Host with the Most': ('games_hosted', 0),
+    'Party Organizer': ('games_hosted', 0),
+    'Social Butterfly': ('distinct_teammates', 0),
+    'High Scorer': ('total_score', 0),
+    'Point Master': ('total_score', 0),
+    'Legend': ('total_score', 0),
+    'Early Adopter': ('early_adopter', 0),
+    'Night Owl': ('night_games', 0),
+    'Marathon Player': ('marathon_game', 0),
+}
+
+
+def assign_metrics(apps, schema_editor):
+    Achievement = apps.get_model('game', 'Achievement')
+    for name, (metric, min_games) in SEEDED_METRICS.items():
+        Achievement.objects.filter(name=name).update(metric=metric, min_games=min_games)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_profile_role_games'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='achievement',
+            name='metric',
+            field=models.CharField(blank=True, choices=[('games_played', 'Games played'), ('imposter_wins', 'Wins as imposter'), ('games_hosted', 'Games hosted'), ('total_score', 'Total score'), ('win_streak', 'Best win streak'), ('imposter_win_streak', 'Imposter wins in a row'), ('voting_accuracy', 'Voting accuracy (%)'), ('perfect_game', 'Perfect voting in a 5+ round game'), ('distinct_teammates', 'Different players played with'), ('night_games', 'Games played between midnight and 6 AM'), ('marathon_game', 'Game of 3+ hours'), ('early_adopter', 'Registered among the first users')], db_index=True, help_text='Left blank, the achievement is never evaluated automatically', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='achievement',
+            name='min_games',
+            field=models.IntegerField(default=0, help_text='Games a player must have played before it can be earned'),
+        ),
+        migrations.RunPython(assign_metrics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0010_achievement_metrics'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gamehistory',
+            name='room',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='player_histories', to='game.gameroom'),
+        ),
+    ]
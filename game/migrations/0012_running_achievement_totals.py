@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:17
+
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def backfill_vote_totals(apps, schema_editor):
+    """Sum each profile's votes from its history"""
+    UserProfile = apps.get_model('game', 'UserProfile')
+    profiles = []
+    for profile in UserProfile.objects.annotate(
+        correct=Sum('game_history__correct_votes'), cast=Sum('game_history__total_votes'),
+    ).filter(cast__gt=0).iterator():
+        profile.total_correct_votes = profile.correct
+        profile.total_votes_cast = profile.cast
+        profiles.append(profile)
+    UserProfile.objects.bulk_update(profiles, ['total_correct_votes', 'total_votes_cast'], batch_size=500)
+
+
+def backfill_teammates(apps, schema_editor):
+    """Record every pair of players who share a game, with the first room they met in"""
+    GameHistory = apps.get_model('game', 'GameHistory')
+    Teammate = apps.get_model('game', 'Teammate')
+    rooms = {}
+    for room_id, player_id in (GameHistory.objects.filter(room__isnull=False)
+                               .order_by('played_at', 'room_id').values_list('room_id', 'player_id')
+                               .iterator(chunk_size=5000)):
+        rooms.setdefault(room_id, []).append(player_id)
+    met = set()
+    pairs = []
+    for room_id, players in rooms.items():
+        for player_id in players:
+            for teammate_id in players:
+                if player_id != teammate_id and (player_id, teammate_id) not in met:
+                    met.add((player_id, teammate_id))
+                    pairs.append(Teammate(player_id=player_id, teammate_id=teammate_id, room_id=room_id))
+    Teammate.objects.bulk_create(pairs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0011_history_outlives_room'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='total_correct_votes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='total_votes_cast',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='Teammate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='teammates', to='game.userprofile')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='game.gameroom')),
+                ('teammate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='game.userprofile')),
+            ],
+            options={
+                'unique_together': {('player', 'teammate')},
+            },
+        ),
+        migrations.RunPython(backfill_vote_totals, migrations.RunPython.noop),
+        migrations.RunPython(backfill_teammates, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,35 @@
 # game/models.py - Fixed UserProfile model
 
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 import uuid
-import random
-import string
+
+def bump_state_version(instance):
+    """Atomically increment ``state_version`` and reload it on the instance"""
+    type(instance).objects.filter(pk=instance.pk).update(state_version=F('state_version') + 1)
+    instance.refresh_from_db(fields=['state_version'])
+
+
+def bump_version_on_save(instance, save, *args, **kwargs):
+    """Save an existing row with its version incremented in the same UPDATE.
+
+    The increment happens in SQL so a stale in-memory copy can never move
+    the version backwards and hand out an ETag twice.
+    """
+    update_fields = kwargs.get('update_fields')
+    if instance._state.adding or (update_fields is not None and not update_fields):
+        save(*args, **kwargs)
+        return
+    if update_fields is not None:
+        kwargs['update_fields'] = set(update_fields) | {'state_version'}
+    instance.state_version = F('state_version') + 1
+    save(*args, **kwargs)
+    instance.refresh_from_db(fields=['state_version'])
+
 
 class Question(models.Model):
     """Questions for the Number Hunt game"""
@@ -72,7 +94,7 @@ class GameRoom(models.Model):
     
     # Room Settings
     is_private = models.BooleanField(default=False)
-    room_code = models.CharField(max_length=6, unique=True, blank=True)
+    room_code = models.CharField(max_length=6, unique=True, blank=True, null=True, help_text="Released back to the pool when the game ends")
     password = models.CharField(max_length=50, blank=True, null=True)
     
     # Game Configuration
@@ -93,6 +115,7 @@ class GameRoom(models.Model):
     # Game State
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
     current_round = models.IntegerField(default=0)
+    state_version = models.PositiveIntegerField(default=0, help_text="Bumped on every change, served as the ETag")
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -100,55 +123,70 @@ class GameRoom(models.Model):
     finished_at = models.DateTimeField(null=True, blank=True)
     last_activity = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Lobby listing and its keyset pagination
+            models.Index(fields=['status', 'is_private', '-created_at'], name='room_lobby_idx'),
+            models.Index(fields=['status', 'is_private', 'difficulty_level', '-created_at'], name='room_lobby_difficulty_idx'),
+            models.Index(fields=['status', 'is_private', 'category_preference', '-created_at'], name='room_lobby_category_idx'),
+        ]
+    
     def save(self, *args, **kwargs):
-        if not self.room_code:
-            self.room_code = self.generate_room_code()
-        super().save(*args, **kwargs)
+        if self._state.adding and not self.room_code:
+            # Reserve the code and insert the room in one transaction
+            with transaction.atomic():
+                self.room_code = self.generate_room_code()
+                super().save(*args, **kwargs)
+            return
+        bump_version_on_save(self, super().save, *args, **kwargs)
+    
+    def bump_state_version(self):
+        """Advance the state version after a change that doesn't save the room"""
+        bump_state_version(self)
     
     def generate_room_code(self):
-        """Generate a unique 6-character room code"""
-        while True:
-            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-            if not GameRoom.objects.filter(room_code=code).exists():
-                return code
+        """Reserve a unique room code for this room from the code pool"""
+        from .room_codes import allocate_room_code
+        return allocate_room_code(self.pk)
     
     def __str__(self):
         return f"Room: {self.name} ({self.status})"
     
     @property
     def player_count(self):
+        if 'connected_player_count' in self.__dict__:
+            return self.connected_player_count
         return self.players.filter(is_connected=True).count()
     
     @property
     def total_player_count(self):
+        if 'all_player_count' in self.__dict__:
+            return self.all_player_count
         return self.players.count()
     
+    def _connected_and_ready_counts(self):
+        """Connected/ready counts from read-model annotations or one aggregate"""
+        if 'connected_player_count' in self.__dict__ and 'ready_player_count' in self.__dict__:
+            return self.connected_player_count, self.ready_player_count
+        counts = self.players.aggregate(
+            connected=models.Count('id', filter=models.Q(is_connected=True)),
+            ready=models.Count('id', filter=models.Q(is_connected=True, is_ready=True)),
+        )
+        return counts['connected'], counts['ready']
 
     def can_start(self):
         """Check if the game can be started"""
         if self.status != 'waiting':
             return False
         
-        connected_players = self.players.filter(is_connected=True)
-        
-        # Check minimum player count
-        if connected_players.count() < self.min_players:
-            return False
+        connected, ready = self._connected_and_ready_counts()
         
-        # Check maximum player count
-        if connected_players.count() > self.max_players:
+        # Must have at least one player, within the room's size limits
+        if connected == 0 or connected < self.min_players or connected > self.max_players:
             return False
         
         # Check if all connected players are ready
-        ready_players = connected_players.filter(is_ready=True)
-        if ready_players.count() != connected_players.count():
-            return False
-        
-        # Must have at least one player
-        if connected_players.count() == 0:
-            return False
-        
-        return True
+        return ready == connected
     
     def can_join(self):
         return (self.status in ['waiting'] and 
@@ -175,6 +213,31 @@ class GameRoom(models.Model):
             return [last_round.imposter]
 
 
+class RoomCode(models.Model):
+    """Pre-generated, shuffled pool of room codes.
+
+    Free codes have no room; allocation claims the free code with the lowest
+    random ``slot``, so handing one out never needs a collision check.
+    """
+    
+    code = models.CharField(max_length=6, primary_key=True)
+    slot = models.BigIntegerField(help_text="Random position in the pool")
+    # No database constraint: the code is reserved just before its room row is inserted
+    room = models.OneToOneField(
+        GameRoom, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='pooled_code', db_constraint=False
+    )
+    allocated_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['slot'], condition=Q(room__isnull=True), name='room_code_free_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.code} ({'in use' if self.room_id else 'free'})"
+
+
 class Player(models.Model):
     """Player in a game room - Enhanced version"""
     
@@ -248,6 +311,7 @@ class GameRound(models.Model):
     decoy_question = models.ForeignKey(DecoyQuestion, on_delete=models.CASCADE)
     imposter = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='imposter_rounds')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='setup')
+    state_version = models.PositiveIntegerField(default=0, help_text="Bumped on every change, served as the ETag")
     started_at = models.DateTimeField(auto_now_add=True)
     discussion_started_at = models.DateTimeField(null=True, blank=True)
     voting_started_at = models.DateTimeField(null=True, blank=True)
@@ -258,6 +322,13 @@ class GameRound(models.Model):
     
     def __str__(self):
         return f"Round {self.round_number} in {self.room.name}"
+    
+    def save(self, *args, **kwargs):
+        bump_version_on_save(self, super().save, *args, **kwargs)
+    
+    def bump_state_version(self):
+        """Advance the state version after an answer or vote lands"""
+        bump_state_version(self)
 
 
 class PlayerAnswer(models.Model):
@@ -288,6 +359,36 @@ class Vote(models.Model):
         return f"{self.voter.nickname} votes {self.accused.nickname}"
 
 
+class RoundResult(models.Model):
+    """Settled outcome of a round, written once by ``end_round``"""
+    
+    round = models.OneToOneField(GameRound, on_delete=models.CASCADE, primary_key=True, related_name='result')
+    imposter = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, related_name='+')
+    imposter_caught = models.BooleanField(default=False)
+    most_voted_player = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    vote_counts = models.JSONField(default=dict, blank=True, help_text="Accused player id -> votes")
+    voter_choices = models.JSONField(default=dict, blank=True, help_text="Voter id -> accused id and nicknames")
+    total_votes = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Result of round {self.round_id}"
+    
+    def as_data(self):
+        """Same shape as the ``round_ended`` event data"""
+        return {
+            'round_number': self.round.round_number,
+            'imposter_id': self.imposter_id,
+            'imposter_nickname': self.imposter.nickname if self.imposter else None,
+            'imposter_caught': self.imposter_caught,
+            'most_voted_player_id': self.most_voted_player_id,
+            'most_voted_player_nickname': self.most_voted_player.nickname if self.most_voted_player else None,
+            'vote_counts': self.vote_counts,
+            'voter_choices': self.voter_choices,
+            'total_votes': self.total_votes,
+        }
+
+
 class GameEvent(models.Model):
     """Events that happen during the game for logging/replay"""
     EVENT_TYPES = [
@@ -307,7 +408,8 @@ class GameEvent(models.Model):
     event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
     player = models.ForeignKey(Player, on_delete=models.CASCADE, null=True, blank=True)
     data = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event is recorded, not when the journal writes it
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-timestamp']
@@ -316,6 +418,25 @@ class GameEvent(models.Model):
         return f"{self.event_type} in {self.room.name}"
 
 
+class RoomSnapshot(models.Model):
+    """Folded replay state of a room after the event at ``position``"""
+    
+    room = models.ForeignKey(GameRoom, on_delete=models.CASCADE, related_name='snapshots')
+    position = models.BigIntegerField(help_text="Id (or log sequence) of the last event folded in")
+    round_number = models.IntegerField(default=0)
+    state = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['room', 'position']
+        indexes = [
+            models.Index(fields=['room', 'round_number', 'position'], name='snapshot_seek_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Snapshot of {self.room_id} at {self.position}"
+
+
 # User Profile and Statistics - FIXED VERSION
 class UserProfile(models.Model):
     """Extended user profile with game statistics and preferences"""
@@ -371,6 +492,8 @@ class UserProfile(models.Model):
     total_imposter_wins = models.IntegerField(default=0)
     total_detective_wins = models.IntegerField(default=0)
     total_score = models.IntegerField(default=0)
+    imposter_games = models.IntegerField(default=0)
+    detective_games = models.IntegerField(default=0)
     
     # Performance Metrics
     win_rate = models.FloatField(default=0.0)
@@ -383,6 +506,8 @@ class UserProfile(models.Model):
     games_hosted = models.IntegerField(default=0)
     consecutive_wins = models.IntegerField(default=0)
     best_win_streak = models.IntegerField(default=0)
+    total_correct_votes = models.IntegerField(default=0)
+    total_votes_cast = models.IntegerField(default=0)
     
     # Preferences
     preferred_category = models.CharField(max_length=20, blank=True, null=True)
@@ -415,55 +540,24 @@ class UserProfile(models.Model):
         super().save(*args, **kwargs)
     
     def update_statistics(self):
-        """Update calculated statistics based on game history"""
-        history = self.game_history.all()
-        
-        if history.exists():
-            self.total_games = history.count()
-            self.total_wins = history.filter(won=True).count()
-            self.total_imposter_wins = history.filter(role='imposter', won=True).count()
-            self.total_detective_wins = history.filter(role='detective', won=True).count()
-            self.total_score = sum(h.points_earned for h in history)
-            
-            # Calculate rates
-            self.win_rate = (self.total_wins / self.total_games) * 100 if self.total_games > 0 else 0
-            
-            imposter_games = history.filter(role='imposter').count()
-            detective_games = history.filter(role='detective').count()
-            
-            self.imposter_win_rate = (self.total_imposter_wins / imposter_games) * 100 if imposter_games > 0 else 0
-            self.detective_win_rate = (self.total_detective_wins / detective_games) * 100 if detective_games > 0 else 0
-            
-            self.average_score_per_game = self.total_score / self.total_games if self.total_games > 0 else 0
-            
-            # Calculate win streaks
-            self._calculate_win_streaks(history.order_by('-played_at'))
-            
-            self.save()
-    
-    def _calculate_win_streaks(self, history):
-        """Calculate current and best win streaks"""
-        current_streak = 0
-        best_streak = 0
-        temp_streak = 0
-        
-        for game in history:
-            if game.won:
-                temp_streak += 1
-                best_streak = max(best_streak, temp_streak)
-                if current_streak == 0:  # First win in current streak calculation
-                    current_streak = temp_streak
-            else:
-                temp_streak = 0
-                current_streak = 0  # Reset current streak on loss
-        
-        self.consecutive_wins = current_streak
-        self.best_win_streak = best_streak
+        """Rebuild calculated statistics from game history.
+
+        Results are normally added incrementally as games are settled; this
+        is the repair path for a single profile.
+        """
+        from .statistics import audit_profiles
+        if not self.game_history.exists():
+            return
+        audit_profiles(UserProfile.objects.filter(pk=self.pk), fix=True, full_streaks=True)
+        self.refresh_from_db()
     
     @property
     def rank(self):
-        """Calculate player's global rank based on total score"""
-        return UserProfile.objects.filter(total_score__gt=self.total_score).count() + 1
+        """Player's global rank based on total score, from the shared score board"""
+        if 'global_rank' in self.__dict__:
+            return self.global_rank
+        from .ranking import rank_for_score
+        return rank_for_score(self.total_score)
 
 
 class GameHistory(models.Model):
@@ -475,7 +569,8 @@ class GameHistory(models.Model):
     ]
     
     player = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='game_history')
-    room = models.ForeignKey('GameRoom', on_delete=models.CASCADE, related_name='player_histories')
+    # Kept when old rooms are cleaned up: career statistics are audited against these rows
+    room = models.ForeignKey('GameRoom', on_delete=models.SET_NULL, null=True, blank=True, related_name='player_histories')
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     won = models.BooleanField(default=False)
     points_earned = models.IntegerField(default=0)
@@ -506,6 +601,21 @@ class GameHistory(models.Model):
         return (self.correct_votes / self.total_votes) * 100 if self.total_votes > 0 else 0
 
 
+class Teammate(models.Model):
+    """Two players who have played together, recorded once each way"""
+
+    player = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='teammates')
+    teammate = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='+')
+    # The game they first played together in; later games never replace it
+    room = models.ForeignKey('GameRoom', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        unique_together = ['player', 'teammate']
+
+    def __str__(self):
+        return f"{self.player_id} - {self.teammate_id}"
+
+
 # Achievement System
 class Achievement(models.Model):
     """Available achievements players can earn"""
@@ -526,6 +636,22 @@ class Achievement(models.Model):
         ('special_condition', 'Special Condition'),
     ]
     
+    # What the requirement measures; see game.achievements.METRICS
+    METRIC_CHOICES = [
+        ('games_played', 'Games played'),
+        ('imposter_wins', 'Wins as imposter'),
+        ('games_hosted', 'Games hosted'),
+        ('total_score', 'Total score'),
+        ('win_streak', 'Best win streak'),
+        ('imposter_win_streak', 'Imposter wins in a row'),
+        ('voting_accuracy', 'Voting accuracy (%)'),
+        ('perfect_game', 'Perfect voting in a 5+ round game'),
+        ('distinct_teammates', 'Different players played with'),
+        ('night_games', 'Games played between midnight and 6 AM'),
+        ('marathon_game', 'Game of 3+ hours'),
+        ('early_adopter', 'Registered among the first users'),
+    ]
+    
     name = models.CharField(max_length=100)
     description = models.TextField()
     icon = models.CharField(max_length=50)  # Emoji or icon class
@@ -535,6 +661,9 @@ class Achievement(models.Model):
     requirement_type = models.CharField(max_length=20, choices=REQUIREMENT_TYPES)
     requirement_value = models.IntegerField()
     requirement_description = models.CharField(max_length=200)
+    metric = models.CharField(max_length=30, choices=METRIC_CHOICES, blank=True, db_index=True,
+                              help_text="Left blank, the achievement is never evaluated automatically")
+    min_games = models.IntegerField(default=0, help_text="Games a player must have played before it can be earned")
     
     # Rewards
     points_reward = models.IntegerField(default=0)
@@ -578,11 +707,7 @@ class UserAchievement(models.Model):
     def check_completion(self):
         """Check if achievement should be marked as completed"""
         if not self.is_completed and self.progress_value >= self.achievement.requirement_value:
-            self.is_completed = True
-            self.earned_at = timezone.now()
-            # Award points to user profile
-            self.user.total_score += self.achievement.points_reward
-            self.user.save()
-            self.save()
+            from .achievements import complete
+            complete([self])
             return True
         return False
\ No newline at end of file
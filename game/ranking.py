@@ -0,0 +1,43 @@
+# game/ranking.py - Global ranks by UserProfile.total_score, from the shared score board
+
+import logging
+
+from .leaderboards import ensure_sorted_board
+from .models import UserProfile
+from .sorted_sets import sorted_set_store
+
+logger = logging.getLogger(__name__)
+
+
+def ranks_for_scores(scores):
+    """Map each of ``scores`` to the rank a profile with it has (ties share a rank).
+
+    A rank is one plus the number of profiles scoring higher, counted on
+    the 'score' sorted-set board in O(log n). Every score change already
+    moves that board (see ``leaderboards.update_sorted_boards``) and the
+    Redis store shares it between processes, so nothing is rescanned and
+    no worker serves stale ranks. All scores are counted in one round trip.
+    If the store is unavailable the ranks fall back to COUNT queries.
+    """
+    scores = list(dict.fromkeys(scores))
+    if not scores:
+        return {}
+    try:
+        key = ensure_sorted_board('score')
+        higher = sorted_set_store().count_above_many(key, scores)
+    except Exception as e:
+        logger.warning(f"Rank lookup on the score board failed: {str(e)}")
+        higher = [UserProfile.objects.filter(total_score__gt=score).count() for score in scores]
+    return {score: count + 1 for score, count in zip(scores, higher)}
+
+
+def rank_for_score(score):
+    return ranks_for_scores([score])[score]
+
+
+def attach_ranks(profiles):
+    """Give each profile its rank at once, so serializing a page doesn't look them up one by one"""
+    ranks = ranks_for_scores(profile.total_score for profile in profiles)
+    for profile in profiles:
+        profile.global_rank = ranks[profile.total_score]
+    return profiles
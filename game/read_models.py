@@ -0,0 +1,99 @@
+# game/read_models.py - Room read models shared by views, broadcasts and serializers
+
+from django.db.models import Count, Prefetch, Q
+
+from .models import GameRoom, Player
+
+DEFAULT_AVATAR = 'detective_1'
+
+
+def with_player_counts(queryset):
+    """Annotate connected/ready/total player counts in the room query itself.
+
+    ``GameRoom.player_count``, ``can_start()`` and ``can_join()`` read these
+    annotations when present instead of issuing their own COUNT queries.
+    """
+    return queryset.annotate(
+        connected_player_count=Count('players', filter=Q(players__is_connected=True)),
+        ready_player_count=Count('players', filter=Q(players__is_connected=True, players__is_ready=True)),
+        all_player_count=Count('players'),
+    )
+
+
+def room_summary_queryset():
+    """Rooms with host, host profile and player counts in one query"""
+    return with_player_counts(GameRoom.objects.select_related('host__profile'))
+
+
+def room_detail_queryset():
+    """Rooms plus players, their users and profiles in two queries total"""
+    return room_summary_queryset().prefetch_related(
+        Prefetch('players', queryset=Player.objects.select_related('user__profile'))
+    )
+
+
+def get_room_detail(room_id):
+    """Fetch one room through the detail read model"""
+    return room_detail_queryset().get(pk=room_id)
+
+
+def avatar_of(user):
+    return user.profile.avatar if hasattr(user, 'profile') else DEFAULT_AVATAR
+
+
+def player_data(player):
+    avatar = avatar_of(player.user)
+    return {
+        'id': player.id,
+        'nickname': player.nickname,
+        'is_host': player.is_host,
+        'is_ready': player.is_ready,
+        'is_connected': player.is_connected,
+        'score': player.score,
+        'avatar': avatar,
+        'user': {
+            'id': player.user.id,
+            'username': player.user.username,
+            'profile': {'avatar': avatar},
+        },
+    }
+
+
+def room_summary(room):
+    """Lobby row for a room loaded through ``room_summary_queryset``"""
+    return {
+        'id': str(room.id),
+        'name': room.name,
+        'description': room.description or '',
+        'host': {
+            'id': room.host.id,
+            'username': room.host.username,
+            'avatar': avatar_of(room.host),
+        },
+        'is_private': room.is_private,
+        'room_code': room.room_code,
+        'max_players': room.max_players,
+        'total_rounds': room.total_rounds,
+        'difficulty_level': room.difficulty_level,
+        'category_preference': room.category_preference or '',
+        'discussion_time': room.discussion_time,
+        'voting_time': room.voting_time,
+        'status': room.status,
+        'player_count': room.player_count,
+        'can_join': room.can_join(),
+        'has_password': bool(room.password),
+        'created_at': room.created_at.isoformat(),
+    }
+
+
+def room_detail(room):
+    """Room detail payload for a room loaded through ``room_detail_queryset``"""
+    data = room_summary(room)
+    data.update({
+        'min_players': room.min_players,
+        'current_round': room.current_round,
+        'players': [player_data(player) for player in room.players.all()],
+        'can_start': room.can_start(),
+        'state_version': room.state_version,
+    })
+    return data
@@ -0,0 +1,34 @@
+# game/realtime.py - Room broadcasts over the channel layer
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def room_group_name(room_id):
+    """Name of the channel layer group every socket watching a room joins"""
+    return f'room_{room_id}'
+
+
+def broadcast_room_event(room_id, event, **payload):
+    """Push an event to every client connected to the room.
+
+    The message is sent once the surrounding transaction commits so clients
+    never see state that was rolled back. Broadcast failures are logged and
+    swallowed: the HTTP response must not depend on the channel layer.
+    """
+    message = {'type': 'room.event', 'payload': {'event': event, 'room_id': str(room_id), **payload}}
+
+    def send():
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            async_to_sync(channel_layer.group_send)(room_group_name(room_id), message)
+        except Exception as e:
+            logger.warning(f"Room broadcast failed for {room_id} ({event}): {str(e)}")
+
+    transaction.on_commit(send)
@@ -0,0 +1,171 @@
+# game/replay.py - Rebuild room state from its event stream, with snapshots
+
+from django.conf import settings
+import copy
+import logging
+
+from .event_storage import event_store
+from .models import RoomSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_every():
+    return getattr(settings, 'GAME_SETTINGS', {}).get('REPLAY_SNAPSHOT_EVENTS', 200)
+
+
+def initial_state():
+    return {
+        'phase': 'waiting',
+        'round_number': 0,
+        'players': {},
+        'scores': {},
+        'round': None,
+        'rounds_played': 0,
+        'final_scores': None,
+    }
+
+
+def score_round(state, data):
+    """Apply the end_round scoring rules to the folded scores"""
+    imposter_id = str(data.get('imposter_id'))
+    caught = data.get('imposter_caught')
+    scores = state['scores']
+    if not caught and data.get('imposter_id') is not None:
+        scores[imposter_id] = scores.get(imposter_id, 0) + 3
+    for voter_id, choice in (data.get('voter_choices') or {}).items():
+        if voter_id == imposter_id:
+            continue
+        voted_imposter = str(choice.get('accused_id')) == imposter_id
+        if caught and voted_imposter:
+            scores[voter_id] = scores.get(voter_id, 0) + 2
+        elif not caught and not voted_imposter:
+            scores[voter_id] = scores.get(voter_id, 0) + 1
+
+
+def fold(state, event):
+    """Apply one GameEvent to a replay state in place and return it"""
+    data = event.data or {}
+    player_id = str(event.player_id) if event.player_id else None
+    kind = event.event_type
+
+    if kind == 'player_joined' and player_id:
+        state['players'][player_id] = {'nickname': data.get('nickname'), 'connected': True}
+        state['scores'].setdefault(player_id, 0)
+    elif kind == 'player_left' and player_id in state['players']:
+        state['players'][player_id]['connected'] = False
+    elif kind == 'game_started':
+        state['phase'] = 'answering'
+    elif kind == 'round_started':
+        state['phase'] = 'answering'
+        state['round_number'] = data.get('round_number', state['round_number'] + 1)
+        state['round'] = {
+            'question_id': data.get('question_id'),
+            'imposter_id': data.get('imposter_id'),
+            'answers': {},
+            'votes': {},
+            'result': None,
+        }
+    elif kind == 'answer_submitted' and state['round'] is not None:
+        state['round']['answers'][player_id] = data.get('answer')
+    elif kind == 'discussion_started':
+        state['phase'] = 'discussion'
+    elif kind == 'voting_started':
+        state['phase'] = 'voting'
+    elif kind == 'vote_submitted' and state['round'] is not None:
+        state['round']['votes'][player_id] = data.get('accused_id')
+    elif kind == 'round_ended':
+        state['phase'] = 'results'
+        state['rounds_played'] += 1
+        score_round(state, data)
+        if state['round'] is not None:
+            state['round']['result'] = {
+                'imposter_caught': data.get('imposter_caught'),
+                'most_voted_player_id': data.get('most_voted_player_id'),
+                'vote_counts': data.get('vote_counts', {}),
+            }
+    elif kind == 'game_ended':
+        state['phase'] = 'finished'
+        state['final_scores'] = data.get('final_scores', {})
+    return state
+
+
+class GameReplay:
+    """Replays one room's events from the configured event store.
+
+    A snapshot of the folded state is saved every ``REPLAY_SNAPSHOT_EVENTS``
+    events and at the start of every round, so seeking to a round loads one
+    snapshot and folds only the events after it. Events are streamed from
+    the store, never loaded all at once.
+    """
+
+    def __init__(self, room_id, store=None, every=None):
+        self.room_id = room_id
+        self.store = store or event_store()
+        self.every = every or snapshot_every()
+
+    def latest_snapshot(self):
+        return RoomSnapshot.objects.filter(room_id=self.room_id).order_by('-position').first()
+
+    def round_snapshot(self, round_number):
+        """The snapshot taken as ``round_number`` started, else the last one before it"""
+        snapshots = RoomSnapshot.objects.filter(room_id=self.room_id)
+        return (snapshots.filter(round_number=round_number).order_by('position').first()
+                or snapshots.filter(round_number__lt=round_number).order_by('-position').first())
+
+    def events(self, after=None):
+        return self.store.read(self.room_id, after)
+
+    def build_snapshots(self):
+        """Fold events past the latest snapshot, saving new snapshots; returns how many"""
+        snapshot = self.latest_snapshot()
+        state = snapshot.state if snapshot else initial_state()
+        position = snapshot.position if snapshot else None
+        since_snapshot = 0
+        saved = 0
+        pending = []
+        for event in self.events(position):
+            round_starts = event.event_type == 'round_started'
+            fold(state, event)
+            position = event.id
+            since_snapshot += 1
+            if round_starts or since_snapshot >= self.every:
+                pending.append(RoomSnapshot(
+                    room_id=self.room_id, position=position,
+                    round_number=state['round_number'], state=copy.deepcopy(state)
+                ))
+                since_snapshot = 0
+                if len(pending) >= 50:
+                    RoomSnapshot.objects.bulk_create(pending, ignore_conflicts=True)
+                    saved += len(pending)
+                    pending = []
+        RoomSnapshot.objects.bulk_create(pending, ignore_conflicts=True)
+        return saved + len(pending)
+
+    def seek(self, round_number):
+        """Room state right after ``round_number`` started"""
+        self.build_snapshots()
+        snapshot = self.round_snapshot(round_number)
+        state = snapshot.state if snapshot else initial_state()
+        if state['round_number'] == round_number:
+            return state
+        for event in self.events(snapshot.position if snapshot else None):
+            fold(state, event)
+            if state['round_number'] == round_number:
+                break
+        return state
+
+    def replay(self, from_round=None):
+        """Yield ``(event, state)`` pairs, optionally starting at a round.
+
+        The same state dict is updated in place between yields; copy it to
+        keep a frame.
+        """
+        if from_round:
+            self.build_snapshots()
+            snapshot = self.round_snapshot(from_round)
+        else:
+            snapshot = None
+        state = copy.deepcopy(snapshot.state) if snapshot else initial_state()
+        for event in self.events(snapshot.position if snapshot else None):
+            yield event, fold(state, event)
@@ -0,0 +1,104 @@
+# game/room_codes.py - Room code allocation from a pre-generated pool
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+import logging
+import secrets
+
+from .models import GameRoom, RoomCode
+from .read_models import room_summary_queryset
+
+logger = logging.getLogger(__name__)
+
+CODE_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+ALLOCATE_ATTEMPTS = 5
+
+
+def code_length():
+    return getattr(settings, 'GAME_SETTINGS', {}).get('ROOM_CODE_LENGTH', 6)
+
+
+def pool_batch_size():
+    return getattr(settings, 'GAME_SETTINGS', {}).get('ROOM_CODE_POOL_BATCH', 1000)
+
+
+def random_slot():
+    """Position in the pool; free codes are handed out in slot order"""
+    return secrets.randbits(62)
+
+
+def encode_code(number, length):
+    chars = []
+    for _ in range(length):
+        number, digit = divmod(number, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def fill_pool(count=None):
+    """Add up to ``count`` new random codes to the pool.
+
+    Codes already pooled or held by rooms created before the pool existed are
+    skipped, so the batch may come up slightly short. Returns the number of
+    candidate codes offered to the pool.
+    """
+    count = count or pool_batch_size()
+    length = code_length()
+    space = len(CODE_ALPHABET) ** length
+    candidates = {encode_code(secrets.randbelow(space), length) for _ in range(count)}
+    candidates -= set(GameRoom.objects.filter(room_code__in=candidates).values_list('room_code', flat=True))
+    RoomCode.objects.bulk_create(
+        [RoomCode(code=code, slot=random_slot()) for code in candidates],
+        ignore_conflicts=True
+    )
+    return len(candidates)
+
+
+def free_code_count():
+    return RoomCode.objects.filter(room__isnull=True).count()
+
+
+def allocate_room_code(room_id):
+    """Reserve a free code for ``room_id`` and return it.
+
+    The free code with the lowest slot is locked (skipping rows other
+    transactions are claiming where the database supports it) and claimed
+    with a conditional UPDATE, so concurrent creators never share a code.
+    The pool is refilled inline when it runs dry.
+    """
+    for _ in range(ALLOCATE_ATTEMPTS):
+        with transaction.atomic():
+            free = RoomCode.objects.filter(room__isnull=True).order_by('slot')
+            if connection.features.has_select_for_update_skip_locked:
+                free = free.select_for_update(skip_locked=True)
+            code = free.values_list('code', flat=True).first()
+            if code is None:
+                logger.info(f"Room code pool empty, adding {pool_batch_size()} codes")
+                fill_pool()
+                continue
+            claimed = RoomCode.objects.filter(code=code, room__isnull=True).update(
+                room_id=room_id, allocated_at=timezone.now()
+            )
+            if claimed:
+                return code
+    raise RuntimeError('Could not allocate a room code')
+
+
+def release_room_code(room):
+    """Return a room's code to the pool at a new random position"""
+    if not room.room_code:
+        return
+    RoomCode.objects.filter(room_id=room.pk).update(room=None, allocated_at=None, slot=random_slot())
+    GameRoom.objects.filter(pk=room.pk).update(room_code=None)
+    room.room_code = None
+
+
+def resolve_room_code(code):
+    """Room holding ``code``, or None.
+
+    One lookup by the unique code, with the player counts annotated so
+    status and capacity are current and ``can_join()`` costs no further
+    queries.
+    """
+    return room_summary_queryset().filter(room_code=code.upper()).first()
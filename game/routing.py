@@ -0,0 +1,8 @@
+# game/routing.py - WebSocket URL routes
+
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    re_path(r'^ws/rooms/(?P<room_id>[0-9a-f-]+)/$', consumers.RoomConsumer.as_asgi()),
+]
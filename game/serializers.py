@@ -8,6 +8,7 @@ from .models import (
     GameRound, PlayerAnswer, Vote, GameEvent,
     UserProfile, GameHistory, Achievement, UserAchievement
 )
+from .room_codes import resolve_room_code
 
 class UserSerializer(serializers.ModelSerializer):
     profile_avatar = serializers.CharField(source='profile.avatar', read_only=True, default='detective_1')
@@ -120,7 +121,7 @@ class UserLoginSerializer(serializers.Serializer):
 
 
 class GameHistorySerializer(serializers.ModelSerializer):
-    room_name = serializers.CharField(source='room.name', read_only=True)
+    room_name = serializers.CharField(source='room.name', read_only=True, allow_null=True)
     voting_accuracy = serializers.ReadOnlyField()
     
     class Meta:
@@ -243,13 +244,18 @@ class JoinByCodeSerializer(serializers.Serializer):
     
     def validate_room_code(self, value):
         value = value.upper()
-        try:
-            room = GameRoom.objects.get(room_code=value)
-            if not room.can_join():
-                raise serializers.ValidationError("Cannot join this room")
-        except GameRoom.DoesNotExist:
+        room = resolve_room_code(value)
+        if room is None:
             raise serializers.ValidationError("Room not found")
+        if not room.can_join():
+            raise serializers.ValidationError("Cannot join this room")
+        # Handed to the view so the room is not looked up a second time
+        self.room = room
         return value
+    
+    def validate(self, attrs):
+        attrs['room'] = self.room
+        return attrs
 
 
 class QuestionSerializer(serializers.ModelSerializer):
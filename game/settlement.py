@@ -0,0 +1,156 @@
+# game/settlement.py - Post-game settlement: history rows, profile totals, achievements
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F, Q
+import logging
+import threading
+
+from .achievements import evaluate
+from .leaderboards import refresh_boards, update_sorted_boards
+from .statistics import record_game_results, record_teammates
+from .models import (
+    GameHistory, GameRoom, GameRound, Player, UserProfile, Vote
+)
+
+logger = logging.getLogger(__name__)
+
+
+def settlement_workers():
+    return getattr(settings, 'GAME_SETTINGS', {}).get('SETTLEMENT_WORKERS', 2)
+
+
+def build_histories(room, profiles):
+    """One unsaved GameHistory per player of a finished room with a profile.
+
+    Only rounds that were settled (have a RoundResult) are counted.
+    The winners are the players with the top score. A player's role is the
+    one they held in most rounds, ties counting as imposter.
+    """
+    players = list(Player.objects.filter(room=room))
+    imposter_rounds = dict(
+        GameRound.objects.filter(room=room, result__isnull=False)
+        .values('imposter_id').annotate(count=Count('id')).values_list('imposter_id', 'count')
+    )
+    total_rounds = sum(imposter_rounds.values())
+    votes = {
+        row['voter_id']: row for row in
+        Vote.objects.filter(round__room=room, round__result__isnull=False)
+        .exclude(voter_id=F('round__imposter_id'))
+        .values('voter_id')
+        .annotate(total=Count('id'), correct=Count('id', filter=Q(accused_id=F('round__imposter_id'))))
+    }
+    top_score = max((player.score for player in players), default=0)
+    duration = 0
+    if room.started_at and room.finished_at:
+        duration = int((room.finished_at - room.started_at).total_seconds() // 60)
+
+    histories = []
+    for player in players:
+        profile = profiles.get(player.user_id)
+        if profile is None:
+            continue
+        as_imposter = imposter_rounds.get(player.id, 0)
+        as_detective = total_rounds - as_imposter
+        player_votes = votes.get(player.id, {})
+        histories.append(GameHistory(
+            player=profile,
+            room=room,
+            role='imposter' if as_imposter and as_imposter >= as_detective else 'detective',
+            won=player.score > 0 and player.score == top_score,
+            points_earned=player.score,
+            performance_score=round(10 * player.score / top_score, 2) if top_score else 0.0,
+            total_rounds=total_rounds,
+            rounds_as_imposter=as_imposter,
+            rounds_as_detective=as_detective,
+            correct_votes=player_votes.get('correct', 0),
+            total_votes=player_votes.get('total', 0),
+            game_duration_minutes=duration,
+            player_count=len(players),
+        ))
+    return histories
+
+
+def insert_histories(histories):
+    """Insert GameHistory rows, each under its own savepoint; returns those inserted here.
+
+    ``select_for_update`` is a no-op on SQLite, so a concurrent settlement
+    of the same room can insert a player's row after it was read as
+    missing. The unique (player, room) constraint rejects the duplicate and
+    only the rows this call inserted go on to update statistics.
+    """
+    inserted = []
+    for history in histories:
+        try:
+            with transaction.atomic():
+                history.save(force_insert=True)
+        except IntegrityError:
+            logger.info(f"Game {history.room_id} was already settled for profile {history.player_id}")
+            continue
+        inserted.append(history)
+    return inserted
+
+
+def settle_game(room_id):
+    """Record a finished game for every player; returns the rows created.
+
+    Safe to run more than once, and concurrently: the room row is locked
+    where the database supports it, players who already have a GameHistory
+    for it are skipped, and rows inserted by a racing settlement are not
+    counted twice.
+    """
+    with transaction.atomic():
+        room = GameRoom.objects.select_for_update().filter(pk=room_id, status='finished').first()
+        if room is None:
+            return 0
+        settled = set(GameHistory.objects.filter(room=room).values_list('player_id', flat=True))
+        profiles = {
+            profile.user_id: profile for profile in
+            UserProfile.objects.filter(user__player__room=room).exclude(pk__in=settled)
+        }
+        histories = insert_histories(build_histories(room, profiles))
+        if not histories:
+            return 0
+        record_game_results(histories)
+        record_teammates(histories)
+        evaluate([history.player_id for history in histories], 'game', histories)
+
+    profile_ids = [history.player_id for history in histories]
+    refresh_boards(profile_ids)
+    update_sorted_boards(profile_ids)
+    logger.info(f"Settled game {room_id} for {len(histories)} players")
+    return len(histories)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settlement_workers(), thread_name_prefix='settlement')
+        return _executor
+
+
+def run_settlement(room_id):
+    try:
+        settle_game(room_id)
+    except Exception as e:
+        logger.error(f"Settlement of game {room_id} failed: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def schedule_settlement(room_id):
+    """Settle a game in a worker thread once the current transaction commits.
+
+    With ``SETTLEMENT_WORKERS`` set to 0 the game is settled inline instead.
+    Games whose settlement was lost can be settled with ``settle_games``.
+    """
+    if settlement_workers() <= 0:
+        transaction.on_commit(lambda: settle_game(room_id))
+    else:
+        transaction.on_commit(lambda: executor().submit(run_settlement, room_id))
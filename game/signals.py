@@ -0,0 +1,34 @@
+# game/signals.py - Model signal handlers
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .achievements import AchievementIndex
+from .decks import QuestionCatalog
+from .models import Achievement, Question, DecoyQuestion, UserProfile
+from .leaderboards import SORTED_BOARDS, update_sorted_boards
+
+
+@receiver([post_save, post_delete], sender=Question)
+@receiver([post_save, post_delete], sender=DecoyQuestion)
+def reload_question_catalog(sender, **kwargs):
+    QuestionCatalog.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Achievement)
+def reload_achievement_index(sender, **kwargs):
+    AchievementIndex.invalidate()
+
+
+@receiver(post_save, sender=UserProfile)
+def update_rankings(sender, instance, **kwargs):
+    # Once committed, so a save that is rolled back never reaches the boards
+    rows = [(instance.pk, *[getattr(instance, field) for field in SORTED_BOARDS.values()])]
+    transaction.on_commit(lambda: update_sorted_boards(rows=rows))
+
+
+@receiver(post_delete, sender=UserProfile)
+def remove_from_rankings(sender, instance, **kwargs):
+    profile_id = instance.pk
+    transaction.on_commit(lambda: update_sorted_boards(removed=profile_id))
@@ -0,0 +1,271 @@
+# game/sorted_sets.py - Sorted-set storage: Redis ZSETs or an in-process skiplist
+
+from django.conf import settings
+import logging
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SkipNode:
+    __slots__ = ('score', 'member', 'forward', 'span')
+
+    def __init__(self, score, member, level):
+        self.score = score
+        self.member = member
+        self.forward = [None] * level
+        self.span = [0] * level  # positions skipped by each forward link
+
+
+class SkipList:
+    """Members ordered by (score, member), with ranks, as in a Redis ZSET.
+
+    Each link records how many positions it skips, so inserts, deletes,
+    rank lookups and seeking to a rank all take O(log n) expected steps.
+    Positions are 1-based and ascending.
+    """
+
+    MAX_LEVEL = 32
+    P = 0.25
+
+    def __init__(self):
+        self.head = SkipNode(None, None, self.MAX_LEVEL)
+        self.level = 1
+        self.length = 0
+        self.scores = {}
+
+    def random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < self.P:
+            level += 1
+        return level
+
+    def find_update(self, score, member):
+        """Last node before (score, member) on every level, and its position"""
+        update = [self.head] * self.MAX_LEVEL
+        rank = [0] * self.MAX_LEVEL
+        node = self.head
+        for i in reversed(range(self.level)):
+            rank[i] = 0 if i == self.level - 1 else rank[i + 1]
+            while node.forward[i] is not None and (node.forward[i].score, node.forward[i].member) < (score, member):
+                rank[i] += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+        return update, rank
+
+    def insert(self, member, score):
+        if member in self.scores:
+            if self.scores[member] == score:
+                return
+            self.delete(member)
+        update, rank = self.find_update(score, member)
+        level = self.random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                rank[i] = 0
+                update[i] = self.head
+                self.head.span[i] = self.length
+            self.level = level
+        node = SkipNode(score, member, level)
+        for i in range(level):
+            node.forward[i] = update[i].forward[i]
+            update[i].forward[i] = node
+            node.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self.level):
+            update[i].span[i] += 1
+        self.scores[member] = score
+        self.length += 1
+
+    def delete(self, member):
+        if member not in self.scores:
+            return False
+        score = self.scores.pop(member)
+        update, _ = self.find_update(score, member)
+        node = update[0].forward[0]
+        for i in range(self.level):
+            if update[i].forward[i] is node:
+                update[i].span[i] += node.span[i] - 1
+                update[i].forward[i] = node.forward[i]
+            else:
+                update[i].span[i] -= 1
+        while self.level > 1 and self.head.forward[self.level - 1] is None:
+            self.level -= 1
+        self.length -= 1
+        return True
+
+    def rank(self, member):
+        """1-based ascending position of a member, or None"""
+        if member not in self.scores:
+            return None
+        key = (self.scores[member], member)
+        position = 0
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.forward[i] is not None and (node.forward[i].score, node.forward[i].member) <= key:
+                position += node.span[i]
+                node = node.forward[i]
+            if node.member == member and node is not self.head:
+                return position
+        return None
+
+    def count_at_most(self, score):
+        """Number of members scoring ``score`` or less"""
+        position = 0
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.forward[i] is not None and node.forward[i].score <= score:
+                position += node.span[i]
+                node = node.forward[i]
+        return position
+
+    def node_at(self, position):
+        """Node at a 1-based ascending position"""
+        traversed = 0
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.forward[i] is not None and traversed + node.span[i] <= position:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if traversed == position:
+                return node
+        return None
+
+    def slice(self, first, count):
+        """Up to ``count`` (member, score) pairs from a 1-based ascending position"""
+        node = self.node_at(first)
+        items = []
+        while node is not None and len(items) < count:
+            items.append((node.member, node.score))
+            node = node.forward[0]
+        return items
+
+
+class MemorySortedSetStore:
+    """Sorted sets held in this process, for tests and single-node deployments"""
+
+    def __init__(self):
+        self.sets = {}
+        self.lock = threading.Lock()
+
+    def exists(self, key):
+        return key in self.sets
+
+    def add(self, key, mapping):
+        with self.lock:
+            skiplist = self.sets.setdefault(key, SkipList())
+            for member, score in mapping.items():
+                skiplist.insert(str(member), score)
+
+    def remove(self, key, member):
+        with self.lock:
+            if key in self.sets:
+                self.sets[key].delete(str(member))
+
+    def score(self, key, member):
+        with self.lock:
+            return self.sets[key].scores.get(str(member)) if key in self.sets else None
+
+    def card(self, key):
+        with self.lock:
+            return self.sets[key].length if key in self.sets else 0
+
+    def rev_rank(self, key, member):
+        """0-based position from the highest score, like ZREVRANK"""
+        with self.lock:
+            skiplist = self.sets.get(key)
+            rank = skiplist.rank(str(member)) if skiplist else None
+            return None if rank is None else skiplist.length - rank
+
+    def count_above_many(self, key, scores):
+        """Members scoring more than each of ``scores``, like ZCOUNT key (score +inf"""
+        with self.lock:
+            skiplist = self.sets.get(key)
+            if skiplist is None:
+                return [0] * len(scores)
+            return [skiplist.length - skiplist.count_at_most(score) for score in scores]
+
+    def rev_range(self, key, start, stop):
+        """(member, score) pairs at 0-based positions start..stop from the top, like ZREVRANGE"""
+        with self.lock:
+            skiplist = self.sets.get(key)
+            if skiplist is None or start > stop or start >= skiplist.length:
+                return []
+            stop = min(stop, skiplist.length - 1)
+            items = skiplist.slice(skiplist.length - stop, stop - start + 1)
+            return list(reversed(items))
+
+    def rename(self, key, new_key):
+        """Replace ``new_key`` with ``key`` in one step, like RENAME"""
+        with self.lock:
+            self.sets[new_key] = self.sets.pop(key, None) or SkipList()
+
+    def delete(self, key):
+        with self.lock:
+            self.sets.pop(key, None)
+
+
+class RedisSortedSetStore:
+    """Sorted sets kept as Redis ZSETs, shared by every process"""
+
+    def __init__(self, url=None):
+        import redis
+        self.client = redis.Redis.from_url(url or settings.REDIS_URL, decode_responses=True)
+
+    def exists(self, key):
+        return bool(self.client.exists(key))
+
+    def add(self, key, mapping):
+        if mapping:
+            self.client.zadd(key, {str(member): score for member, score in mapping.items()})
+
+    def remove(self, key, member):
+        self.client.zrem(key, str(member))
+
+    def score(self, key, member):
+        score = self.client.zscore(key, str(member))
+        return None if score is None else int(score)
+
+    def card(self, key):
+        return self.client.zcard(key)
+
+    def rev_rank(self, key, member):
+        return self.client.zrevrank(key, str(member))
+
+    def count_above_many(self, key, scores):
+        pipeline = self.client.pipeline(transaction=False)
+        for score in scores:
+            pipeline.zcount(key, f'({score}', '+inf')
+        return pipeline.execute()
+
+    def rev_range(self, key, start, stop):
+        if start > stop:
+            return []
+        return [(member, int(score)) for member, score in
+                self.client.zrevrange(key, start, stop, withscores=True)]
+
+    def rename(self, key, new_key):
+        if self.client.exists(key):
+            self.client.rename(key, new_key)
+        else:
+            self.client.delete(new_key)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+STORES = {
+    'memory': MemorySortedSetStore,
+    'redis': RedisSortedSetStore,
+}
+
+_store = None
+
+
+def sorted_set_store():
+    """The configured store (GAME_SETTINGS['LEADERBOARD_STORE'], 'memory' by default)"""
+    global _store
+    if _store is None:
+        _store = STORES[getattr(settings, 'GAME_SETTINGS', {}).get('LEADERBOARD_STORE', 'memory')]()
+    return _store
@@ -0,0 +1,276 @@
+# game/statistics.py - Incremental UserProfile statistics and their audit
+
+from datetime import datetime, timezone as dt_timezone
+from django.db import transaction
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+import logging
+
+from .leaderboards import SORTED_BOARDS, update_sorted_boards
+from .models import GameHistory, Teammate, UserAchievement, UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Fields the audit recomputes from GameHistory
+AUDITED_FIELDS = [
+    'total_games', 'total_wins', 'total_imposter_wins', 'total_detective_wins',
+    'total_score', 'imposter_games', 'detective_games', 'win_rate', 'imposter_win_rate',
+    'detective_win_rate', 'average_score_per_game', 'total_playtime_minutes',
+    'consecutive_wins', 'best_win_streak', 'experience_level', 'total_correct_votes', 'total_votes_cast',
+]
+
+# Upper bounds of UserProfile.save()'s experience levels
+EXPERIENCE_LEVELS = [(5, 'Rookie'), (25, 'Novice'), (100, 'Experienced'), (500, 'Expert')]
+
+
+def experience_level(total_games):
+    for limit, level in EXPERIENCE_LEVELS:
+        if total_games < limit:
+            return level
+    return 'Master'
+
+
+def per_profile(histories, value, condition=lambda history: True, default=Value(0)):
+    """CASE expression giving each history's profile ``value(history)``"""
+    whens = [
+        When(pk=history.player_id, then=value(history))
+        for history in histories if condition(history)
+    ]
+    if not whens:
+        return default
+    return Case(*whens, default=default)
+
+
+def rate(wins, games):
+    """Percentage expression; the operands are the pre-update column values"""
+    return ExpressionWrapper(Value(100.0) * wins / games, output_field=FloatField())
+
+
+def record_game_results(histories):
+    """Add one game's GameHistory rows to their profiles in a single UPDATE.
+
+    Every assignment is written against the row's previous values, so the
+    cost does not depend on how many games a player has: counters are
+    incremented, rates and the average are derived from the new counters,
+    and the win streak is extended or reset from its stored value. Rates of
+    the role a player did not play keep their value.
+    """
+    if not histories:
+        return 0
+    won = lambda h: h.won
+    imposter = lambda h: h.role == 'imposter'
+    detective = lambda h: h.role == 'detective'
+    one = lambda h: Value(1)
+
+    wins = F('total_wins') + per_profile(histories, one, won)
+    games = F('total_games') + 1
+    score = F('total_score') + per_profile(histories, lambda h: Value(h.points_earned))
+    imposter_wins = F('total_imposter_wins') + per_profile(histories, one, lambda h: h.won and imposter(h))
+    detective_wins = F('total_detective_wins') + per_profile(histories, one, lambda h: h.won and detective(h))
+    streak = F('consecutive_wins') + 1
+
+    return UserProfile.objects.filter(pk__in=[history.player_id for history in histories]).update(
+        total_games=games,
+        total_wins=wins,
+        total_imposter_wins=imposter_wins,
+        total_detective_wins=detective_wins,
+        total_score=score,
+        imposter_games=F('imposter_games') + per_profile(histories, one, imposter),
+        detective_games=F('detective_games') + per_profile(histories, one, detective),
+        win_rate=rate(wins, games),
+        imposter_win_rate=per_profile(
+            histories, lambda h: rate(imposter_wins, F('imposter_games') + 1), imposter,
+            default=F('imposter_win_rate')
+        ),
+        detective_win_rate=per_profile(
+            histories, lambda h: rate(detective_wins, F('detective_games') + 1), detective,
+            default=F('detective_win_rate')
+        ),
+        average_score_per_game=ExpressionWrapper(Value(1.0) * score / games, output_field=FloatField()),
+        total_playtime_minutes=F('total_playtime_minutes') + per_profile(
+            histories, lambda h: Value(h.game_duration_minutes)
+        ),
+        consecutive_wins=per_profile(histories, lambda h: streak, won),
+        best_win_streak=per_profile(
+            histories, lambda h: Greatest(F('best_win_streak'), streak), won,
+            default=F('best_win_streak')
+        ),
+        total_correct_votes=F('total_correct_votes') + per_profile(histories, lambda h: Value(h.correct_votes)),
+        total_votes_cast=F('total_votes_cast') + per_profile(histories, lambda h: Value(h.total_votes)),
+        last_game_played=timezone.now(),
+        # Thresholds of experience_level(), tested against the old count
+        experience_level=Case(
+            *[When(total_games__lt=limit - 1, then=Value(level)) for limit, level in EXPERIENCE_LEVELS],
+            default=Value('Master')
+        ),
+    )
+
+
+def record_teammates(histories):
+    """Record the pairs of players in one settled game who had never played together.
+
+    A pair keeps the room it was first seen in, so the players who met in
+    this game are the pairs with its room: the achievement rules count
+    them without reading anyone's earlier games. A pair inserted by a
+    racing settlement of another game keeps that game's room.
+    """
+    if not histories:
+        return
+    room_id = histories[0].room_id
+    players = list(GameHistory.objects.filter(room_id=room_id).values_list('player_id', flat=True))
+    Teammate.objects.bulk_create([
+        Teammate(player_id=player_id, teammate_id=teammate_id, room_id=room_id)
+        for player_id in players for teammate_id in players if player_id != teammate_id
+    ], ignore_conflicts=True)
+
+
+def with_history_totals(profiles):
+    """Annotate profiles with their statistics recomputed from GameHistory.
+
+    Everything, including the current win streak, comes from one grouped
+    query. The best streak is not an aggregate; see ``win_streaks``.
+    """
+    history = 'game_history'
+    epoch = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+    # Nested in wins_since_last_loss, so the outer row is a GameHistory
+    last_loss = (GameHistory.objects.filter(player=OuterRef('player'), won=False)
+                 .order_by('-played_at').values('played_at')[:1])
+    wins_since_last_loss = (
+        GameHistory.objects
+        .filter(player=OuterRef('pk'), won=True,
+                played_at__gt=Coalesce(Subquery(last_loss), Value(epoch)))
+        .values('player').annotate(count=Count('id')).values('count')
+    )
+    achievement_points = (
+        UserAchievement.objects.filter(user=OuterRef('pk'), is_completed=True)
+        .values('user').annotate(points=Sum('achievement__points_reward')).values('points')
+    )
+    return profiles.annotate(
+        history_games=Count(history),
+        history_wins=Count(history, filter=Q(game_history__won=True)),
+        history_imposter_games=Count(history, filter=Q(game_history__role='imposter')),
+        history_detective_games=Count(history, filter=Q(game_history__role='detective')),
+        history_imposter_wins=Count(history, filter=Q(game_history__role='imposter', game_history__won=True)),
+        history_detective_wins=Count(history, filter=Q(game_history__role='detective', game_history__won=True)),
+        history_points=Coalesce(Sum('game_history__points_earned'), 0),
+        history_minutes=Coalesce(Sum('game_history__game_duration_minutes'), 0),
+        history_correct_votes=Coalesce(Sum('game_history__correct_votes'), 0),
+        history_votes=Coalesce(Sum('game_history__total_votes'), 0),
+        history_streak=Coalesce(Subquery(wins_since_last_loss, output_field=IntegerField()), 0),
+        # Achievement rewards are added to total_score when unlocked
+        reward_points=Coalesce(Subquery(achievement_points, output_field=IntegerField()), 0),
+    )
+
+
+def expected_statistics(profile):
+    """Field values implied by an annotated profile's history"""
+    games = profile.history_games
+    score = profile.history_points + profile.reward_points
+    imposter_games = profile.history_imposter_games
+    detective_games = profile.history_detective_games
+    return {
+        'total_games': games,
+        'total_wins': profile.history_wins,
+        'total_imposter_wins': profile.history_imposter_wins,
+        'total_detective_wins': profile.history_detective_wins,
+        'total_score': score,
+        'imposter_games': imposter_games,
+        'detective_games': detective_games,
+        'win_rate': profile.history_wins * 100.0 / games if games else 0.0,
+        'imposter_win_rate': profile.history_imposter_wins * 100.0 / imposter_games if imposter_games else 0.0,
+        'detective_win_rate': profile.history_detective_wins * 100.0 / detective_games if detective_games else 0.0,
+        'average_score_per_game': score / games if games else 0.0,
+        'total_playtime_minutes': profile.history_minutes,
+        'consecutive_wins': profile.history_streak,
+        'best_win_streak': max(profile.best_win_streak, profile.history_streak),
+        'experience_level': experience_level(games),
+        'total_correct_votes': profile.history_correct_votes,
+        'total_votes_cast': profile.history_votes,
+    }
+
+
+def win_streaks(profile_ids):
+    """{profile id: (current, best)} win streaks, walking the profiles' histories oldest first"""
+    streaks = {}
+    rows = (GameHistory.objects.filter(player_id__in=profile_ids)
+            .order_by('player_id', 'played_at', 'id').values_list('player_id', 'won'))
+    for profile_id, won in rows.iterator(chunk_size=5000):
+        current, best = streaks.get(profile_id, (0, 0))
+        current = current + 1 if won else 0
+        streaks[profile_id] = (current, max(best, current))
+    return streaks
+
+
+def drifted(stored, expected):
+    if isinstance(expected, float):
+        return abs((stored or 0.0) - expected) > 0.01
+    return stored != expected
+
+
+def audit_profiles(profiles=None, fix=False, full_streaks=False):
+    """Compare profiles with their GameHistory; returns the drifted fields.
+
+    Each entry is ``(profile, field, stored, expected)``. The best win
+    streak is only checked against the current streak unless
+    ``full_streaks`` walks the drifted profiles' histories. With ``fix``
+    the expected values are written back with ``bulk_update``.
+    """
+    if profiles is None:
+        profiles = UserProfile.objects.all()
+    drift = []
+    repaired = []
+    for profile in with_history_totals(profiles.order_by()).iterator(chunk_size=2000):
+        expected = expected_statistics(profile)
+        fields = [name for name in AUDITED_FIELDS if drifted(getattr(profile, name), expected[name])]
+        if fields and full_streaks:
+            expected['consecutive_wins'], expected['best_win_streak'] = win_streaks([profile.pk]).get(profile.pk, (0, 0))
+            fields = [name for name in AUDITED_FIELDS if drifted(getattr(profile, name), expected[name])]
+        if not fields:
+            continue
+        for name in fields:
+            drift.append((profile, name, getattr(profile, name), expected[name]))
+            setattr(profile, name, expected[name])
+        repaired.append(profile)
+
+    if fix and repaired:
+        UserProfile.objects.bulk_update(repaired, AUDITED_FIELDS, batch_size=500)
+        publish_rankings(repaired)
+        logger.info(f"Rebuilt statistics of {len(repaired)} profiles")
+    return drift
+
+
+def publish_rankings(profiles):
+    """Move bulk-updated profiles on the sorted-set boards.
+
+    ``bulk_update`` sends no ``post_save``, so the signal handlers that
+    normally do this never run. Like them, it waits for the commit.
+    """
+    rows = [(profile.pk, *[getattr(profile, field) for field in SORTED_BOARDS.values()]) for profile in profiles]
+    transaction.on_commit(lambda: update_sorted_boards(rows=rows))
+
+
+def rebuild_chunk(first_pk, last_pk):
+    """Rebuild the statistics of the profiles with a pk in ``[first_pk, last_pk]``.
+
+    One grouped query computes the aggregates and one streamed query the
+    streaks; changed profiles are written with ``bulk_update``. Returns
+    ``(profiles read, profiles updated)``. Runs in a worker process of
+    ``update_user_statistics``, so it only takes and returns plain values.
+    """
+    profiles = list(with_history_totals(UserProfile.objects.filter(pk__gte=first_pk, pk__lte=last_pk)))
+    streaks = win_streaks([profile.pk for profile in profiles])
+    changed = []
+    for profile in profiles:
+        expected = expected_statistics(profile)
+        expected['consecutive_wins'], expected['best_win_streak'] = streaks.get(profile.pk, (0, 0))
+        fields = [name for name in AUDITED_FIELDS if drifted(getattr(profile, name), expected[name])]
+        if fields:
+            for name in AUDITED_FIELDS:
+                setattr(profile, name, expected[name])
+            changed.append(profile)
+    UserProfile.objects.bulk_update(changed, AUDITED_FIELDS, batch_size=100)
+    publish_rankings(changed)
+    return len(profiles), len(changed)
@@ -0,0 +1,156 @@
+# game/streams.py - Server-Sent Events feed of round phase transitions
+
+from channels.db import database_sync_to_async
+import asyncio
+import json
+import logging
+
+from .models import GameEvent
+
+logger = logging.getLogger(__name__)
+
+# GameEvent types that move a room between phases, and the phase they enter
+PHASE_EVENTS = {
+    'game_started': 'answering',
+    'round_started': 'answering',
+    'discussion_started': 'discussion',
+    'voting_started': 'voting',
+    'round_ended': 'results',
+    'game_ended': 'finished',
+}
+
+POLL_INTERVAL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 15.0
+
+
+@database_sync_to_async
+def fetch_phase_events(room_id, after_id=None, limit=100):
+    """Phase events of a room newer than ``after_id``, oldest first"""
+    events = GameEvent.objects.filter(room_id=room_id, event_type__in=PHASE_EVENTS)
+    if after_id is not None:
+        events = events.filter(id__gt=after_id)
+    return list(events.order_by('id').values('id', 'event_type', 'data', 'timestamp')[:limit])
+
+
+@database_sync_to_async
+def latest_phase_event_id(room_id):
+    return (GameEvent.objects.filter(room_id=room_id, event_type__in=PHASE_EVENTS)
+            .order_by('-id').values_list('id', flat=True).first())
+
+
+def public_event_data(event_type, data):
+    """The fields of an event's data every player may see.
+
+    Roles, answers and votes stay server-side until the round reveals them.
+    """
+    data = data or {}
+    fields = {'round_number': data.get('round_number')}
+    if event_type == 'game_ended':
+        fields['final_scores'] = data.get('final_scores', {})
+    return fields
+
+
+def format_sse(event):
+    """Render a phase event as an SSE frame; only public fields are sent"""
+    payload = {
+        'event_type': event['event_type'],
+        'phase': PHASE_EVENTS[event['event_type']],
+        'timestamp': event['timestamp'].isoformat(),
+        **public_event_data(event['event_type'], event['data']),
+    }
+    return f"id: {event['id']}\nevent: phase\ndata: {json.dumps(payload)}\n\n"
+
+
+class RoomPhaseFeed:
+    """Polls one room's phase events and fans them out to local subscribers.
+
+    Every open stream for a room in this process shares a single feed, so
+    the database sees one cheap indexed query per room per poll interval no
+    matter how many clients are listening.
+    """
+
+    feeds = {}
+
+    def __init__(self, room_id):
+        self.room_id = room_id
+        self.subscribers = set()
+        self.cursor = None
+        self.task = None
+
+    @classmethod
+    def for_room(cls, room_id):
+        feed = cls.feeds.get(room_id)
+        if feed is None:
+            feed = cls.feeds[room_id] = cls(room_id)
+        return feed
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        self.subscribers.add(queue)
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            if self.task is not None:
+                self.task.cancel()
+                self.task = None
+            RoomPhaseFeed.feeds.pop(self.room_id, None)
+
+    async def run(self):
+        try:
+            if self.cursor is None:
+                self.cursor = await latest_phase_event_id(self.room_id) or 0
+            while self.subscribers:
+                for event in await fetch_phase_events(self.room_id, self.cursor):
+                    self.cursor = event['id']
+                    for queue in self.subscribers:
+                        queue.put_nowait(event)
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Phase feed error for room {self.room_id}: {str(e)}")
+            for queue in self.subscribers:
+                queue.put_nowait(None)
+
+
+async def phase_event_stream(room_id, last_event_id=None):
+    """Yield SSE frames for a room, resuming after ``last_event_id``.
+
+    Without a cursor the stream starts with the latest phase event so the
+    client learns the current phase without fetching the room.
+    """
+    feed = RoomPhaseFeed.for_room(room_id)
+    queue = feed.subscribe()
+    try:
+        yield f"retry: {int(POLL_INTERVAL_SECONDS * 3000)}\n\n"
+
+        if last_event_id is None:
+            latest = await latest_phase_event_id(room_id)
+            last_event_id = latest - 1 if latest else 0
+        backlog = await fetch_phase_events(room_id, last_event_id)
+        for event in backlog:
+            last_event_id = event['id']
+            yield format_sse(event)
+            if event['event_type'] == 'game_ended':
+                return
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if event is None:
+                return
+            if event['id'] <= last_event_id:
+                continue
+            last_event_id = event['id']
+            yield format_sse(event)
+            if event['event_type'] == 'game_ended':
+                return
+    finally:
+        feed.unsubscribe(queue)
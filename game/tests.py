@@ -1,3 +1,1130 @@
-from django.test import TestCase
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+import copy
+import json
+import os
+import random
+import shutil
+import tempfile
+import uuid
 
-# Create your tests here.
+from .achievements import METRICS, AchievementIndex, backfill_chunk, evaluate
+from .decks import QuestionCatalog, RoomDecks
+from .engine import RoundEngine, RoundError
+from .event_storage import FileEventStore, event_store
+from .journal import EventJournal, flush_events, make_event, record_event
+from . import leaderboards
+from .leaderboards import PERIODS, ROLES, SORTED_BOARDS, board_key, compute_board, get_board, sorted_board_key
+from .models import (
+    Achievement, DecoyQuestion, GameEvent, GameHistory, GameRoom, GameRound, Player, PlayerAnswer,
+    Question, RoomCode, RoomSnapshot, RoundResult, Teammate, UserAchievement, UserProfile, Vote
+)
+from .ranking import rank_for_score, ranks_for_scores
+from .read_models import get_room_detail, room_detail
+from .replay import GameReplay, fold, initial_state
+from .room_codes import allocate_room_code, fill_pool, free_code_count, release_room_code, resolve_room_code
+from .serializers import GameHistorySerializer, JoinByCodeSerializer
+from . import settlement
+from .settlement import settle_game
+from .sorted_sets import MemorySortedSetStore, sorted_set_store
+from .statistics import audit_profiles
+from .views import end_round
+
+
+class RoomDetailQueryCountTests(TestCase):
+    """The room read model must cost the same number of queries at any room size"""
+
+    def create_room(self, player_count):
+        users = []
+        for i in range(player_count):
+            user = User.objects.create(username=f'player{player_count}_{i}')
+            UserProfile.objects.create(user=user)
+            users.append(user)
+
+        room = GameRoom.objects.create(name=f'Room of {player_count}', host=users[0], max_players=12)
+        for i, user in enumerate(users):
+            Player.objects.create(user=user, room=room, nickname=user.username, is_host=i == 0, is_ready=True)
+        return room
+
+    def test_read_model_query_count_is_constant(self):
+        for player_count in (3, 8, 12):
+            room = self.create_room(player_count)
+            with self.assertNumQueries(2):
+                data = room_detail(get_room_detail(room.id))
+            self.assertEqual(len(data['players']), player_count)
+            self.assertEqual(data['player_count'], player_count)
+            self.assertTrue(data['can_start'])
+
+    def test_get_room_query_count_is_constant(self):
+        for player_count in (3, 8, 12):
+            room = self.create_room(player_count)
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse('game:get_room', args=[room.id]))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['players']), player_count)
+
+    def test_counts_without_annotations_match_read_model(self):
+        room = self.create_room(4)
+        Player.objects.filter(room=room, nickname='player4_3').update(is_ready=False)
+
+        plain = GameRoom.objects.get(id=room.id)
+        annotated = get_room_detail(room.id)
+        self.assertEqual(plain.player_count, annotated.player_count)
+        self.assertEqual(plain.total_player_count, annotated.total_player_count)
+        self.assertFalse(plain.can_start())
+        self.assertFalse(annotated.can_start())
+
+
+
+class RoomCodePoolTests(TestCase):
+    """Rooms draw their codes from the shuffled pool and give them back when done"""
+
+    def setUp(self):
+        self.host = User.objects.create(username='pool_host')
+
+    def create_room(self):
+        return GameRoom.objects.create(name='Pooled room', host=self.host)
+
+    def test_rooms_take_the_lowest_free_slot(self):
+        fill_pool(10)
+        expected = list(RoomCode.objects.filter(room__isnull=True).order_by('slot').values_list('code', flat=True))
+        rooms = [self.create_room() for _ in range(3)]
+
+        self.assertEqual([room.room_code for room in rooms], expected[:3])
+        for room in rooms:
+            self.assertEqual(RoomCode.objects.get(code=room.room_code).room_id, room.id)
+        self.assertEqual(free_code_count(), len(expected) - 3)
+
+    @override_settings(GAME_SETTINGS={**settings.GAME_SETTINGS, 'ROOM_CODE_POOL_BATCH': 5})
+    def test_empty_pool_is_refilled(self):
+        self.assertEqual(free_code_count(), 0)
+        room = self.create_room()
+
+        self.assertEqual(RoomCode.objects.get(room=room).code, room.room_code)
+        self.assertEqual(RoomCode.objects.count(), 5)
+        self.assertEqual(free_code_count(), 4)
+
+    def test_code_claimed_by_another_creator_is_skipped(self):
+        RoomCode.objects.create(code='AAAAAA', slot=1)
+        RoomCode.objects.create(code='BBBBBB', slot=2)
+        rival_id, room_id = uuid.uuid4(), uuid.uuid4()
+        real_update = QuerySet.update
+        raced = []
+
+        def racing_update(queryset, **kwargs):
+            if not raced:
+                # Another creator claims AAAAAA between our lookup and our claim
+                raced.append(True)
+                real_update(RoomCode.objects.filter(code='AAAAAA'), room_id=rival_id)
+            return real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=racing_update):
+            code = allocate_room_code(room_id)
+
+        self.assertEqual(code, 'BBBBBB')
+        self.assertEqual(RoomCode.objects.get(code='AAAAAA').room_id, rival_id)
+        self.assertEqual(RoomCode.objects.get(code='BBBBBB').room_id, room_id)
+
+    def test_join_by_code_looks_the_room_up_once(self):
+        room = self.create_room()
+        Player.objects.create(user=self.host, room=room, nickname='host', is_host=True)
+        serializer = JoinByCodeSerializer(data={'room_code': room.room_code.lower(), 'nickname': 'guest'})
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['room'].player_count, 1)
+
+        guest = User.objects.create(username='pool_guest')
+        UserProfile.objects.create(user=guest)
+        client = APIClient()
+        client.force_authenticate(guest)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(reverse('game:join_room_by_code'),
+                                   {'room_code': room.room_code, 'nickname': 'guest'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        lookups = [q['sql'] for q in queries if '"game_gameroom"."room_code" =' in q['sql']]
+        self.assertEqual(len(lookups), 1)
+
+    def test_release_returns_the_code_to_the_pool(self):
+        room = self.create_room()
+        code = room.room_code
+        self.assertEqual(resolve_room_code(code).id, room.id)
+
+        release_room_code(room)
+
+        self.assertIsNone(room.room_code)
+        self.assertIsNone(GameRoom.objects.get(id=room.id).room_code)
+        pooled = RoomCode.objects.get(code=code)
+        self.assertIsNone(pooled.room_id)
+        self.assertIsNone(pooled.allocated_at)
+        self.assertIsNone(resolve_room_code(code))
+
+    def test_released_code_is_recycled(self):
+        RoomCode.objects.create(code='RECYC1', slot=1)
+        first = self.create_room()
+        self.assertEqual(first.room_code, 'RECYC1')
+
+        release_room_code(first)
+        second = self.create_room()
+
+        self.assertEqual(second.room_code, 'RECYC1')
+        self.assertEqual(RoomCode.objects.get(code='RECYC1').room_id, second.id)
+        self.assertEqual(resolve_room_code('recyc1').id, second.id)
+
+
+
+class EventJournalTests(TestCase):
+    """Buffered events reach the store in batches, in order, and survive a failed write"""
+
+    def setUp(self):
+        host = User.objects.create(username='journal_host')
+        self.room = GameRoom.objects.create(name='Journaled room', host=host)
+        self.journal = EventJournal()
+        # Flushes are driven by the test, not the background thread
+        patcher = mock.patch.object(EventJournal, 'ensure_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def event(self, number):
+        return make_event(self.room.id, 'player_joined', data={'number': number})
+
+    def journaled_numbers(self):
+        return [event.data['number'] for event in GameEvent.objects.filter(room=self.room).order_by('id')]
+
+    @override_settings(GAME_SETTINGS={**settings.GAME_SETTINGS, 'EVENT_JOURNAL_BATCH_SIZE': 3})
+    def test_buffer_is_written_at_batch_size(self):
+        self.journal.append(self.event(1))
+        self.journal.append(self.event(2))
+        self.assertEqual(self.journaled_numbers(), [])
+
+        # One multi-row INSERT, inside the store's savepoint
+        with self.assertNumQueries(3):
+            self.journal.append(self.event(3))
+        self.assertEqual(self.journaled_numbers(), [1, 2, 3])
+        self.assertEqual(self.journal.buffer, [])
+        self.assertIsNone(self.journal.oldest_at)
+
+    def test_failed_flush_requeues_ahead_of_new_events(self):
+        self.journal.append(self.event(1))
+        self.journal.append(self.event(2))
+        with mock.patch.object(event_store(), 'write', side_effect=DatabaseError('down')), \
+                self.assertLogs('game.journal', 'ERROR'):
+            self.assertEqual(self.journal.flush(), 0)
+        self.assertEqual(len(self.journal.buffer), 2)
+        self.assertIsNotNone(self.journal.oldest_at)
+
+        self.journal.append(self.event(3))
+        self.assertEqual(self.journal.flush(), 3)
+        self.assertEqual(self.journaled_numbers(), [1, 2, 3])
+
+    def test_exit_hook_flushes_the_buffer(self):
+        with mock.patch('game.journal.journal', self.journal):
+            with self.captureOnCommitCallbacks(execute=True):
+                record_event(self.room, 'player_joined', data={'number': 1})
+            self.assertEqual(self.journaled_numbers(), [])
+
+            flush_events()
+        self.assertEqual(self.journaled_numbers(), [1])
+        self.assertEqual(self.journal.buffer, [])
+
+
+
+class FileEventStoreTests(TestCase):
+    """Room logs roll over, replay in order and are archived and pruned whole"""
+
+    def setUp(self):
+        self.host = User.objects.create(username='log_host')
+        self.room = GameRoom.objects.create(name='Logged room', host=self.host)
+        self.player = Player.objects.create(user=self.host, room=self.room, nickname='host', is_host=True)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.store = FileEventStore(directory=directory, segment_events=2)
+
+    def event(self, number, event_type='player_joined', room=None, **fields):
+        event = make_event((room or self.room).id, event_type, data={'number': number})
+        for name, value in fields.items():
+            setattr(event, name, value)
+        return event
+
+    def logged(self, room=None):
+        return [(event.id, event.data['number']) for event in self.store.read((room or self.room).id)]
+
+    def test_segments_roll_over(self):
+        self.store.write([self.event(n) for n in range(1, 6)])
+        self.assertEqual(self.store.segments(self.room.id), [1, 2, 3])
+        self.assertEqual(self.logged(), [(n, n) for n in range(1, 6)])
+
+        # A fresh store picks the sequence up from the last segment
+        reopened = FileEventStore(directory=self.store.directory, segment_events=2)
+        reopened.write([self.event(6), self.event(7)])
+        self.assertEqual(reopened.segments(self.room.id), [1, 2, 3, 4])
+        self.assertEqual([event.id for event in reopened.read(self.room.id, after=5)], [6, 7])
+
+    def test_tail_reads_backwards_across_segments(self):
+        self.store.write([self.event(n, player_id=self.player.id) for n in range(1, 6)])
+
+        with self.assertNumQueries(1):
+            events = self.store.tail(self.room.id, 4)
+        self.assertEqual([event.data['number'] for event in events], [5, 4, 3, 2])
+        self.assertEqual(events[0].player.user, self.host)
+
+    def test_retried_batch_is_not_written_twice(self):
+        events = [self.event(1, 'round_started'), self.event(2), self.event(3)]
+        flush_lines = self.store.flush_lines
+        calls = []
+
+        def fail_second_segment(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OSError('disk full')
+            return flush_lines(*args)
+
+        with mock.patch.object(self.store, 'flush_lines', side_effect=fail_second_segment):
+            with self.assertRaises(OSError):
+                self.store.write(events)
+        self.assertEqual(self.logged(), [(1, 1), (2, 2)])
+
+        self.assertEqual(self.store.write(events), 3)
+        self.assertEqual(self.logged(), [(1, 1), (2, 2), (3, 3)])
+        self.assertEqual(GameEvent.objects.filter(room=self.room).count(), 1)
+
+    def test_archive_merges_rows_in_time_order(self):
+        start = timezone.now() - timedelta(hours=1)
+        GameEvent.objects.create(room=self.room, event_type='player_joined', data={'number': 1}, timestamp=start)
+        GameEvent.objects.create(room=self.room, event_type='player_joined', data={'number': 3},
+                                 timestamp=start + timedelta(minutes=20))
+        self.store.write([
+            self.event(2, timestamp=start + timedelta(minutes=10)),
+            self.event(4, 'round_started', timestamp=start + timedelta(minutes=30)),
+        ])
+        RoomSnapshot.objects.create(room=self.room, round_number=1, position=2, state={})
+
+        # Both old rows and the phase-event index row are moved
+        self.assertEqual(self.store.archive(self.room.id), 3)
+
+        self.assertEqual(self.logged(), [(1, 1), (2, 2), (3, 3), (4, 4)])
+        self.assertFalse(GameEvent.objects.filter(room=self.room).exists())
+        self.assertFalse(RoomSnapshot.objects.filter(room=self.room).exists())
+        self.store.write([self.event(5)])
+        self.assertEqual(self.logged()[-1], (5, 5))
+
+    def test_prune_removes_whole_rooms_only(self):
+        other = GameRoom.objects.create(name='Expired room', host=self.host)
+        self.store.write([self.event(n) for n in range(1, 4)])
+        self.store.write([self.event(n, room=other) for n in range(1, 4)])
+        expired = (timezone.now() - timedelta(days=40)).timestamp()
+        # The first room's oldest segment has expired but it was written since
+        os.utime(self.store.segment_path(self.room.id, 1), (expired, expired))
+        for segment in self.store.segments(other.id):
+            os.utime(self.store.segment_path(other.id, segment), (expired, expired))
+
+        self.assertEqual(self.store.prune(30), 1)
+
+        self.assertEqual(self.logged(), [(1, 1), (2, 2), (3, 3)])
+        self.assertEqual(self.store.segments(other.id), [])
+        self.assertFalse(os.path.exists(self.store.room_dir(other.id)))
+
+
+
+class GameReplayTests(TestCase):
+    """Seeking from a snapshot lands on the same state as a full replay"""
+
+    def setUp(self):
+        users = [User.objects.create(username=f'replay{i}') for i in range(3)]
+        self.room = GameRoom.objects.create(name='Replayed room', host=users[0])
+        self.players = [
+            Player.objects.create(user=user, room=self.room, nickname=user.username, is_host=i == 0)
+            for i, user in enumerate(users)
+        ]
+        self.record_game(rounds=3)
+
+    def record_game(self, rounds):
+        clock = iter(timezone.now() - timedelta(hours=1) + timedelta(seconds=i) for i in range(1000))
+        ids = [player.id for player in self.players]
+
+        def record(event_type, player_id=None, **data):
+            GameEvent.objects.create(room=self.room, event_type=event_type, player_id=player_id,
+                                     data=data, timestamp=next(clock))
+
+        for player in self.players:
+            record('player_joined', player.id, nickname=player.nickname)
+        record('game_started', total_rounds=rounds)
+        for number in range(1, rounds + 1):
+            imposter = ids[number % 3]
+            record('round_started', round_number=number, question_id=number, imposter_id=imposter)
+            for i, player_id in enumerate(ids):
+                record('answer_submitted', player_id, answer=i + number)
+            record('discussion_started', round_number=number)
+            record('voting_started', round_number=number)
+            choices = {}
+            for player_id in ids:
+                accused = [other for other in ids if other != player_id][number % 2]
+                record('vote_submitted', player_id, accused_id=accused)
+                choices[str(player_id)] = {'accused_id': accused}
+            counts = {}
+            for choice in choices.values():
+                counts[str(choice['accused_id'])] = counts.get(str(choice['accused_id']), 0) + 1
+            most_voted = max(counts, key=counts.get)
+            record('round_ended', round_number=number, imposter_id=imposter,
+                   imposter_caught=most_voted == str(imposter), most_voted_player_id=int(most_voted),
+                   vote_counts=counts, voter_choices=choices)
+        record('game_ended', final_scores={})
+
+    def folded_until(self, round_number, store=None):
+        """State from folding every event until ``round_number`` starts"""
+        state = initial_state()
+        for event in (store or event_store()).read(self.room.id):
+            fold(state, event)
+            if state['round_number'] == round_number:
+                break
+        return json.loads(json.dumps(state))
+
+    def test_seek_matches_a_full_fold(self):
+        replay = GameReplay(self.room.id, every=4)
+        for number in (3, 1, 2):
+            self.assertEqual(replay.seek(number), self.folded_until(number))
+        self.assertTrue(RoomSnapshot.objects.filter(room=self.room, round_number=2).exists())
+
+        # Replaying from a round continues exactly as the full replay does
+        full = [copy.deepcopy(state) for _, state in GameReplay(self.room.id).replay()]
+        partial = [copy.deepcopy(state) for _, state in replay.replay(from_round=2)]
+        self.assertEqual(json.loads(json.dumps(partial)), json.loads(json.dumps(full[-len(partial):])))
+        self.assertEqual(partial[-1]['rounds_played'], 3)
+
+    def test_snapshots_are_rebuilt_after_archive(self):
+        before = GameReplay(self.room.id, every=4).seek(2)
+        self.assertTrue(RoomSnapshot.objects.filter(room=self.room).exists())
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        store = FileEventStore(directory=directory)
+        store.archive(self.room.id)
+        self.assertFalse(RoomSnapshot.objects.filter(room=self.room).exists())
+
+        replay = GameReplay(self.room.id, store=store, every=4)
+        self.assertEqual(replay.seek(2), before)
+        self.assertEqual(replay.seek(2), self.folded_until(2, store))
+        positions = list(RoomSnapshot.objects.filter(room=self.room).values_list('position', flat=True))
+        self.assertTrue(positions)
+        self.assertLessEqual(max(positions), len(list(store.read(self.room.id))))
+
+
+
+class RoundEngineTests(TestCase):
+    """Answers and votes are held in memory and written when their phase ends"""
+
+    def setUp(self):
+        self.users = []
+        for i in range(3):
+            user = User.objects.create(username=f'engine{i}')
+            UserProfile.objects.create(user=user)
+            self.users.append(user)
+        self.room = GameRoom.objects.create(
+            name='Engine room', host=self.users[0], status='in_progress', current_round=1
+        )
+        self.players = [
+            Player.objects.create(user=user, room=self.room, nickname=user.username, is_host=i == 0)
+            for i, user in enumerate(self.users)
+        ]
+        self.round = GameRound.objects.create(
+            room=self.room, round_number=1, status='answering', imposter=self.players[2],
+            question=Question.objects.create(text='How many?', category='lifestyle', min_answer=0, max_answer=10),
+            decoy_question=DecoyQuestion.objects.create(text='How few?', min_answer=0, max_answer=10),
+        )
+        self.addCleanup(RoundEngine.discard, self.room.id)
+
+    def answer_all(self, state):
+        for i, user in enumerate(self.users):
+            complete = state.submit_answer(user.id, i)
+        return complete
+
+    def test_phase_is_flushed_when_it_ends(self):
+        state = RoundEngine.for_room(self.room.id)
+        with self.assertNumQueries(0):
+            self.assertFalse(state.submit_answer(self.users[0].id, 3))
+        self.assertFalse(PlayerAnswer.objects.exists())
+
+        self.assertFalse(state.submit_answer(self.users[1].id, 4))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(state.submit_answer(self.users[2].id, 5))
+
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.status, 'discussion')
+        self.assertEqual(self.round.state_version, state.version)
+        self.assertEqual(state.status, 'discussion')
+        self.assertEqual(PlayerAnswer.objects.filter(round=self.round).count(), 3)
+        self.assertEqual(
+            list(GameEvent.objects.filter(room=self.room).order_by('id').values_list('event_type', flat=True)),
+            ['answer_submitted'] * 3 + ['discussion_started']
+        )
+        self.assertIs(RoundEngine.for_room(self.room.id), state)
+
+    def test_failed_flush_keeps_the_phase_open(self):
+        state = RoundEngine.for_room(self.room.id)
+        with mock.patch.object(PlayerAnswer.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                self.answer_all(state)
+
+        self.assertEqual(state.status, 'answering')
+        self.assertEqual(len(state.answers), 3)
+        self.assertEqual([event.event_type for event in state.events], ['answer_submitted'] * 3)
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.status, 'answering')
+
+        # The next submission retries the write with every pending answer
+        self.assertTrue(state.submit_answer(self.users[2].id, 6))
+        self.assertEqual(
+            dict(PlayerAnswer.objects.filter(round=self.round).values_list('player_id', 'answer')),
+            {self.players[0].id: 0, self.players[1].id: 1, self.players[2].id: 6}
+        )
+        self.assertEqual(state.events, [])
+
+    def test_sync_players_drops_rows_of_players_who_left(self):
+        state = RoundEngine.for_room(self.room.id)
+        state.submit_answer(self.users[0].id, 1)
+        state.submit_answer(self.users[1].id, 2)
+        self.players[1].delete()
+        RoundEngine.players_changed(self.room.id)
+
+        self.assertNotIn(self.players[1].id, state.players)
+        self.assertEqual(set(state.answers), {self.players[0].id})
+        self.assertEqual([event.player_id for event in state.events], [self.players[0].id])
+        with self.assertRaises(RoundError):
+            state.player_for_user(self.users[1].id)
+        # Only the players still in the room are waited for
+        self.assertTrue(state.submit_answer(self.users[2].id, 3))
+        self.assertEqual(PlayerAnswer.objects.filter(round=self.round).count(), 2)
+
+    def test_state_moved_on_by_another_process_is_reloaded(self):
+        state = RoundEngine.for_room(self.room.id)
+        GameRound.objects.filter(pk=self.round.pk).update(
+            status='discussion', state_version=F('state_version') + 1
+        )
+
+        reloaded = RoundEngine.for_room(self.room.id)
+        self.assertIsNot(reloaded, state)
+        self.assertEqual(reloaded.status, 'discussion')
+        reloaded.start_voting()
+        self.assertEqual(RoundEngine.for_room(self.room.id).status, 'voting')
+
+    def test_failed_settlement_does_not_leave_the_round_closed(self):
+        GameRound.objects.filter(pk=self.round.pk).update(status='voting')
+        client = APIClient()
+        url = reverse('game:submit_vote', args=[self.room.id, 1])
+        for i, user in enumerate(self.users):
+            client.force_authenticate(user)
+            accused = self.players[(i + 1) % 3]
+            if i < 2:
+                client.post(url, {'accused_player_id': accused.id}, format='json')
+                continue
+            with mock.patch('game.views.end_round', side_effect=DatabaseError('down')), \
+                    self.assertLogs('django.request', 'ERROR'):
+                with self.assertRaises(DatabaseError):
+                    client.post(url, {'accused_player_id': accused.id}, format='json')
+
+        self.assertIsNone(RoundEngine.get(self.room.id))
+        self.assertEqual(Vote.objects.filter(round=self.round).count(), 3)
+        state = RoundEngine.for_room(self.room.id)
+        self.assertEqual(state.status, 'voting')
+        self.assertEqual(len(state.votes), 3)
+
+
+
+class RoomDeckTests(TestCase):
+    """Rooms are dealt from one catalog load even if it is invalidated meanwhile"""
+
+    def setUp(self):
+        for i in range(3):
+            Question.objects.create(text=f'Question {i}', category='lifestyle', min_answer=0, max_answer=10)
+        DecoyQuestion.objects.create(text='Decoy', min_answer=0, max_answer=10)
+        self.room = GameRoom.objects.create(name='Deck room', host=User.objects.create(username='deck_host'))
+        self.addCleanup(RoomDecks.discard, self.room.id)
+
+    def test_deal_survives_a_concurrent_invalidation(self):
+        load = QuestionCatalog.ensure_loaded
+
+        def load_then_invalidate():
+            # An admin edit on another thread lands right after the load
+            loaded = load()
+            QuestionCatalog.invalidate()
+            return loaded
+
+        with mock.patch.object(QuestionCatalog, 'ensure_loaded', side_effect=load_then_invalidate):
+            question, decoy = RoomDecks.deal(self.room)
+
+        self.assertEqual(question.text[:9], 'Question ')
+        self.assertEqual(decoy.text, 'Decoy')
+        self.assertIsNone(QuestionCatalog.buckets)
+
+    def test_questions_are_not_repeated_within_a_game(self):
+        dealt = [RoomDecks.deal(self.room)[0].id for _ in range(3)]
+        self.assertEqual(len(set(dealt)), 3)
+
+
+
+class EndRoundScoringTests(TestCase):
+    """Round results and scores match the original per-player settlement"""
+
+    def setUp(self):
+        self.users = [User.objects.create(username=f'scoring{i}') for i in range(4)]
+        self.room = GameRoom.objects.create(
+            name='Scoring room', host=self.users[0], status='in_progress', current_round=1
+        )
+        self.players = [
+            Player.objects.create(user=user, room=self.room, nickname=f'p{i}', score=5, is_host=i == 0)
+            for i, user in enumerate(self.users)
+        ]
+        # p3 is the imposter
+        self.round = GameRound.objects.create(
+            room=self.room, round_number=1, status='voting', imposter=self.players[3],
+            question=Question.objects.create(text='How many?', category='lifestyle', min_answer=0, max_answer=10),
+            decoy_question=DecoyQuestion.objects.create(text='How few?', min_answer=0, max_answer=10),
+        )
+
+    def end_with_votes(self, *votes):
+        for voter, accused in votes:
+            Vote.objects.create(round=self.round, voter=self.players[voter], accused=self.players[accused])
+        return end_round(self.round)
+
+    def choice(self, voter, accused):
+        return {
+            self.players[voter].id: {
+                'voter_nickname': f'p{voter}',
+                'accused_id': self.players[accused].id,
+                'accused_nickname': f'p{accused}',
+            }
+        }
+
+    def expected(self, caught, most_voted, counts, *votes):
+        voter_choices = {}
+        for voter, accused in votes:
+            voter_choices.update(self.choice(voter, accused))
+        return {
+            'imposter_caught': caught,
+            'imposter': {'id': self.players[3].id, 'nickname': 'p3'},
+            'most_voted_player': (
+                {'id': self.players[most_voted].id, 'nickname': f'p{most_voted}'} if most_voted is not None else None
+            ),
+            'vote_counts': {self.players[i].id: count for i, count in counts.items()},
+            'voter_choices': voter_choices,
+        }
+
+    def assertScores(self, *scores):
+        self.assertEqual([player.score for player in Player.objects.filter(room=self.room).order_by('id')], list(scores))
+
+    def test_caught_imposter(self):
+        votes = [(0, 3), (1, 3), (2, 0), (3, 1)]
+        results = self.end_with_votes(*votes)
+
+        self.assertEqual(results, self.expected(True, 3, {3: 2, 0: 1, 1: 1}, *votes))
+        self.assertScores(7, 7, 5, 5)
+        result = RoundResult.objects.get(round=self.round)
+        self.assertTrue(result.imposter_caught)
+        self.assertEqual(result.total_votes, 4)
+
+    def test_imposter_gets_away(self):
+        votes = [(0, 1), (1, 2), (2, 1), (3, 1)]
+        results = self.end_with_votes(*votes)
+
+        self.assertEqual(results, self.expected(False, 1, {1: 3, 2: 1}, *votes))
+        self.assertScores(6, 6, 6, 8)
+
+    def test_tie_goes_to_the_first_accused(self):
+        votes = [(0, 3), (1, 0), (2, 3), (3, 0)]
+        results = self.end_with_votes(*votes)
+
+        self.assertEqual(results, self.expected(True, 3, {3: 2, 0: 2}, *votes))
+        self.assertScores(7, 5, 7, 5)
+
+    def test_disconnected_voter_counts_but_scores_nothing(self):
+        Player.objects.filter(pk=self.players[2].pk).update(is_connected=False)
+        votes = [(0, 3), (1, 0), (2, 3)]
+        results = self.end_with_votes(*votes)
+
+        self.assertEqual(results, self.expected(True, 3, {3: 2, 0: 1}, *votes))
+        self.assertScores(7, 5, 5, 5)
+
+    def test_round_without_votes(self):
+        results = self.end_with_votes()
+
+        self.assertEqual(results, self.expected(False, None, {}))
+        self.assertScores(5, 5, 5, 5)
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.status, 'results')
+
+
+
+class ConditionalGetTests(TestCase):
+    """Room and round reads answer a matching If-None-Match with 304"""
+
+    def setUp(self):
+        self.users = [User.objects.create(username=f'etag{i}') for i in range(3)]
+        for user in self.users:
+            UserProfile.objects.create(user=user)
+        self.room = GameRoom.objects.create(
+            name='Etag room', host=self.users[0], status='in_progress', current_round=1
+        )
+        self.players = [
+            Player.objects.create(user=user, room=self.room, nickname=user.username, is_host=i == 0)
+            for i, user in enumerate(self.users)
+        ]
+        self.round = GameRound.objects.create(
+            room=self.room, round_number=1, status='answering', imposter=self.players[2],
+            question=Question.objects.create(text='How many?', category='lifestyle', min_answer=0, max_answer=10),
+            decoy_question=DecoyQuestion.objects.create(text='How few?', min_answer=0, max_answer=10),
+        )
+        self.addCleanup(RoundEngine.discard, self.room.id)
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+        self.round_url = reverse('game:get_current_round', args=[self.room.id])
+
+    def test_room_is_not_modified_until_its_version_moves(self):
+        url = reverse('game:get_room', args=[self.room.id])
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.room.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_round_is_not_modified_until_a_submission(self):
+        etag = self.client.get(self.round_url)['ETag']
+        self.assertEqual(self.client.get(self.round_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        RoundEngine.for_room(self.room.id).submit_answer(self.users[1].id, 4)
+        response = self.client.get(self.round_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['answers']), 1)
+        self.assertEqual(self.client.get(self.round_url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_player_who_left_is_refused(self):
+        etag = self.client.get(self.round_url)['ETag']
+        self.players[0].delete()
+        RoundEngine.players_changed(self.room.id)
+
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.get(self.round_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 403)
+
+    def test_stale_state_does_not_validate_old_etags(self):
+        state = RoundEngine.for_room(self.room.id)
+        state.submit_answer(self.users[1].id, 4)
+        etag = self.client.get(self.round_url)['ETag']
+
+        # Another process flushed the phase and moved the round on
+        GameRound.objects.filter(pk=self.round.pk).update(status='discussion', state_version=F('state_version') + 5)
+        response = self.client.get(self.round_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'discussion')
+        self.assertEqual(response.json()['state_version'], self.round.state_version + 5)
+
+
+
+class SortedLeaderboardTests(TestCase):
+    """Ranks and board positions come from the sorted-set boards"""
+
+    def setUp(self):
+        self.clear_boards()
+        self.addCleanup(self.clear_boards)
+        self.profiles = []
+        for i, score in enumerate([50, 30, 30, 10]):
+            user = User.objects.create(username=f'ranked{i}')
+            self.profiles.append(UserProfile.objects.create(user=user, total_score=score, total_wins=i, total_games=5))
+
+    def clear_boards(self):
+        for board in SORTED_BOARDS:
+            sorted_set_store().delete(sorted_board_key(board))
+
+    def test_ties_share_a_rank(self):
+        self.assertEqual([profile.rank for profile in self.profiles], [1, 2, 2, 4])
+
+        profile = self.profiles[3]
+        profile.total_score = 60
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual([profile.rank for profile in self.profiles], [2, 3, 3, 1])
+        self.assertEqual(rank_for_score(40), 3)
+
+    def test_leaderboard_page_counts_ranks_in_one_batch(self):
+        store = sorted_set_store()
+        with mock.patch.object(store, 'count_above_many', wraps=store.count_above_many) as count_above_many:
+            response = self.client.get(reverse('game:leaderboard'), {'type': 'score'})
+
+        self.assertEqual(count_above_many.call_count, 1)
+        self.assertEqual(
+            [(row['user']['username'], row['rank']) for row in response.json()['leaderboard']],
+            [('ranked0', 1), ('ranked1', 2), ('ranked2', 2), ('ranked3', 4)]
+        )
+
+    def test_rev_rank_and_rev_range_edges(self):
+        store = MemorySortedSetStore()
+        self.assertIsNone(store.rev_rank('missing', 1))
+        self.assertEqual(store.rev_range('missing', 0, 10), [])
+        store.add('board', {1: 10, 2: 30, 3: 20, 4: 30, 5: 0})
+
+        # Ties are ordered by member, highest first, as in ZREVRANGE
+        self.assertEqual(store.rev_range('board', 0, 4), [('4', 30), ('2', 30), ('3', 20), ('1', 10), ('5', 0)])
+        self.assertEqual([store.rev_rank('board', member) for member in (4, 2, 3, 1, 5)], [0, 1, 2, 3, 4])
+        self.assertIsNone(store.rev_rank('board', 6))
+        self.assertEqual(store.rev_range('board', 3, 100), [('1', 10), ('5', 0)])
+        self.assertEqual(store.rev_range('board', 4, 4), [('5', 0)])
+        self.assertEqual(store.rev_range('board', 5, 9), [])
+        self.assertEqual(store.rev_range('board', 2, 1), [])
+        self.assertEqual(store.count_above_many('board', [30, 20, 5, -1]), [0, 2, 4, 5])
+
+        store.add('board', {4: 5})
+        store.remove('board', 2)
+        self.assertEqual(store.rev_range('board', 0, 10), [('3', 20), ('1', 10), ('4', 5), ('5', 0)])
+        self.assertEqual(store.card('board'), 4)
+
+    def test_my_rank_and_around_me(self):
+        UserProfile.objects.filter(pk=self.profiles[2].pk).update(total_score=20)
+        client = APIClient()
+        client.force_authenticate(self.profiles[2].user)
+        url = reverse('game:leaderboard')
+
+        response = client.get(url, {'type': 'my_rank'})
+        self.assertEqual(response.json()['me'], {'position': 3, 'value': 20, 'total': 4})
+        response = client.get(url, {'type': 'my_rank', 'board': 'wins'})
+        self.assertEqual(response.json()['me'], {'position': 2, 'value': 2, 'total': 4})
+
+        response = client.get(url, {'type': 'around_me', 'radius': 1})
+        self.assertEqual([entry['username'] for entry in response.json()['leaderboard']],
+                         ['ranked1', 'ranked2', 'ranked3'])
+        self.assertEqual([entry['position'] for entry in response.json()['leaderboard']], [2, 3, 4])
+
+        client.force_authenticate(self.profiles[0].user)
+        response = client.get(url, {'type': 'around_me', 'radius': 2})
+        self.assertEqual([entry['position'] for entry in response.json()['leaderboard']], [1, 2, 3])
+
+        self.assertEqual(client.get(url, {'type': 'around_me', 'radius': 'x'}).status_code, 400)
+        self.assertEqual(client.get(url, {'type': 'my_rank', 'board': 'losses'}).status_code, 400)
+        self.assertEqual(APIClient().get(url, {'type': 'my_rank'}).status_code, 401)
+
+    def test_rolled_back_save_leaves_the_boards_alone(self):
+        self.assertEqual(self.profiles[3].rank, 4)
+        profile = self.profiles[3]
+        profile.total_score = 100
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(DatabaseError):
+                with transaction.atomic():
+                    profile.save()
+                    raise DatabaseError('rolled back')
+
+        self.assertEqual(sorted_set_store().score(sorted_board_key('score'), profile.pk), 10)
+        self.assertEqual(rank_for_score(10), 4)
+
+    def test_ranks_fall_back_to_counting_profiles(self):
+        with mock.patch('game.ranking.ensure_sorted_board', side_effect=ConnectionError('down')), \
+                self.assertLogs('game.ranking', 'WARNING'):
+            self.assertEqual(ranks_for_scores([30, 10]), {30: 2, 10: 4})
+
+
+
+class GamePlayMixin:
+    """Plays whole games through the API; settling them is left to the test"""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            Question.objects.create(text=f'Question {i}', category='lifestyle', min_answer=0, max_answer=10)
+        DecoyQuestion.objects.create(text='Decoy', min_answer=0, max_answer=10)
+
+    def play_game(self, usernames, rounds=2, seed=0):
+        rng = random.Random(seed)
+        users = []
+        for username in usernames:
+            user, _ = User.objects.get_or_create(username=username)
+            UserProfile.objects.get_or_create(user=user)
+            users.append(user)
+        room = GameRoom.objects.create(name='Played room', host=users[0], total_rounds=rounds)
+        players = [
+            Player.objects.create(user=user, room=room, nickname=user.username, is_host=i == 0, is_ready=True)
+            for i, user in enumerate(users)
+        ]
+        clients = {}
+        for user in users:
+            clients[user.id] = APIClient()
+            clients[user.id].force_authenticate(user)
+        host = clients[users[0].id]
+
+        self.assertEqual(host.post(reverse('game:start_game', args=[room.id])).status_code, 200)
+        for number in range(1, rounds + 1):
+            for user in users:
+                clients[user.id].post(reverse('game:submit_answer', args=[room.id, number]),
+                                      {'answer': rng.randint(0, 10)}, format='json')
+            host.post(reverse('game:start_voting', args=[room.id, number]))
+            for user in users:
+                accused = rng.choice([player for player in players if player.user_id != user.id])
+                clients[user.id].post(reverse('game:submit_vote', args=[room.id, number]),
+                                      {'accused_player_id': accused.id}, format='json')
+            host.post(reverse('game:continue_to_next_round', args=[room.id]))
+
+        room.refresh_from_db()
+        self.assertEqual(room.status, 'finished')
+        return room
+
+
+class SettlementTests(GamePlayMixin, TestCase):
+    """A finished game is recorded once per player, however often it is settled"""
+
+    def test_settling_twice_records_each_player_once(self):
+        room = self.play_game(['settle0', 'settle1', 'settle2'])
+        self.assertEqual(settle_game(room.id), 3)
+        self.assertEqual(settle_game(room.id), 0)
+
+        self.assertEqual(GameHistory.objects.filter(room=room).count(), 3)
+        scores = dict(room.players.values_list('user_id', 'score'))
+        for profile in UserProfile.objects.filter(user__player__room=room):
+            self.assertEqual(profile.total_games, 1)
+            self.assertEqual(profile.total_score, scores[profile.user_id])
+
+    def test_rows_inserted_by_a_racing_settlement_are_not_counted(self):
+        room = self.play_game(['race0', 'race1', 'race2'])
+        build_histories = settlement.build_histories
+
+        def racing_build_histories(room, profiles):
+            histories = build_histories(room, profiles)
+            # Another worker settles the first player between the read and the insert
+            GameHistory.objects.create(player=histories[0].player, room=room, role=histories[0].role)
+            return histories
+
+        with mock.patch('game.settlement.build_histories', racing_build_histories):
+            self.assertEqual(settle_game(room.id), 2)
+
+        self.assertEqual(GameHistory.objects.filter(room=room).count(), 3)
+        totals = sorted(UserProfile.objects.filter(user__player__room=room).values_list('total_games', flat=True))
+        self.assertEqual(totals, [0, 1, 1])
+
+
+class PointsBoardTests(GamePlayMixin, TestCase):
+    """Cached top-K boards stay equal to a fresh build as games settle"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def assertBoardsAreFresh(self):
+        for period in PERIODS:
+            for role in ROLES:
+                cached = cache.get(board_key(period, role))
+                self.assertIsNotNone(cached, (period, role))
+                self.assertEqual(cached, compute_board(period, role), (period, role))
+
+    @override_settings(GAME_SETTINGS={**settings.GAME_SETTINGS, 'LEADERBOARD_SIZE': 2})
+    def test_merged_boards_match_a_fresh_build(self):
+        settle_game(self.play_game(['board0', 'board1', 'board2'], seed=0).id)
+        for period in PERIODS:
+            for role in ROLES:
+                get_board(period, role)
+
+        settle_game(self.play_game(['board2', 'board3', 'board4'], seed=1).id)
+        settle_game(self.play_game(['board0', 'board3', 'board5'], seed=2).id)
+
+        self.assertBoardsAreFresh()
+
+    def test_board_built_during_a_settlement_is_not_kept(self):
+        settle_game(self.play_game(['race0', 'race1', 'race2'], seed=0).id)
+        late = self.play_game(['race2', 'race3', 'race4'], seed=1)
+        sort_entries = leaderboards.sort_entries
+        settled = []
+
+        def settle_after_query(entries):
+            # The late game commits after the board's query has run
+            if not settled:
+                settled.append(settle_game(late.id))
+            return sort_entries(entries)
+
+        with mock.patch('game.leaderboards.sort_entries', side_effect=settle_after_query):
+            get_board('all', 'all')
+
+        self.assertEqual(settled, [3])
+        self.assertIsNone(cache.get(board_key('all', 'all')))
+        board = get_board('all', 'all')
+        self.assertIn('race4', [entry['username'] for entry in board])
+        self.assertEqual(board, compute_board('all', 'all'))
+
+
+
+class StatisticsAuditTests(GamePlayMixin, TestCase):
+    """Statistics kept incrementally at settlement must match a rebuild from history"""
+
+    def test_settled_games_leave_no_drift(self):
+        players = ['audit0', 'audit1', 'audit2', 'audit3']
+        for seed in range(3):
+            settle_game(self.play_game(players, rounds=2, seed=seed).id)
+        settle_game(self.play_game(players[:3], rounds=3, seed=7).id)
+
+        self.assertEqual(audit_profiles(full_streaks=True), [])
+        self.assertEqual(
+            sorted(UserProfile.objects.values_list('total_games', flat=True)), [3, 4, 4, 4]
+        )
+
+    def test_fix_repairs_a_corrupted_field(self):
+        settle_game(self.play_game(['fix0', 'fix1', 'fix2']).id)
+        profile = UserProfile.objects.get(user__username='fix1')
+        UserProfile.objects.filter(pk=profile.pk).update(total_games=10, total_score=F('total_score') + 50)
+
+        drift = audit_profiles(fix=True)
+        self.assertEqual(
+            sorted((drifted.pk, field, stored) for drifted, field, stored, expected in drift
+                   if field in ('total_games', 'total_score')),
+            [(profile.pk, 'total_games', 10), (profile.pk, 'total_score', profile.total_score + 50)]
+        )
+        profile.refresh_from_db()
+        self.assertEqual(profile.total_games, 1)
+        self.assertEqual(audit_profiles(), [])
+
+    def test_cleaned_up_rooms_keep_their_history(self):
+        settle_game(self.play_game(['kept0', 'kept1', 'kept2']).id)
+        GameRoom.objects.update(finished_at=timezone.now() - timedelta(days=2))
+
+        call_command('cleanup_old_rooms', stdout=StringIO())
+
+        self.assertFalse(GameRoom.objects.exists())
+        self.assertEqual(GameHistory.objects.filter(room__isnull=True).count(), 3)
+        self.assertEqual(audit_profiles(full_streaks=True), [])
+        profile = UserProfile.objects.get(user__username='kept0')
+        self.assertEqual(profile.total_games, 1)
+        self.assertIsNone(GameHistorySerializer(profile.game_history.get()).data['room_name'])
+
+
+
+class AchievementEvaluationTests(GamePlayMixin, TestCase):
+    """Achievements unlocked while games settle must match a backfill over the same history"""
+
+    def setUp(self):
+        super().setUp()
+        call_command('seed_achievements', stdout=StringIO())
+        # Reachable in a handful of short games
+        for name, requirement in [('Getting Started', 3), ('Social Butterfly', 4), ('High Scorer', 20),
+                                  ('On a Roll', 2), ('Sneaky', 1), ('Ghost', 2)]:
+            achievement = Achievement.objects.get(name=name)
+            achievement.requirement_value = requirement
+            achievement.save()
+        Achievement.objects.create(
+            name='Sharp Start', description='', icon='', category='skill', requirement_type='percentage',
+            requirement_value=50, requirement_description='', metric='voting_accuracy', min_games=2,
+        )
+
+    def progress(self):
+        # A row whose progress fell back to zero (a broken streak) means the same as no row
+        return set(UserAchievement.objects.exclude(progress_value=0, is_completed=False).values_list(
+            'user_id', 'achievement__name', 'progress_value', 'is_completed'
+        ))
+
+    def test_backfill_matches_incremental_evaluation(self):
+        players = ['ach0', 'ach1', 'ach2', 'ach3', 'ach4']
+        for username in players:
+            # As register_user does
+            profile = UserProfile.objects.create(user=User.objects.create(username=username))
+            evaluate([profile.pk], 'registered')
+        for seed, names in enumerate([players[:3], players[1:4], players[:4], players[2:], players[:3]]):
+            settle_game(self.play_game(names, rounds=2, seed=seed).id)
+        incremental = self.progress()
+        scores = dict(UserProfile.objects.values_list('pk', 'total_score'))
+        self.assertTrue(any(completed for *_, completed in incremental))
+
+        # Forget every achievement (and its points) and who met whom, then rebuild them from history alone
+        teammates = set(Teammate.objects.values_list('player_id', 'teammate_id', 'room_id'))
+        UserAchievement.objects.all().delete()
+        Teammate.objects.all().delete()
+        import_module('game.migrations.0012_running_achievement_totals').backfill_teammates(apps, None)
+        self.assertEqual(set(Teammate.objects.values_list('player_id', 'teammate_id', 'room_id')), teammates)
+        audit_profiles(fix=True)
+        profile_ids = list(UserProfile.objects.order_by('pk').values_list('pk', flat=True))
+        read, written, unlocked = backfill_chunk(profile_ids[0], profile_ids[-1])
+
+        self.assertEqual(read, GameHistory.objects.count())
+        self.assertEqual(self.progress(), incremental)
+        self.assertEqual(dict(UserProfile.objects.values_list('pk', 'total_score')), scores)
+        self.assertEqual(backfill_chunk(profile_ids[0], profile_ids[-1])[1:], (0, 0))
+
+    def test_min_games_holds_back_completion(self):
+        players = ['min0', 'min1', 'min2']
+        Achievement.objects.create(
+            name='Second Game', description='', icon='', category='milestone', requirement_type='count',
+            requirement_value=1, requirement_description='', metric='games_played', min_games=2,
+        )
+        settle_game(self.play_game(players).id)
+        first = UserAchievement.objects.filter(achievement__name='Second Game')
+        self.assertEqual(set(first.values_list('progress_value', 'is_completed')), {(1, False)})
+
+        profile_ids = list(UserProfile.objects.order_by('pk').values_list('pk', flat=True))
+        backfill_chunk(profile_ids[0], profile_ids[-1], names=['Second Game'])
+        self.assertFalse(first.filter(is_completed=True).exists())
+
+        settle_game(self.play_game(players, seed=1).id)
+        self.assertEqual(set(first.values_list('progress_value', 'is_completed')), {(1, True)})
+
+    def test_seeded_achievements_get_their_metrics(self):
+        migration = import_module('game.migrations.0010_achievement_metrics')
+        seeded = Achievement.objects.exclude(name='Sharp Start')
+        self.assertEqual(
+            {achievement.name: (achievement.metric, achievement.min_games)
+             for achievement in seeded.exclude(metric='')},
+            migration.SEEDED_METRICS
+        )
+        self.assertEqual(list(seeded.filter(metric='').values_list('name', flat=True)), ['Lucky Number'])
+        self.assertTrue(all(metric in METRICS for metric, _ in migration.SEEDED_METRICS.values()))
+
+        # The data migration assigns the same metrics to achievements created before 0010
+        seeded.update(metric='', min_games=0)
+        migration.assign_metrics(apps, None)
+        self.assertEqual(
+            dict(seeded.exclude(metric='').values_list('name', 'metric')),
+            {name: metric for name, (metric, _) in migration.SEEDED_METRICS.items()}
+        )
+
+    def test_settling_does_not_read_earlier_games(self):
+        Achievement.objects.update(is_active=False)
+        for metric in ['voting_accuracy', 'distinct_teammates']:
+            Achievement.objects.create(
+                name=f'Endless {metric}', description='', icon='', category='skill', requirement_type='count',
+                requirement_value=1000, requirement_description='', metric=metric,
+            )
+        AchievementIndex.rules('game')
+        self.addCleanup(AchievementIndex.invalidate)
+        players = ['run0', 'run1', 'run2', 'run3']
+        queries = []
+        for seed, names in enumerate([players[:3], players[:2] + players[3:], [players[0]] + players[2:]]):
+            room = self.play_game(names, seed=seed)
+            with CaptureQueriesContext(connection) as captured:
+                settle_game(room.id)
+            # Upserts split by whether a row already exists, so only reads are compared
+            reads = [query['sql'] for query in captured if query['sql'].startswith('SELECT')]
+            queries.append(len(reads))
+            # GameHistory is only read for the game being settled
+            history_reads = [sql for sql in reads if '"game_gamehistory"' in sql]
+            self.assertTrue(all('"game_gamehistory"."room_id" = ' in sql for sql in history_reads))
+        self.assertEqual(len(set(queries)), 1)
+
+        progress = UserAchievement.objects.values_list('user__user__username', 'achievement__metric', 'progress_value')
+        teammates = {username: value for username, metric, value in progress if metric == 'distinct_teammates'}
+        self.assertEqual(teammates, dict.fromkeys(players, 3))
+        accuracy = {username: value for username, metric, value in progress if metric == 'voting_accuracy'}
+        for profile in UserProfile.objects.select_related('user'):
+            history = GameHistory.objects.filter(player=profile)
+            correct = sum(history.values_list('correct_votes', flat=True))
+            total = sum(history.values_list('total_votes', flat=True))
+            self.assertEqual((profile.total_correct_votes, profile.total_votes_cast), (correct, total))
+            self.assertEqual(accuracy.get(profile.user.username, 0), int(correct * 100 / total) if total else 0)
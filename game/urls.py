@@ -24,6 +24,8 @@ urlpatterns = [
     path('api/rooms/create/', views.create_room, name='create_room'),
     path('api/rooms/join-by-code/', views.join_room_by_code, name='join_room_by_code'),
     path('api/rooms/<uuid:room_id>/', views.get_room, name='get_room'),
+    path('api/rooms/<uuid:room_id>/events/', views.room_event_stream, name='room_event_stream'),
+    path('api/rooms/<uuid:room_id>/events/recent/', views.get_game_events, name='get_game_events'),
     path('api/rooms/<uuid:room_id>/join/', views.join_room, name='join_room'),
     path('api/rooms/<uuid:room_id>/leave/', views.leave_room, name='leave_room'),
     
@@ -32,6 +34,8 @@ urlpatterns = [
     path('api/rooms/<uuid:room_id>/start/', views.start_game, name='start_game'),
     path('api/rooms/<uuid:room_id>/next-round/', views.continue_to_next_round, name='continue_to_next_round'),
     path('api/rooms/<uuid:room_id>/round/', views.get_current_round, name='get_current_round'),
+    path('api/rooms/<uuid:room_id>/round/results/', views.get_round_results, name='get_round_results'),
     path('api/rooms/<uuid:room_id>/round/<int:round_number>/submit-answer/', views.submit_answer, name='submit_answer'),
+    path('api/rooms/<uuid:room_id>/round/<int:round_number>/start-voting/', views.start_voting, name='start_voting'),
     path('api/rooms/<uuid:room_id>/round/<int:round_number>/vote/', views.submit_vote, name='submit_vote'),
 ]
\ No newline at end of file
@@ -4,27 +4,30 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from django.utils import timezone
-from django.db.models import Q, Count, Avg, F, Case, When
+from django.db.models import Q, Count, Avg, F, Case, When, Prefetch
 from django.db import transaction
 from rest_framework import status, viewsets, permissions
 from rest_framework.decorators import authentication_classes, permission_classes, api_view, action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.authtoken.models import Token
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 from datetime import timedelta
 import random
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from asgiref.sync import sync_to_async
 import json
 import logging
 from django.views.decorators.http import require_http_methods
 
 from .models import (
     Question, DecoyQuestion, GameRoom, Player, 
-    GameRound, PlayerAnswer, Vote, GameEvent,
+    GameRound, PlayerAnswer, Vote, GameEvent, RoundResult,
     UserProfile, GameHistory, Achievement, UserAchievement
 )
 from .serializers import (
@@ -36,6 +39,21 @@ from .serializers import (
     JoinByCodeSerializer, LeaderboardSerializer, UserStatsSerializer,
     RoomSettingsUpdateSerializer
 )
+from .read_models import (
+    room_detail_queryset, get_room_detail, room_detail, room_summary
+)
+from .realtime import broadcast_room_event
+from .room_codes import release_room_code
+from .lobby import get_lobby_snapshot, lobby_rooms_queryset, refresh_lobby_room
+from .streams import phase_event_stream, public_event_data
+from .engine import RoundEngine, RoundError
+from .journal import journal_events, make_event, record_event
+from .event_storage import event_store
+from .decks import RoomDecks
+from .settlement import schedule_settlement
+from .achievements import evaluate
+from .leaderboards import PERIODS, ROLES, SORTED_BOARDS, around_profile, board_position, get_board
+from .ranking import attach_ranks
 
 
 
@@ -48,6 +66,17 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class LobbyCursorPagination(CursorPagination):
+    """Keyset pagination over the lobby's (status, is_private, created_at) index"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+
+LOBBY_QUERY_PARAMS = ['cursor', 'page_size', 'difficulty_level', 'category_preference', 'has_free_seats']
+
+
 # Enhanced Authentication Views
 @csrf_exempt
 def register_user(request):
@@ -118,17 +147,7 @@ def register_user(request):
             token, created = Token.objects.get_or_create(user=user)
             
             # Check for early adopter achievement
-            user_count = User.objects.count()
-            if user_count <= 100:
-                try:
-                    achievement = Achievement.objects.get(name='Early Adopter')
-                    UserAchievement.objects.get_or_create(
-                        user=profile,
-                        achievement=achievement,
-                        defaults={'progress_value': 1, 'is_completed': True, 'earned_at': timezone.now()}
-                    )
-                except Achievement.DoesNotExist:
-                    pass
+            evaluate([profile.pk], 'registered')
         
         logger.info(f"User registered successfully: {username}")
         
@@ -401,11 +420,12 @@ def leave_room(request, room_id):
         
         if not player:
             return JsonResponse({'error': 'You are not in this room'}, status=404)
+        player_id = player.id
         
         # Create game event
-        GameEvent.objects.create(
-            room=room,
-            event_type='player_left',
+        record_event(
+            room,
+            'player_left',
             player=player,
             data={'nickname': player.nickname}
         )
@@ -420,11 +440,19 @@ def leave_room(request, room_id):
                 room.save()
         elif player.is_host:
             # Last player leaving, delete room
+            room_id = room.id
             room.delete()
+            RoundEngine.discard(room_id)
+            RoomDecks.discard(room_id)
+            broadcast_room_event(room_id, 'room_closed')
+            refresh_lobby_room(room_id)
             return JsonResponse({'success': True, 'message': 'Left room and room deleted', 'room_deleted': True})
         
         player.delete()
+        RoundEngine.players_changed(room.id)
         logger.info(f"Player {user.username} left room {room.name}")
+        notify_room(room, 'player_left', player_id=player_id)
+        refresh_lobby_room(room.id)
         
         return JsonResponse({'success': True, 'message': 'Left room successfully'})
         
@@ -450,6 +478,7 @@ def toggle_ready(request, room_id):
         
         player.is_ready = not player.is_ready
         player.save()
+        notify_room(room, 'player_ready', player_id=player.id, is_ready=player.is_ready)
         
         logger.info(f"Player {user.username} {'ready' if player.is_ready else 'not ready'} in room {room.name}")
         
@@ -500,26 +529,31 @@ def start_game(request, room_id):
         room.current_round = 1
         room.save()
         
-        # Start first round
-        try:
-            start_round(room, 1)
-        except ValueError as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-        # Create game event
-        GameEvent.objects.create(
-            room=room,
-            event_type='game_started',
+        # Create game event; recorded first so the log opens the game before round 1
+        record_event(
+            room,
+            'game_started',
             data={
                 'player_count': room.player_count,
                 'started_by': request.user.username
-            }
+            },
+            flush=True
         )
+        
+        # Plan all rounds and open the first
+        try:
+            game_round = plan_game(room)
+        except ValueError as e:
+            transaction.set_rollback(True)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        notify_room(room, 'game_started', round=round_phase_data(game_round))
+        refresh_lobby_room(room.id)
     
     return Response({
         'success': True,
         'message': 'Game started successfully!',
-        'room': GameRoomSerializer(room).data
+        'room': GameRoomSerializer(get_room_detail(room.id)).data
     })
 
 @csrf_exempt
@@ -546,18 +580,11 @@ def join_room_by_code(request):
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    room_code = serializer.validated_data['room_code'].upper()
+    # Resolved and admission-checked once by the serializer
+    room = serializer.validated_data['room']
     nickname = serializer.validated_data['nickname']
     password = serializer.validated_data.get('password', '')
     
-    try:
-        room = GameRoom.objects.get(room_code=room_code)
-    except GameRoom.DoesNotExist:
-        return Response({'error': 'Room not found'}, status=status.HTTP_404_NOT_FOUND)
-    
-    if not room.can_join():
-        return Response({'error': 'Cannot join this room'}, status=status.HTTP_400_BAD_REQUEST)
-    
     # Check password ONLY for private rooms with password
     if room.is_private and room.password and room.password != password:
         return Response({'error': 'Invalid room password'}, status=status.HTTP_403_FORBIDDEN)
@@ -567,11 +594,14 @@ def join_room_by_code(request):
     if existing_player:
         if existing_player.can_rejoin():
             existing_player.reconnect()
+            RoundEngine.players_changed(room.id)
+            notify_room(room, 'player_joined', player_id=existing_player.id)
+            refresh_lobby_room(room.id)
             return Response({
                 'success': True,
                 'message': 'Rejoined room successfully',
                 'player': PlayerSerializer(existing_player).data,
-                'room': GameRoomSerializer(room).data
+                'room': GameRoomSerializer(get_room_detail(room.id)).data
             })
         else:
             return Response({'error': 'You are already in this room'}, status=status.HTTP_400_BAD_REQUEST)
@@ -584,18 +614,20 @@ def join_room_by_code(request):
     )
     
     # Create game event
-    GameEvent.objects.create(
-        room=room,
-        event_type='player_joined',
+    record_event(
+        room,
+        'player_joined',
         player=player,
         data={'nickname': nickname}
     )
+    notify_room(room, 'player_joined', player_id=player.id)
+    refresh_lobby_room(room.id)
     
     return Response({
         'success': True,
         'message': 'Joined room successfully',
         'player': PlayerSerializer(player).data,
-        'room': GameRoomSerializer(room).data
+        'room': GameRoomSerializer(get_room_detail(room.id)).data
     }, status=status.HTTP_201_CREATED)
 
 @csrf_exempt
@@ -636,8 +668,9 @@ def create_room(request):
         )
         
         # Update profile stats
-        user.profile.games_hosted += 1
-        user.profile.save()
+        UserProfile.objects.filter(pk=user.profile.pk).update(games_hosted=F('games_hosted') + 1)
+        evaluate([user.profile.pk], 'hosted')
+        refresh_lobby_room(room.id)
         
         logger.info(f"Room created by {user.username}: {room.name}")
         
@@ -662,19 +695,64 @@ def create_room(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def leaderboard(request):
-    """Get global leaderboard"""
+    """Get global leaderboard.
+
+    With ``period`` (day, week or all) and optionally ``role`` (all,
+    imposter or detective), returns the cached top players by points
+    earned in that window instead of the live profile ordering.
+    ``type=my_rank`` and ``type=around_me`` place the signed-in player on
+    the ``board`` (score or wins) sorted set, the latter with ``radius``
+    players either side.
+    """
     leaderboard_type = request.query_params.get('type', 'score')
     
+    if leaderboard_type in ('my_rank', 'around_me'):
+        if not request.user.is_authenticated:
+            return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+        board = request.query_params.get('board', 'score')
+        if board not in SORTED_BOARDS:
+            return Response(
+                {'error': f"board must be one of {', '.join(SORTED_BOARDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        profile = get_object_or_404(UserProfile, user=request.user)
+        data = {'type': leaderboard_type, 'board': board, 'me': board_position(board, profile.pk)}
+        if leaderboard_type == 'around_me':
+            try:
+                radius = min(max(int(request.query_params.get('radius', 5)), 0), 50)
+            except ValueError:
+                return Response({'error': 'radius must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+            data['leaderboard'] = around_profile(board, profile.pk, radius)
+        return Response(data)
+    
+    period = request.query_params.get('period')
+    role = request.query_params.get('role', 'all')
+    if period is not None or 'role' in request.query_params:
+        period = period or 'all'
+        if period not in PERIODS or role not in ROLES:
+            return Response(
+                {'error': f"period must be one of {', '.join(PERIODS)} and role one of {', '.join(ROLES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            'type': 'points',
+            'period': period,
+            'role': role,
+            'leaderboard': get_board(period, role)
+        })
+    
+    # Ranks are counted on the score board in one batch, so the page is a single query
+    profiles = UserProfile.objects.select_related('user')
     if leaderboard_type == 'score':
-        profiles = UserProfile.objects.filter(total_games__gte=5).order_by('-total_score')[:100]
+        profiles = profiles.filter(total_games__gte=5).order_by('-total_score')[:100]
     elif leaderboard_type == 'wins':
-        profiles = UserProfile.objects.filter(total_games__gte=5).order_by('-total_wins')[:100]
+        profiles = profiles.filter(total_games__gte=5).order_by('-total_wins')[:100]
     elif leaderboard_type == 'win_rate':
-        profiles = UserProfile.objects.filter(total_games__gte=10).order_by('-win_rate')[:100]
+        profiles = profiles.filter(total_games__gte=10).order_by('-win_rate')[:100]
     else:
-        profiles = UserProfile.objects.filter(total_games__gte=5).order_by('-total_score')[:100]
+        profiles = profiles.filter(total_games__gte=5).order_by('-total_score')[:100]
     
-    serializer = LeaderboardSerializer(profiles, many=True)
+    serializer = LeaderboardSerializer(attach_ranks(list(profiles)), many=True)
     return Response({
         'type': leaderboard_type,
         'leaderboard': serializer.data
@@ -695,113 +773,89 @@ def check_auth(request):
     return None
 
 
-@csrf_exempt
-@require_http_methods(["GET"])
+@api_view(['GET'])
+@permission_classes([AllowAny])
 def list_rooms(request):
-    """List all available game rooms"""
-    try:
-        show_private = request.GET.get('private', 'false').lower() == 'true'
-        
-        if show_private:
-            rooms = GameRoom.objects.filter(
-                status__in=['waiting', 'in_progress']
-            ).order_by('-created_at')
-        else:
-            rooms = GameRoom.objects.filter(
-                status__in=['waiting', 'in_progress'],
-                is_private=False
-            ).order_by('-created_at')
-        
-        rooms_data = []
-        for room in rooms:
-            rooms_data.append({
-                'id': str(room.id),
-                'name': room.name,
-                'description': room.description or '',
-                'host': {
-                    'username': room.host.username,
-                    'avatar': room.host.profile.avatar if hasattr(room.host, 'profile') else 'detective_1'
-                },
-                'is_private': room.is_private,
-                'room_code': room.room_code,
-                'max_players': room.max_players,
-                'total_rounds': room.total_rounds,
-                'difficulty_level': room.difficulty_level,
-                'category_preference': room.category_preference or '',
-                'discussion_time': room.discussion_time,
-                'voting_time': room.voting_time,
-                'status': room.status,
-                'player_count': room.player_count,
-                'can_join': room.can_join(),
-                'has_password': bool(room.password),
-            })
-        
-        return JsonResponse(rooms_data, safe=False)
-        
-    except Exception as e:
-        logger.error(f"List rooms error: {str(e)}")
-        return JsonResponse({'error': 'Failed to load rooms'}, status=500)
+    """List available game rooms.
 
+    Without paging or filter parameters this returns the full lobby as a
+    plain array from the cached snapshot. With any of ``cursor``,
+    ``page_size``, ``difficulty_level``, ``category_preference`` or
+    ``has_free_seats`` it returns a cursor-paginated page instead.
+    """
+    params = request.query_params
+    show_private = params.get('private', 'false').lower() == 'true'
+    
+    if not any(param in params for param in LOBBY_QUERY_PARAMS):
+        try:
+            rooms_data = get_lobby_snapshot()
+            if not show_private:
+                rooms_data = [room for room in rooms_data if not room['is_private']]
+            return Response(rooms_data)
+        except Exception as e:
+            logger.error(f"List rooms error: {str(e)}")
+            return Response({'error': 'Failed to load rooms'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    rooms = lobby_rooms_queryset()
+    if not show_private:
+        rooms = rooms.filter(is_private=False)
+    if params.get('difficulty_level'):
+        rooms = rooms.filter(difficulty_level=params['difficulty_level'])
+    if params.get('category_preference'):
+        rooms = rooms.filter(category_preference=params['category_preference'])
+    if params.get('has_free_seats', 'false').lower() == 'true':
+        rooms = rooms.filter(status='waiting', all_player_count__lt=F('max_players'))
+    
+    paginator = LobbyCursorPagination()
+    page = paginator.paginate_queryset(rooms, request)
+    return paginator.get_paginated_response([room_summary(room) for room in page])
+
+
+
+def get_stream_user(request):
+    """Resolve the user of an event stream from the header or ``?token=``"""
+    user = check_auth(request)
+    if user:
+        return user
+    token_key = request.GET.get('token')
+    if token_key:
+        try:
+            return Token.objects.select_related('user').get(key=token_key).user
+        except Token.DoesNotExist:
+            return None
+    return None
 
 
-@csrf_exempt
-@require_http_methods(["GET"])
-def get_room(request, room_id):
-    """Get room details"""
+async def room_event_stream(request, room_id):
+    """Stream round phase transitions as Server-Sent Events.
+
+    EventSource clients resume with the ``Last-Event-ID`` header (or the
+    ``last_event_id`` query parameter) instead of refetching the room.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    user = await sync_to_async(get_stream_user)(request)
+    if not user:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    is_member = await Player.objects.filter(user=user, room_id=room_id).aexists()
+    if not is_member:
+        return JsonResponse({'error': 'You are not in this room'}, status=403)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
     try:
-        room = get_object_or_404(GameRoom, id=room_id)
-        
-        players = []
-        for player in room.players.all():
-            players.append({
-                'id': player.id,
-                'nickname': player.nickname,
-                'is_host': player.is_host,
-                'is_ready': player.is_ready,
-                'is_connected': player.is_connected,
-                'score': player.score,
-                'user': {
-                    'id': player.user.id,
-                    'username': player.user.username,
-                    'profile': {
-                        'avatar': player.user.profile.avatar if hasattr(player.user, 'profile') else 'detective_1'
-                    }
-                }
-            })
-        
-        room_data = {
-            'id': str(room.id),
-            'name': room.name,
-            'description': room.description or '',
-            'host': {
-                'id': room.host.id,
-                'username': room.host.username,
-                'avatar': room.host.profile.avatar if hasattr(room.host, 'profile') else 'detective_1'
-            },
-            'is_private': room.is_private,
-            'room_code': room.room_code,
-            'max_players': room.max_players,
-            'min_players': room.min_players,
-            'total_rounds': room.total_rounds,
-            'difficulty_level': room.difficulty_level,
-            'category_preference': room.category_preference or '',
-            'discussion_time': room.discussion_time,
-            'voting_time': room.voting_time,
-            'status': room.status,
-            'current_round': room.current_round,
-            'player_count': room.player_count,
-            'players': players,
-            'created_at': room.created_at.isoformat(),
-            'can_join': room.can_join(),
-            'can_start': room.can_start(),
-            'has_password': bool(room.password),
-        }
-        
-        return JsonResponse(room_data)
-        
-    except Exception as e:
-        logger.error(f"Get room error: {str(e)}")
-        return JsonResponse({'error': 'Room not found'}, status=404)
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid Last-Event-ID'}, status=400)
+
+    response = StreamingHttpResponse(
+        phase_event_stream(room_id, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @api_view(['POST'])
@@ -829,6 +883,9 @@ def join_room(request, room_id):
     if existing_player:
         if existing_player.can_rejoin():
             existing_player.reconnect()
+            RoundEngine.players_changed(room.id)
+            notify_room(room, 'player_joined', player_id=existing_player.id)
+            refresh_lobby_room(room.id)
             return Response({
                 'success': True,
                 'message': 'Rejoined room successfully',
@@ -845,62 +902,71 @@ def join_room(request, room_id):
     )
     
     # Create game event
-    GameEvent.objects.create(
-        room=room,
-        event_type='player_joined',
+    record_event(
+        room,
+        'player_joined',
         player=player,
         data={'nickname': nickname}
     )
+    notify_room(room, 'player_joined', player_id=player.id)
+    refresh_lobby_room(room.id)
     
     return Response(PlayerSerializer(player).data, status=status.HTTP_201_CREATED)
 
 
+def notify_room(room, event, **extra):
+    """Record a room change: bump its state version and broadcast the new state"""
+    room.bump_state_version()
+    broadcast_room_event(room.id, event, room=room_detail(get_room_detail(room.id)), **extra)
+
+
+def room_etag(room_id, state_version):
+    return quote_etag(f'room-{room_id}-v{state_version}')
+
+
+def round_etag(round_id, state_version, user_id):
+    # The round payload differs per player (imposter question, player_info)
+    return quote_etag(f'round-{round_id}-v{state_version}-u{user_id}')
+
+
+def etag_matches(request, etag):
+    """Whether the client's If-None-Match already names this representation"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in etags
+
+
+def with_etag(response, etag, vary=None):
+    """Let clients revalidate instead of refetching: cache but always ask"""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    if vary:
+        patch_vary_headers(response, vary)
+    return response
+
+
+def round_phase_data(game_round):
+    """Public part of a round; questions stay behind get_current_round"""
+    return {
+        'round_number': game_round.round_number,
+        'status': game_round.status,
+    }
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_room(request, room_id):
-    """Get room details"""
+    """Get room details; answers If-None-Match with 304 from the version alone"""
     try:
-        room = get_object_or_404(GameRoom, id=room_id)
+        if request.META.get('HTTP_IF_NONE_MATCH'):
+            state_version = GameRoom.objects.filter(id=room_id).values_list('state_version', flat=True).first()
+            if state_version is not None and etag_matches(request, room_etag(room_id, state_version)):
+                return with_etag(HttpResponseNotModified(), room_etag(room_id, state_version))
         
-        players = []
-        for player in room.players.all():
-            players.append({
-                'id': player.id,
-                'nickname': player.nickname,
-                'is_host': player.is_host,
-                'is_ready': player.is_ready,
-                'is_connected': player.is_connected,
-                'score': player.score,
-                'avatar': player.user.profile.avatar if hasattr(player.user, 'profile') else 'detective_1'
-            })
-        
-        room_data = {
-            'id': str(room.id),
-            'name': room.name,
-            'description': room.description or '',
-            'host': {
-                'username': room.host.username,
-                'avatar': room.host.profile.avatar if hasattr(room.host, 'profile') else 'detective_1'
-            },
-            'is_private': room.is_private,
-            'room_code': room.room_code,
-            'max_players': room.max_players,
-            'min_players': room.min_players,
-            'total_rounds': room.total_rounds,
-            'difficulty_level': room.difficulty_level,
-            'category_preference': room.category_preference or '',
-            'discussion_time': room.discussion_time,
-            'voting_time': room.voting_time,
-            'status': room.status,
-            'current_round': room.current_round,
-            'player_count': room.player_count,
-            'players': players,
-            'created_at': room.created_at.isoformat(),
-            'can_join': room.can_join(),
-            'can_start': room.can_start()
-        }
-        
-        return JsonResponse(room_data)
+        room = get_object_or_404(room_detail_queryset(), id=room_id)
+        return with_etag(JsonResponse(room_detail(room)), room_etag(room.id, room.state_version))
         
     except Exception as e:
         logger.error(f"Get room error: {str(e)}")
@@ -929,13 +995,15 @@ def update_room_settings(request, room_id):
         room.save()
         
         # Create game event
-        GameEvent.objects.create(
-            room=room,
-            event_type='settings_updated',
+        record_event(
+            room,
+            'settings_updated',
             data={'updated_fields': list(serializer.validated_data.keys())}
         )
+        notify_room(room, 'settings_updated')
+        refresh_lobby_room(room.id)
         
-        return Response(GameRoomSerializer(room).data)
+        return Response(GameRoomSerializer(get_room_detail(room.id)).data)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -945,25 +1013,8 @@ def update_room_settings(request, room_id):
 
 def start_round(room, round_number):
     """Start a new round (enhanced with user preferences)"""
-    # Get questions based on room preferences
-    question_filter = {'is_active': True}
-    if room.category_preference:
-        question_filter['category'] = room.category_preference
-    
-    if room.difficulty_level != 'mixed':
-        difficulty_map = {
-            'easy': 1.5,
-            'medium': 2.5,
-            'hard': 3.5,
-            'expert': 4.5
-        }
-        target_difficulty = difficulty_map.get(room.difficulty_level, 2.5)
-        # Find questions within 0.5 of target difficulty
-        question_filter['difficulty__gte'] = target_difficulty - 0.5
-        question_filter['difficulty__lte'] = target_difficulty + 0.5
-    
-    question = Question.objects.filter(**question_filter).order_by('?').first()
-    decoy_question = DecoyQuestion.objects.filter(is_active=True).order_by('?').first()
+    # Deal from the room's shuffled decks so questions don't repeat within a game
+    question, decoy_question = RoomDecks.deal(room)
     
     if not question or not decoy_question:
         raise ValueError("No questions available")
@@ -983,59 +1034,96 @@ def start_round(room, round_number):
     )
     
     # Create game event
-    GameEvent.objects.create(
-        room=room,
-        event_type='round_started',
+    record_event(
+        room,
+        'round_started',
         data={
             'round_number': round_number,
             'question_id': question.id,
             'question_category': question.category,
             'imposter_id': imposter.id
-        }
+        },
+        flush=True
     )
     
     return game_round
 
 
-# Keep existing game flow methods (get_current_round, submit_answer, etc.)
-# but enhance them with proper user authentication and statistics tracking
+def record_round_started(game_round):
+    journal_events([make_event(
+        game_round.room_id,
+        'round_started',
+        data={
+            'round_number': game_round.round_number,
+            'question_id': game_round.question_id,
+            'question_category': game_round.question.category,
+            'imposter_id': game_round.imposter_id
+        }
+    )], flush=True)
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_current_round(request, room_id):
-    """Get current round information"""
-    room = get_object_or_404(GameRoom, id=room_id)
-    
-    if room.current_round == 0:
-        return Response({'error': 'Game has not started'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Verify user is in the room
-    try:
-        player = Player.objects.get(user=request.user, room=room)
-    except Player.DoesNotExist:
-        return Response({'error': 'You are not in this room'}, status=status.HTTP_403_FORBIDDEN)
-    
-    game_round = get_object_or_404(GameRound, room=room, round_number=room.current_round)
-    
-    # Determine if player is imposter and get appropriate question
-    is_imposter = (player == game_round.imposter)
-    player_question = game_round.decoy_question if is_imposter else game_round.question
-    
-    data = GameRoundSerializer(game_round).data
-    data['is_imposter'] = is_imposter
-    data['player_question'] = QuestionSerializer(player_question).data if player_question else None
-    data['player_info'] = PlayerSerializer(player).data
-    
-    return Response(data)
 
+def plan_game(room):
+    """Create every round of the game up front and open the first one.
 
+    Questions are dealt from the room's decks and the imposter role rotates
+    through the connected players in a shuffled order. Later rounds wait in
+    ``setup`` until ``advance_round`` opens them.
+    """
+    connected_players = list(room.players.filter(is_connected=True))
+    random.shuffle(connected_players)
+    
+    planned = []
+    for round_number in range(1, room.total_rounds + 1):
+        question, decoy_question = RoomDecks.deal(room)
+        if not question or not decoy_question:
+            raise ValueError("No questions available")
+        planned.append(GameRound(
+            room=room,
+            round_number=round_number,
+            question=question,
+            decoy_question=decoy_question,
+            imposter=connected_players[(round_number - 1) % len(connected_players)],
+            status='answering' if round_number == 1 else 'setup'
+        ))
+    RoomDecks.discard(room.id)
+    
+    GameRound.objects.bulk_create(planned)
+    first_round = GameRound.objects.select_related('question').get(room=room, round_number=1)
+    record_round_started(first_round)
+    return first_round
+
+
+def advance_round(room, round_number):
+    """Open a planned round, falling back to building it for unplanned games"""
+    game_round = (GameRound.objects.select_related('question', 'imposter')
+                  .filter(room=room, round_number=round_number, status='setup').first())
+    if game_round is None:
+        return start_round(room, round_number)
+    
+    if not game_round.imposter.is_connected:
+        # The planned imposter dropped out; hand the role to someone still here
+        connected_players = list(room.players.filter(is_connected=True))
+        if connected_players:
+            game_round.imposter = random.choice(connected_players)
+    game_round.status = 'answering'
+    game_round.started_at = timezone.now()
+    game_round.save(update_fields=['status', 'started_at', 'imposter'])
+    record_round_started(game_round)
+    return game_round
 
 
+# Keep existing game flow methods (get_current_round, submit_answer, etc.)
+# but enhance them with proper user authentication and statistics tracking
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_current_round(request, room_id):
     """Get current round information for the authenticated player"""
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        etag = current_round_etag(room_id, request.user.id)
+        if etag is not None and etag_matches(request, etag):
+            return with_etag(HttpResponseNotModified(), etag, vary=['Authorization'])
+    
     room = get_object_or_404(GameRoom, id=room_id)
     
     if room.current_round == 0:
@@ -1057,178 +1145,145 @@ def get_current_round(request, room_id):
     data['is_imposter'] = is_imposter
     data['player_question'] = QuestionSerializer(player_question).data if player_question else None
     data['player_info'] = PlayerSerializer(player).data
+    data['state_version'] = game_round.state_version
+    
+    # Answers and votes of the running phase live in the round engine
+    state = RoundEngine.get(room_id)
+    if state is not None and state.is_current(game_round.id, game_round.state_version):
+        state.overlay(data)
     
-    return Response(data)
+    return with_etag(
+        Response(data),
+        round_etag(game_round.id, data['state_version'], request.user.id),
+        vary=['Authorization']
+    )
+
+
+def current_round_etag(room_id, user_id):
+    """ETag of a player's view of the running round, or None if they aren't in the room.
+
+    One query checks membership and reads the stored version; a state this
+    process holds only supplies its newer in-memory version while it still
+    matches that row, so a copy another process has moved past never
+    validates an old ETag.
+    """
+    current = (GameRound.objects
+               .filter(room_id=room_id, round_number=F('room__current_round'), room__players__user_id=user_id)
+               .values_list('id', 'state_version').first())
+    if current is None:
+        return None
+    round_id, version = current
+    state = RoundEngine.get(room_id)
+    if state is not None and state.is_current(round_id, version):
+        version = state.version
+    return round_etag(round_id, version, user_id)
+
+
+def check_round_number(state, round_number):
+    """Reject actions aimed at a round other than the room's current one"""
+    if round_number is not None and round_number != state.round_number:
+        raise RoundError('Round is no longer active')
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def start_voting(request, room_id):
+def start_voting(request, room_id, round_number=None):
     """Start voting phase"""
-    room = get_object_or_404(GameRoom, id=room_id)
-    game_round = get_object_or_404(GameRound, room=room, round_number=room.current_round)
-    
-    if game_round.status != 'discussion':
-        return Response({'error': 'Not in discussion phase'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    game_round.status = 'voting'
-    game_round.voting_started_at = timezone.now()
-    game_round.save()
+    try:
+        state = RoundEngine.for_room(room_id)
+        check_round_number(state, round_number)
+        state.player_for_user(request.user.id)
+        state.start_voting()
+    except RoundError as e:
+        return Response({'error': str(e)}, status=e.status_code)
     
-    GameEvent.objects.create(
-        room=room,
-        event_type='voting_started',
-        data={}
-    )
+    notify_room(get_object_or_404(GameRoom, id=room_id), 'phase_changed',
+                round={'round_number': state.round_number, 'status': 'voting'})
     
     return Response({'success': True})
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def submit_vote(request, room_id):
+def submit_vote(request, room_id, round_number=None):
     """Submit vote for who is the imposter"""
+    serializer = SubmitVoteSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
     try:
-        room = get_object_or_404(GameRoom, id=room_id)
-        game_round = get_object_or_404(GameRound, room=room, round_number=room.current_round)
-        
-        if game_round.status != 'voting':
-            return Response({'error': 'Not in voting phase'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Get voter from authenticated user
-        try:
-            voter = Player.objects.get(user=request.user, room=room)
-        except Player.DoesNotExist:
-            return Response({'error': 'Player not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        serializer = SubmitVoteSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        
+        state = RoundEngine.for_room(room_id)
+        check_round_number(state, round_number)
+        voting_complete = state.submit_vote(request.user.id, serializer.validated_data['accused_player_id'])
+    except RoundError as e:
+        return Response({'error': str(e)}, status=e.status_code)
+    
+    if voting_complete:
+        # Votes are persisted; settle the round and let the next one load fresh
+        game_round = GameRound.objects.select_related('room', 'imposter').get(pk=state.round_id)
         try:
-            accused = Player.objects.get(id=serializer.validated_data['accused_player_id'], room=room)
-        except Player.DoesNotExist:
-            return Response({'error': 'Accused player not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        if voter == accused:
-            return Response({'error': 'Cannot vote for yourself'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create or update vote
-        vote, created = Vote.objects.update_or_create(
-            round=game_round,
-            voter=voter,
-            defaults={'accused': accused}
-        )
-        
-        # Mark player as having voted
-        voter.has_voted = True
-        voter.save()
-        
-        # Create game event
-        GameEvent.objects.create(
-            room=room,
-            event_type='vote_submitted',
-            player=voter,
-            data={'accused_id': accused.id}
-        )
-        
-        # Check if all players have voted
-        total_players = room.players.filter(is_connected=True).count()
-        voted_players = game_round.votes.count()
-        
-        if voted_players >= total_players:
-            # Calculate results and end round
-            results = end_round(game_round)
-            return Response({
-                'success': True, 
-                'vote_id': vote.id,
-                'voting_complete': True,
-                'results': results
-            })
-        
-        return Response({'success': True, 'vote_id': vote.id, 'voting_complete': False})
-    except Exception as e:
-        # Ensure we always return JSON even in case of unexpected errors
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            with transaction.atomic():
+                results = end_round(game_round)
+        finally:
+            # Also on failure: the closed state must not outlive it, so the
+            # round reloads in voting and the next vote settles it again
+            RoundEngine.discard(room_id)
+        return Response({
+            'success': True,
+            'voting_complete': True,
+            'results': results
+        })
+    
+    return Response({'success': True, 'voting_complete': False})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def submit_answer(request, room_id):
+def submit_answer(request, room_id, round_number=None):
     """Submit answer for current round (authenticated user)"""
-    room = get_object_or_404(GameRoom, id=room_id)
-    game_round = get_object_or_404(GameRound, room=room, round_number=room.current_round) 
-       
-    if game_round.status != 'answering':
-        return Response({'error': 'Not in answering phase'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Get player from authenticated user
-    try:
-        player = Player.objects.get(user=request.user, room=room)
-    except Player.DoesNotExist:
-        return Response({'error': 'Player not found'}, status=status.HTTP_404_NOT_FOUND)
-    
     serializer = SubmitAnswerSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    # Create or update answer
-    answer, _ = PlayerAnswer.objects.update_or_create(
-        round=game_round,
-        player=player,
-        defaults={'answer': serializer.validated_data['answer']}
-    )
-    
-    # Mark player as having submitted answer
-    player.has_submitted_answer = True
-    player.save()
-    
-    # Create game event
-    GameEvent.objects.create(
-        room=room,
-        event_type='answer_submitted',
-        player=player,
-        data={'answer': answer.answer}
-    )
-    
-    # Check if all players have answered
-    total_players = room.players.filter(is_connected=True).count()
-    answered_players = game_round.answers.count()
+    try:
+        state = RoundEngine.for_room(room_id)
+        check_round_number(state, round_number)
+        answering_complete = state.submit_answer(request.user.id, serializer.validated_data['answer'])
+    except RoundError as e:
+        return Response({'error': str(e)}, status=e.status_code)
     
-    if answered_players >= total_players:
+    if answering_complete:
         # Move to discussion phase
-        game_round.status = 'discussion'
-        game_round.discussion_started_at = timezone.now()
-        game_round.save()
-        
-        GameEvent.objects.create(
-            room=room,
-            event_type='discussion_started',
-            data={
-                'total_answers': answered_players,
-                'question_text': game_round.question.text,
-                'decoy_question_text': game_round.decoy_question.text
-            }
-        )
+        notify_room(get_object_or_404(GameRoom, id=room_id), 'phase_changed',
+                    round={'round_number': state.round_number, 'status': 'discussion'})
     
-    return Response({'success': True, 'answer_id': answer.id})
+    return Response({'success': True, 'discussion_started': answering_complete})
 
 
 def end_round(game_round):
-    """End the current round and calculate results"""
+    """End the current round and calculate results.
+
+    Votes are read in one query and scores are written with one
+    ``bulk_update``, so settlement cost does not grow with the room.
+    """
     room = game_round.room
+    imposter_id = game_round.imposter_id
     
     # Calculate vote results
     vote_counts = {}
     voter_choices = {}  # Track who voted for whom
+    nicknames = {}
     
-    for vote in game_round.votes.all():
-        accused_id = vote.accused.id
+    votes = game_round.votes.order_by('id').values_list(
+        'voter_id', 'voter__nickname', 'accused_id', 'accused__nickname'
+    )
+    for voter_id, voter_nickname, accused_id, accused_nickname in votes:
         vote_counts[accused_id] = vote_counts.get(accused_id, 0) + 1
-        voter_choices[vote.voter.id] = {
-            'voter_nickname': vote.voter.nickname,
+        voter_choices[voter_id] = {
+            'voter_nickname': voter_nickname,
             'accused_id': accused_id,
-            'accused_nickname': vote.accused.nickname
+            'accused_nickname': accused_nickname
         }
+        nicknames[accused_id] = accused_nickname
     
     # Find player with most votes
     most_voted_player = None
@@ -1236,128 +1291,170 @@ def end_round(game_round):
     
     if vote_counts:
         most_voted_id = max(vote_counts.keys(), key=lambda k: vote_counts[k])
-        most_voted_player = Player.objects.get(id=most_voted_id)
-        imposter_caught = (most_voted_player == game_round.imposter)
+        most_voted_player = {'id': most_voted_id, 'nickname': nicknames[most_voted_id]}
+        imposter_caught = (most_voted_id == imposter_id)
         
         # Advanced scoring system
+        scored_players = []
         for player in room.players.filter(is_connected=True):
-            if player == game_round.imposter:
+            points = 0
+            if player.id == imposter_id:
                 # Imposter scoring
                 if not imposter_caught:
-                    player.score += 3  # Bonus for successful deception
+                    points = 3  # Bonus for successful deception
                 # No penalty for being caught
-            else:
+            elif player.id in voter_choices:
                 # Detective scoring
-                player_vote = game_round.votes.filter(voter=player).first()
-                if player_vote:
-                    if imposter_caught and player_vote.accused == game_round.imposter:
-                        # Correctly voted for imposter
-                        player.score += 2
-                    elif not imposter_caught and player_vote.accused != game_round.imposter:
-                        # Correctly didn't vote for imposter (but imposter won)
-                        player.score += 1
-                    # No points for incorrect votes
-            player.save()
+                accused_id = voter_choices[player.id]['accused_id']
+                if imposter_caught and accused_id == imposter_id:
+                    # Correctly voted for imposter
+                    points = 2
+                elif not imposter_caught and accused_id != imposter_id:
+                    # Correctly didn't vote for imposter (but imposter won)
+                    points = 1
+                # No points for incorrect votes
+            if points:
+                player.score += points
+                scored_players.append(player)
+        Player.objects.bulk_update(scored_players, ['score'])
     
     # Update round status
     game_round.status = 'results'
     game_round.finished_at = timezone.now()
-    game_round.save()
+    game_round.save(update_fields=['status', 'finished_at'])
+    RoundResult.objects.create(
+        round=game_round,
+        imposter_id=imposter_id,
+        imposter_caught=imposter_caught,
+        most_voted_player_id=most_voted_player['id'] if most_voted_player else None,
+        vote_counts=vote_counts,
+        voter_choices=voter_choices,
+        total_votes=len(voter_choices)
+    )
     
     # Create detailed game event with results
-    GameEvent.objects.create(
-        room=room,
-        event_type='round_ended',
+    record_event(
+        room,
+        'round_ended',
         data={
             'round_number': game_round.round_number,
-            'imposter_id': game_round.imposter.id,
+            'imposter_id': imposter_id,
             'imposter_nickname': game_round.imposter.nickname,
             'imposter_caught': imposter_caught,
-            'most_voted_player_id': most_voted_player.id if most_voted_player else None,
-            'most_voted_player_nickname': most_voted_player.nickname if most_voted_player else None,
+            'most_voted_player_id': most_voted_player['id'] if most_voted_player else None,
+            'most_voted_player_nickname': most_voted_player['nickname'] if most_voted_player else None,
             'vote_counts': vote_counts,
             'voter_choices': voter_choices,
             'total_votes': len(voter_choices)
-        }
+        },
+        flush=True
     )
+    notify_room(room, 'phase_changed', round=round_phase_data(game_round), results={
+        'imposter_id': imposter_id,
+        'imposter_caught': imposter_caught,
+        'most_voted_player_id': most_voted_player['id'] if most_voted_player else None,
+        'vote_counts': vote_counts,
+    })
     
     # Wait 10 seconds in results phase, then continue
     # This will be handled by frontend polling
     
     return {
         'imposter_caught': imposter_caught,
-        'imposter': game_round.imposter,
+        'imposter': {'id': imposter_id, 'nickname': game_round.imposter.nickname},
         'most_voted_player': most_voted_player,
         'vote_counts': vote_counts,
         'voter_choices': voter_choices
     }
 
 
+def finish_game(room):
+    """Close a room whose last round is settled; returns the response payload"""
+    with transaction.atomic():
+        room.status = 'finished'
+        room.finished_at = timezone.now()
+        room.save(update_fields=['status', 'finished_at', 'last_activity'])
+        release_room_code(room)
+        
+        final_scores = dict(room.players.values_list('nickname', 'score'))
+        record_event(
+            room,
+            'game_ended',
+            data={'final_scores': final_scores},
+            flush=True
+        )
+        schedule_settlement(room.id)
+    RoomDecks.discard(room.id)
+    RoundEngine.discard(room.id)
+    notify_room(room, 'game_ended', final_scores=final_scores)
+    refresh_lobby_room(room.id)
+    
+    return {'game_ended': True, 'final_scores': final_scores}
+
+
+def transition_round(room):
+    """Move a room past its settled round; returns the response payload.
+
+    Either ends the game (after the last round, or once nobody is still
+    connected to play the next one) or opens the next planned round.
+    Participation is reset for the whole room in one UPDATE (answers and
+    votes are per-round rows, so only the players' activity stamp needs
+    refreshing).
+    """
+    if room.current_round >= room.total_rounds or not room.players.filter(is_connected=True).exists():
+        return finish_game(room)
+    
+    with transaction.atomic():
+        room.current_round += 1
+        room.save(update_fields=['current_round', 'last_activity'])
+        room.players.filter(is_connected=True).update(last_seen=timezone.now())
+        game_round = advance_round(room, room.current_round)
+    RoundEngine.discard(room.id)
+    notify_room(room, 'round_started', round=round_phase_data(game_round))
+    
+    return {'next_round': room.current_round}
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def continue_to_next_round(request, room_id):
     """Continue from results to next round or end game"""
-    room = get_object_or_404(GameRoom, id=room_id)
+    # Room and its current round in one query
+    current_round = (GameRound.objects.select_related('room')
+                     .filter(room_id=room_id, round_number=F('room__current_round'))
+                     .first())
+    if current_round is None:
+        room = get_object_or_404(GameRoom, id=room_id)
+        if room.status != 'in_progress':
+            return Response({'error': 'Game is not in progress'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'error': 'Current round not found'}, status=status.HTTP_404_NOT_FOUND)
+    room = current_round.room
     
     # Ensure we're in the results phase before continuing
     if room.status != 'in_progress':
         return Response({'error': 'Game is not in progress'}, status=status.HTTP_400_BAD_REQUEST)
+    if current_round.status != 'results':
+        return Response({'error': 'Current round is not in results phase'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get the current round to make sure it's in results phase
-    try:
-        current_round = GameRound.objects.get(room=room, round_number=room.current_round)
-        if current_round.status != 'results':
-            return Response({'error': 'Current round is not in results phase'}, status=status.HTTP_400_BAD_REQUEST)
-    except GameRound.DoesNotExist:
-        return Response({'error': 'Current round not found'}, status=status.HTTP_404_NOT_FOUND)
-    
-    if room.current_round >= room.total_rounds:
-        # End game
-        room.status = 'finished'
-        room.finished_at = timezone.now()
-        room.save()
-        
-        GameEvent.objects.create(
-            room=room,
-            event_type='game_ended',
-            data={'final_scores': {p.nickname: p.score for p in room.players.all()}}
-        )
-        
-        return Response({'game_ended': True, 'final_scores': {p.nickname: p.score for p in room.players.all()}})
-    else:
-        # Start next round
-        room.current_round += 1
-        room.save()
-
-        # Reset player states for the new round
-        for player in room.players.all():
-            player.has_submitted_answer = False
-            player.has_voted = False
-            player.save()
-
-        start_round(room, room.current_round)
-        
-        return Response({'next_round': room.current_round})
+    return Response(transition_round(room))
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_round_results(request, room_id):
     """Get detailed results for the current round"""
-    room = get_object_or_404(GameRoom, id=room_id)
-    game_round = get_object_or_404(GameRound, room=room, round_number=room.current_round)
+    rounds = (GameRound.objects
+              .select_related('room', 'question', 'decoy_question', 'result__imposter', 'result__most_voted_player')
+              .prefetch_related(Prefetch('answers', queryset=PlayerAnswer.objects.select_related('player'))))
+    game_round = get_object_or_404(rounds, room_id=room_id, round_number=F('room__current_round'))
+    room = game_round.room
     
     if game_round.status != 'results':
         return Response({'error': 'Round is not in results phase'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get the round end event for detailed results
-    round_end_event = GameEvent.objects.filter(
-        room=room,
-        event_type='round_ended',
-        data__round_number=room.current_round
-    ).first()
-    
-    if not round_end_event:
+    try:
+        result = game_round.result
+    except RoundResult.DoesNotExist:
         return Response({'error': 'Results not found'}, status=status.HTTP_404_NOT_FOUND)
     
     # Get answers with player names
@@ -1367,7 +1464,7 @@ def get_round_results(request, room_id):
             'player_id': answer.player.id,
             'player_nickname': answer.player.nickname,
             'answer': answer.answer,
-            'is_imposter': answer.player == game_round.imposter
+            'is_imposter': answer.player_id == game_round.imposter_id
         })
     
     return Response({
@@ -1375,16 +1472,23 @@ def get_round_results(request, room_id):
         'question_text': game_round.question.text,
         'decoy_question_text': game_round.decoy_question.text,
         'answers_with_players': sorted(answers_with_players, key=lambda x: x['answer']),
-        'results': round_end_event.data,
-        'current_scores': {p.nickname: p.score for p in room.players.all()}
+        'results': result.as_data(),
+        'current_scores': dict(room.players.values_list('nickname', 'score'))
     })
 
 
 @api_view(['GET'])
-@permission_classes([AllowAny])
+@permission_classes([IsAuthenticated])
 def get_game_events(request, room_id):
-    """Get recent game events"""
+    """Get recent game events of a room the user is in; only public fields are sent"""
     room = get_object_or_404(GameRoom, id=room_id)
-    events = room.events.all()[:20]  # Last 20 events
-    serializer = GameEventSerializer(events, many=True)
-    return Response(serializer.data)
+    if not room.players.filter(user=request.user).exists():
+        return Response({'error': 'You are not in this room'}, status=status.HTTP_403_FORBIDDEN)
+    events = event_store().tail(room.id, 20)  # Last 20 events
+    return Response([{
+        'id': event.id,
+        'event_type': event.event_type,
+        'player': event.player.nickname if event.player else None,
+        'timestamp': event.timestamp,
+        **public_event_data(event.event_type, event.data),
+    } for event in events])
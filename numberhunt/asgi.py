@@ -13,4 +13,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'numberhunt.settings')
 
-application = get_asgi_application()
+# Initialize Django before importing anything that touches the models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
+
+from game.middleware import TokenAuthMiddlewareStack
+from game.routing import websocket_urlpatterns
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(
+        TokenAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+    ),
+})
@@ -23,6 +23,7 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1', '192.168.1.55']
 
 # Application definition
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver so WebSocket routes are served in development
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -297,6 +298,7 @@ GAME_SETTINGS = {
     'AUTO_DELETE_FINISHED_ROOMS_HOURS': 24,
     'MAX_INACTIVE_ROOM_HOURS': 2,
     'ROOM_CODE_LENGTH': 6,
+    'ROOM_CODE_POOL_BATCH': 1000,
     
     # Player settings
     'MAX_NICKNAME_LENGTH': 50,
@@ -304,7 +306,23 @@ GAME_SETTINGS = {
     'MAX_REJOIN_TIME_MINUTES': 60,
     
     # Performance settings
+    'LOBBY_SNAPSHOT_SECONDS': 60,
+    'QUESTION_CATALOG_SECONDS': 300,
+    'EVENT_JOURNAL_BATCH_SIZE': 200,
+    'EVENT_JOURNAL_FLUSH_SECONDS': 2.0,
+    
+    # Event storage: 'database' keeps every GameEvent row; 'file' writes
+    # per-room append-only logs and keeps only phase events as rows
+    'EVENT_STORAGE': 'database',
+    'EVENT_LOG_DIR': BASE_DIR / 'event_logs',
+    'EVENT_LOG_SEGMENT_EVENTS': 1000,
+    'EVENT_LOG_RETENTION_DAYS': 30,
+    'REPLAY_SNAPSHOT_EVENTS': 200,
+    'SETTLEMENT_WORKERS': 2,  # 0 settles finished games inline
     'LEADERBOARD_SIZE': 100,
+    # Sorted-set leaderboards: 'redis' shares ZSETs between processes,
+    # 'memory' keeps a skiplist per process
+    'LEADERBOARD_STORE': 'memory' if DEBUG else 'redis',
     'MAX_GAME_HISTORY_ITEMS': 1000,
     'STATISTICS_UPDATE_INTERVAL_MINUTES': 5,
 }